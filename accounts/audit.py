@@ -0,0 +1,266 @@
+"""
+Audit log writer
+كاتب سجل التدقيق
+
+audit() records a sensitive operation without putting an INSERT on the
+request path. Once the caller's transaction commits, the event goes onto a
+bounded in-process queue; events of a rolled back transaction are dropped.
+A daemon thread writes queued events with one bulk_create per batch, either
+every AUDIT_FLUSH_SECONDS or once AUDIT_BATCH_SIZE events are waiting. If
+the database is unavailable, or the queue is full, the events are appended
+as JSON lines to AUDIT_SPILL_PATH. The flusher loads that file back once
+the database accepts writes again; the replay_audit_spill command can do
+the same by hand. A batch that violates a constraint is retried row by row
+and the rows rejected again go to AUDIT_DEAD_LETTER_PATH, so one bad event
+cannot block the spill file forever.
+
+Queued events are lost if the process is killed before a flush. Actions in
+AUDIT_SYNC_ACTIONS (PAYMENT by default) are therefore written synchronously
+inside the caller's transaction and commit or roll back with it.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+def client_ip(request):
+    """عنوان IP للعميل"""
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+def make_event(action, model_name, object_id='', user=None, data=None, request=None):
+    """
+    تجهيز حدث تدقيق كقاموس قابل للتسلسل.
+
+    data is serialized straight away, so later changes by the caller do not
+    leak into the log.
+    """
+    ip_address, user_agent = None, ''
+    if request is not None:
+        ip_address = client_ip(request)
+        user_agent = request.META.get('HTTP_USER_AGENT', '')[:settings.AUDIT_USER_AGENT_LENGTH]
+        if user is None and getattr(request, 'user', None) is not None and request.user.is_authenticated:
+            user = request.user
+    user_id = getattr(user, 'pk', user)
+    return {
+        'user_id': None if user_id is None else str(user_id),
+        'action': action,
+        'model_name': model_name,
+        'object_id': str(object_id),
+        'data': json.dumps(data or {}, cls=DjangoJSONEncoder, ensure_ascii=False),
+        'ip_address': ip_address,
+        'user_agent': user_agent,
+        'timestamp': timezone.now().isoformat(),
+    }
+
+
+def to_entry(event):
+    return AuditLog(
+        user_id=event['user_id'],
+        action=event['action'],
+        model_name=event['model_name'],
+        object_id=event['object_id'],
+        data=json.loads(event['data']),
+        ip_address=event['ip_address'],
+        user_agent=event['user_agent'],
+        timestamp=parse_datetime(event['timestamp']),
+    )
+
+
+class AuditWriter:
+    """
+    طابور أحداث التدقيق وكاتبها الخلفي
+
+    The flusher thread starts with the first event unless autostart is off,
+    in which case events wait for flush().
+    """
+
+    def __init__(self, maxsize=None, batch_size=None, interval=None, spill_path=None, dead_letter_path=None,
+                 autostart=True):
+        self.queue = queue.Queue(maxsize or settings.AUDIT_QUEUE_SIZE)
+        self.batch_size = batch_size or settings.AUDIT_BATCH_SIZE
+        self.interval = interval or settings.AUDIT_FLUSH_SECONDS
+        self.spill_path = str(spill_path or settings.AUDIT_SPILL_PATH)
+        self.dead_letter_path = str(dead_letter_path or settings.AUDIT_DEAD_LETTER_PATH)
+        self._spill_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self.autostart = autostart
+
+    def put(self, event):
+        """إضافة حدث إلى الطابور (أو إلى ملف الفائض إن امتلأ)"""
+        if self.autostart:
+            self.start()
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.spill([event])
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-flusher', daemon=True)
+                self._thread.start()
+
+    def _take(self, timeout):
+        """سحب دفعة من الطابور"""
+        try:
+            batch = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take(self.interval)
+            close_old_connections()
+            if batch and self.write(batch) is not None and os.path.exists(self.spill_path):
+                self.replay_spill()
+
+    def write(self, batch):
+        """
+        كتابة دفعة في قاعدة البيانات.
+
+        Returns the number of events written, or None, after spilling the
+        batch to the file, when the database refused it.
+        """
+        try:
+            with transaction.atomic():
+                AuditLog.objects.bulk_create([to_entry(event) for event in batch], batch_size=self.batch_size)
+        except IntegrityError:
+            return self._write_rows(batch)
+        except DatabaseError:
+            logger.exception("Audit batch of %s events spilled to %s", len(batch), self.spill_path)
+            self.spill(batch)
+            return None
+        return len(batch)
+
+    def _write_rows(self, batch):
+        """كتابة الدفعة صفاً صفاً وعزل الصفوف المرفوضة"""
+        written = 0
+        rejected = []
+        for index, event in enumerate(batch):
+            try:
+                with transaction.atomic():
+                    to_entry(event).save(force_insert=True)
+            except IntegrityError:
+                rejected.append(event)
+            except DatabaseError:
+                logger.exception("Audit batch of %s events spilled to %s", len(batch) - index, self.spill_path)
+                self.spill(batch[index:])
+                break
+            else:
+                written += 1
+        if rejected:
+            logger.error("%s audit events rejected, written to %s", len(rejected), self.dead_letter_path)
+            self._append(self.dead_letter_path, rejected)
+        return written
+
+    def flush(self):
+        """كتابة كل ما في الطابور الآن في الخيط الحالي"""
+        written = 0
+        while True:
+            batch = self._take(0)
+            if not batch:
+                return written
+            written += self.write(batch) or 0
+
+    def spill(self, batch):
+        self._append(self.spill_path, batch)
+
+    def _append(self, path, batch):
+        with self._spill_lock:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as spill:
+                for event in batch:
+                    spill.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+    def replay_spill(self):
+        """
+        تحميل الأحداث المحفوظة في ملف الفائض.
+
+        The file is renamed first, so events spilled meanwhile go to a new
+        file; lines that fail again are spilled back. Returns the number of
+        events written.
+        """
+        replaying = self.spill_path + '.replaying'
+        with self._spill_lock:
+            if not os.path.exists(self.spill_path):
+                return 0
+            os.replace(self.spill_path, replaying)
+
+        written = 0
+        batch = []
+        with open(replaying, encoding='utf-8') as spilled:
+            for line in spilled:
+                if line.strip():
+                    batch.append(json.loads(line))
+                if len(batch) >= self.batch_size:
+                    written += self.write(batch) or 0
+                    batch = []
+        if batch:
+            written += self.write(batch) or 0
+        os.remove(replaying)
+        return written
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditWriter()
+                atexit.register(_writer.flush)
+    return _writer
+
+
+def audit(action, model_name, object_id='', user=None, data=None, request=None, sync=None):
+    """
+    تسجيل عملية حساسة في سجل التدقيق.
+
+    Queued by default, once the current transaction commits. With
+    sync=True, or for actions in AUDIT_SYNC_ACTIONS, the row is inserted
+    now, inside the current transaction, and returned.
+    """
+    event = make_event(action, model_name, object_id, user, data, request)
+    if sync is None:
+        sync = action in settings.AUDIT_SYNC_ACTIONS or not settings.AUDIT_ASYNC
+    if sync:
+        entry = to_entry(event)
+        entry.save(force_insert=True)
+        return entry
+    transaction.on_commit(lambda: get_writer().put(event))
+    return None
+
+
+def flush():
+    """كتابة الأحداث المنتظرة فوراً"""
+    return get_writer().flush() if _writer is not None else 0
@@ -0,0 +1,252 @@
+"""
+Monthly audit log partitions
+تقسيم سجل التدقيق شهرياً
+
+AuditLog is stored one calendar month (UTC) per partition.
+
+On PostgreSQL accounts_auditlog is a natively range-partitioned table (see
+migration 0004). ensure_partitions() creates the coming months ahead of
+time, and a DEFAULT partition catches anything outside them. The planner
+prunes partitions for any query bounded on timestamp.
+
+Other databases keep recent rows in accounts_auditlog. rotate() moves every
+closed month into its own accounts_auditlog_pYYYYMM table with one INSERT
+... SELECT and one ranged DELETE.
+
+On both kinds of database, expire() removes months older than
+AUDIT_RETENTION_MONTHS by dropping their table, after optionally exporting
+it to a gzipped JSON-lines file, so no rows are deleted one by one.
+search() reads only the partitions that overlap the requested range.
+"""
+
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import AuditLog
+
+LIVE_TABLE = AuditLog._meta.db_table
+PARTITION_RE = re.compile(rf'^{LIVE_TABLE}_p(\d{{4}})(\d{{2}})$')
+COLUMNS = [field.column for field in AuditLog._meta.concrete_fields]
+
+
+def native():
+    """هل يدعم محرك قاعدة البيانات التقسيم الأصلي"""
+    return connection.vendor == 'postgresql'
+
+
+def month_start(value):
+    """بداية الشهر (بتوقيت UTC) الذي يقع فيه الوقت"""
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month):
+    return f"{LIVE_TABLE}_p{month:%Y%m}"
+
+
+def partitions():
+    """
+    الأقسام الشهرية الموجودة.
+
+    Returns {month start: table name}.
+    """
+    found = {}
+    with connection.cursor() as cursor:
+        for table in connection.introspection.table_names(cursor):
+            match = PARTITION_RE.match(table)
+            if match:
+                found[datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)] = table
+    return found
+
+
+def _db_value(value):
+    return connection.ops.adapt_datetimefield_value(value)
+
+
+def ensure_partitions(now=None, months_ahead=2):
+    """
+    إنشاء أقسام الأشهر القادمة (PostgreSQL فقط).
+
+    Returns the names of the partitions created.
+    """
+    if not native():
+        return []
+    existing = partitions()
+    current = month_start(now or timezone.now())
+    created = []
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            name = partition_name(month)
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {qn(name)} PARTITION OF {qn(LIVE_TABLE)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [month, add_months(month, 1)],
+            )
+            created.append(name)
+    return created
+
+
+def rotate(now=None):
+    """
+    نقل الأشهر المنتهية من الجدول الحي إلى جداولها (غير PostgreSQL).
+
+    Returns {table name: rows moved}.
+    """
+    if native():
+        return {}
+    current = month_start(now or timezone.now())
+    oldest = AuditLog.objects.filter(timestamp__lt=current).order_by('timestamp').values_list(
+        'timestamp', flat=True
+    ).first()
+    if oldest is None:
+        return {}
+
+    qn = connection.ops.quote_name
+    columns = ', '.join(qn(column) for column in COLUMNS)
+    moved = {}
+    month = month_start(oldest)
+    while month < current:
+        name = partition_name(month)
+        bounds = [_db_value(month), _db_value(add_months(month, 1))]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {qn(name)} AS SELECT {columns} FROM {qn(LIVE_TABLE)} WHERE 0 = 1"
+            )
+            cursor.execute(
+                f"INSERT INTO {qn(name)} ({columns}) SELECT {columns} FROM {qn(LIVE_TABLE)} "
+                f"WHERE {qn('timestamp')} >= %s AND {qn('timestamp')} < %s",
+                bounds,
+            )
+            count = cursor.rowcount
+            cursor.execute(
+                f"DELETE FROM {qn(LIVE_TABLE)} WHERE {qn('timestamp')} >= %s AND {qn('timestamp')} < %s",
+                bounds,
+            )
+            for suffix, fields in (('ts', ['timestamp']), ('obj', ['model_name', 'object_id'])):
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {qn(f'{name}_{suffix}')} ON {qn(name)} "
+                    f"({', '.join(qn(field) for field in fields)})"
+                )
+        if count:
+            moved[name] = count
+        month = add_months(month, 1)
+    return moved
+
+
+def export_partition(name, directory=None):
+    """
+    تصدير قسم إلى ملف JSON lines مضغوط.
+
+    Rows are streamed in chunks. Returns the file path.
+    """
+    directory = str(directory or settings.AUDIT_EXPORT_DIR)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.jsonl.gz")
+    fields = AuditLog._meta.concrete_fields
+    rows = AuditLog.objects.raw(f"SELECT * FROM {connection.ops.quote_name(name)}")
+    with gzip.open(path + '.part', 'wt', encoding='utf-8') as out:
+        for entry in rows.iterator():
+            record = {field.attname: field.value_from_object(entry) for field in fields}
+            out.write(json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+    os.replace(path + '.part', path)
+    return path
+
+
+def drop_partition(name):
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if native():
+            cursor.execute(f"ALTER TABLE {qn(LIVE_TABLE)} DETACH PARTITION {qn(name)}")
+        cursor.execute(f"DROP TABLE {qn(name)}")
+
+
+def expire(now=None, retention_months=None, export=None):
+    """
+    حذف الأشهر الأقدم من مدة الاحتفاظ كاملة.
+
+    Each expired month is exported first when AUDIT_EXPORT_EXPIRED is set,
+    then its table is dropped. Returns the names of the dropped partitions.
+    """
+    now = now or timezone.now()
+    retention_months = retention_months or settings.AUDIT_RETENTION_MONTHS
+    export = settings.AUDIT_EXPORT_EXPIRED if export is None else export
+    rotate(now)
+    cutoff = add_months(month_start(now), -retention_months)
+    dropped = []
+    for month, name in sorted(partitions().items()):
+        if month >= cutoff:
+            continue
+        if export:
+            export_partition(name)
+        drop_partition(name)
+        dropped.append(name)
+    return dropped
+
+
+def maintain(now=None):
+    """صيانة الأقسام: إنشاء القادمة ونقل المنتهية وحذف القديمة"""
+    ensure_partitions(now)
+    return expire(now)
+
+
+def search(start, end, model_name=None, object_id=None, action=None, user_id=None, limit=100):
+    """
+    البحث في سجل التدقيق ضمن مدة زمنية.
+
+    Newest first. Only the live table and the month tables overlapping
+    [start, end) are read, newest month first, stopping once limit rows are
+    found.
+    """
+    filters = {'timestamp__gte': start, 'timestamp__lt': end}
+    if model_name:
+        filters['model_name'] = model_name
+    if object_id:
+        filters['object_id'] = str(object_id)
+    if action:
+        filters['action'] = action
+    if user_id:
+        filters['user_id'] = user_id
+
+    # On PostgreSQL the bounded query is pruned to the right partitions
+    results = list(AuditLog.objects.filter(**filters).order_by('-timestamp')[:limit])
+    if native():
+        return results
+
+    qn = connection.ops.quote_name
+    first, last = month_start(start), month_start(end)
+    for month, name in sorted(partitions().items(), reverse=True):
+        if len(results) >= limit:
+            break
+        if not first <= month <= last:
+            continue
+        where, params = [], []
+        for lookup, value in filters.items():
+            column, _, op = lookup.partition('__')
+            value = AuditLog._meta.get_field(column).get_db_prep_value(value, connection)
+            where.append(f"{qn(column)} {'>=' if op == 'gte' else '<' if op == 'lt' else '='} %s")
+            params.append(value)
+        results.extend(AuditLog.objects.raw(
+            f"SELECT * FROM {qn(name)} WHERE {' AND '.join(where)} "
+            f"ORDER BY {qn('timestamp')} DESC LIMIT %s",
+            params + [limit - len(results)],
+        ))
+    # Late events can be rotated after newer ones
+    results.sort(key=lambda entry: entry.timestamp, reverse=True)
+    return results[:limit]
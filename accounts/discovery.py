@@ -0,0 +1,165 @@
+"""
+Designer discovery
+البحث عن المصممين
+
+DesignerProfile keeps skills, specializations and preferred categories as
+JSON lists. Each value is mirrored, normalized, into DesignerTag, which
+sync_tags() updates on every profile save. search() combines tag filters
+with availability, free capacity, skill level and rating in a single
+indexed query. Result pages are cached in a namespace that any profile
+change invalidates, as the design catalog does.
+"""
+
+import hashlib
+import json
+
+from django.db.models import F
+
+from accounts.models import DesignerProfile, DesignerTag
+from skydesign.cache import Namespace
+
+
+PAGES = Namespace('accounts:designers', timeout=60 * 5)
+
+# JSON field of DesignerProfile for each tag kind
+TAG_FIELDS = {
+    'skill': 'skills',
+    'specialization': 'specializations',
+    'category': 'preferred_categories',
+}
+
+LEVELS = [level for level, _ in DesignerProfile.SKILL_LEVEL_CHOICES]
+
+MAX_TAG_LENGTH = DesignerTag._meta.get_field('value').max_length
+
+
+def normalize_tag(value):
+    """توحيد قيمة الوسم (أحرف صغيرة بلا مسافات زائدة)"""
+    return ' '.join(str(value).split()).lower()[:MAX_TAG_LENGTH]
+
+
+def profile_tags(profile):
+    """مجموعة (النوع، القيمة) المطلوبة لملف المصمم"""
+    tags = set()
+    for kind, field in TAG_FIELDS.items():
+        values = getattr(profile, field) or []
+        if not isinstance(values, list):
+            values = [values]
+        for value in values:
+            value = normalize_tag(value)
+            if value:
+                tags.add((kind, value))
+    return tags
+
+
+def sync_tags(profile):
+    """
+    مزامنة وسوم المصمم مع حقول JSON.
+
+    Inserts and deletes only the difference. Returns (added, removed).
+    """
+    wanted = profile_tags(profile)
+    existing = {
+        (kind, value): pk
+        for pk, kind, value in DesignerTag.objects.filter(profile=profile).values_list('pk', 'kind', 'value')
+    }
+    stale = [pk for tag, pk in existing.items() if tag not in wanted]
+    if stale:
+        DesignerTag.objects.filter(pk__in=stale).delete()
+    DesignerTag.objects.bulk_create(
+        [DesignerTag(profile=profile, kind=kind, value=value) for kind, value in wanted - existing.keys()],
+        ignore_conflicts=True,
+    )
+    return len(wanted - existing.keys()), len(stale)
+
+
+def rebuild_tags(batch_size=1000):
+    """إعادة بناء جميع الوسوم من ملفات المصممين"""
+    DesignerTag.objects.all().delete()
+    tags = []
+    count = 0
+    profiles = DesignerProfile.objects.only('pk', *TAG_FIELDS.values()).order_by()
+    for profile in profiles.iterator(chunk_size=batch_size):
+        tags.extend(DesignerTag(profile_id=profile.pk, kind=kind, value=value) for kind, value in profile_tags(profile))
+        if len(tags) >= batch_size:
+            DesignerTag.objects.bulk_create(tags, batch_size=batch_size)
+            count += len(tags)
+            tags = []
+    DesignerTag.objects.bulk_create(tags, batch_size=batch_size)
+    invalidate()
+    return count + len(tags)
+
+
+def filter_designers(skills=(), specializations=(), categories=(), available=False,
+                     min_level=None, min_rating=None):
+    """
+    استعلام المصممين المطابقين.
+
+    Within one kind any listed value matches; different kinds must all
+    match. available also requires free capacity.
+    """
+    profiles = DesignerProfile.objects.filter(user__is_active=True)
+    for kind, values in (('skill', skills), ('specialization', specializations), ('category', categories)):
+        values = {normalize_tag(value) for value in values if normalize_tag(value)}
+        if values:
+            profiles = profiles.filter(
+                pk__in=DesignerTag.objects.filter(kind=kind, value__in=values).values('profile')
+            )
+    if available:
+        profiles = profiles.filter(is_available=True, ongoing_projects__lt=F('max_concurrent_projects'))
+    if min_level:
+        profiles = profiles.filter(skill_level__in=LEVELS[LEVELS.index(min_level):])
+    if min_rating is not None:
+        profiles = profiles.filter(rating__gte=min_rating)
+    return profiles.order_by('-rating', '-completed_projects', 'pk')
+
+
+def _serialize(profile):
+    return {
+        'id': str(profile.user_id),
+        'name': profile.user.name,
+        'skill_level': profile.skill_level,
+        'rating': str(profile.rating),
+        'completed_projects': profile.completed_projects,
+        'is_available': profile.is_available,
+        'free_slots': max(profile.max_concurrent_projects - profile.ongoing_projects, 0),
+        'skills': profile.skills,
+        'specializations': profile.specializations,
+        'hourly_rate': profile.hourly_rate and str(profile.hourly_rate),
+    }
+
+
+def search(page=1, page_size=20, **filters):
+    """
+    صفحة من نتائج البحث عن المصممين.
+
+    Cached per filter set and page until a designer profile changes.
+    Returns {'results', 'page', 'has_next'}.
+    """
+    if filters.get('min_level') not in (None, *LEVELS):
+        raise ValueError("Unknown skill level")
+    normalized = {
+        key: sorted({normalize_tag(v) for v in value}) if isinstance(value, (list, tuple, set)) else value
+        for key, value in sorted(filters.items())
+    }
+    digest = hashlib.sha1(
+        json.dumps([normalized, page, page_size], default=str).encode()
+    ).hexdigest()
+
+    def compute():
+        offset = (page - 1) * page_size
+        rows = list(
+            filter_designers(**filters).select_related('user')[offset:offset + page_size + 1]
+        )
+        return {
+            'results': [_serialize(profile) for profile in rows[:page_size]],
+            'page': page,
+            'has_next': len(rows) > page_size,
+        }
+
+    return PAGES.get_or_set(digest, compute)
+
+
+def invalidate():
+    """إبطال الصفحات المخزنة بعد تعديل أي ملف مصمم"""
+    PAGES.invalidate()
@@ -0,0 +1,136 @@
+"""
+Points and balance ledger
+سجل النقاط والرصيد
+
+User.points and User.balance are never written directly. Each change is
+posted as an insert-only LedgerEntry and applied to the user row with an
+F() expression in the same short transaction, so concurrent credits cannot
+overwrite each other. Every entry carries an idempotency key: posting the
+same key twice applies it once. reconcile() compares the stored values with
+the ledger sums and reports (or repairs) any drift.
+"""
+
+import logging
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from accounts.audit import audit
+from accounts.models import LedgerEntry, User
+
+logger = logging.getLogger(__name__)
+
+# Entries that move money are also written to the audit log
+MONEY_KINDS = ('PAYMENT', 'REFUND')
+
+
+class LedgerError(Exception):
+    """خطأ في سجل النقاط"""
+
+
+class InsufficientFunds(LedgerError):
+    """الرصيد أو النقاط غير كافية"""
+
+
+def post(user_id, kind, idempotency_key, points=0, amount=0, reference='', description='',
+         allow_negative=False):
+    """
+    تسجيل قيد وتطبيقه على حساب المستخدم.
+
+    Returns (entry, created). When the key was already posted the existing
+    entry is returned with created=False and nothing is applied again.
+    Debits that would take points or balance below zero raise
+    InsufficientFunds unless allow_negative is set.
+    """
+    amount = Decimal(amount)
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                entry = LedgerEntry.objects.create(
+                    user_id=user_id,
+                    kind=kind,
+                    points=points,
+                    amount=amount,
+                    idempotency_key=idempotency_key,
+                    reference=reference,
+                    description=description,
+                )
+        except IntegrityError:
+            return LedgerEntry.objects.get(idempotency_key=idempotency_key), False
+
+        users = User.objects.filter(pk=user_id)
+        if not allow_negative:
+            # The guard is part of the UPDATE, so it holds under concurrency
+            if points < 0:
+                users = users.filter(points__gte=-points)
+            if amount < 0:
+                users = users.filter(balance__gte=-amount)
+        if not users.update(points=F('points') + points, balance=F('balance') + amount):
+            raise InsufficientFunds(f"Insufficient points or balance for user {user_id}")
+        if kind in MONEY_KINDS:
+            # PAYMENT is a synchronous audit action, so it commits with the entry
+            audit('PAYMENT', 'LedgerEntry', entry.pk, user=user_id, data={
+                'kind': kind,
+                'amount': amount,
+                'points': points,
+                'reference': reference,
+            })
+    return entry, True
+
+
+def credit_points(user_id, points, idempotency_key, kind='ADJUSTMENT', **kwargs):
+    """إضافة نقاط (أو خصمها بقيمة سالبة)"""
+    return post(user_id, kind, idempotency_key, points=points, **kwargs)
+
+
+def credit_balance(user_id, amount, idempotency_key, kind='ADJUSTMENT', **kwargs):
+    """إضافة مبلغ إلى الرصيد (أو خصمه بقيمة سالبة)"""
+    return post(user_id, kind, idempotency_key, amount=amount, **kwargs)
+
+
+def _ledger_totals():
+    entries = LedgerEntry.objects.filter(user=OuterRef('pk')).order_by().values('user')
+    return {
+        'ledger_points': Coalesce(
+            Subquery(entries.annotate(total=Sum('points')).values('total'), output_field=IntegerField()),
+            Value(0),
+        ),
+        'ledger_balance': Coalesce(
+            Subquery(entries.annotate(total=Sum('amount')).values('total'), output_field=DecimalField()),
+            Value(Decimal('0')),
+            output_field=DecimalField(),
+        ),
+    }
+
+
+def reconcile(fix=False):
+    """
+    مطابقة أرصدة المستخدمين مع مجاميع السجل.
+
+    Returns a list of mismatches as dicts. Each user row and its sums are
+    read in one statement. With fix=True the user row is locked, the sums are
+    read again and the stored values are set to them; the ledger is the
+    source of truth.
+    """
+    mismatches = list(
+        User.objects.annotate(**_ledger_totals())
+        .filter(~Q(points=F('ledger_points')) | ~Q(balance=F('ledger_balance')))
+        .values('pk', 'points', 'ledger_points', 'balance', 'ledger_balance')
+    )
+    for row in mismatches:
+        logger.warning(
+            "Ledger mismatch for user %s: points %s != %s, balance %s != %s",
+            row['pk'], row['points'], row['ledger_points'], row['balance'], row['ledger_balance'],
+        )
+        if fix:
+            with transaction.atomic():
+                list(User.objects.select_for_update().filter(pk=row['pk']).values_list('pk'))
+                totals = User.objects.annotate(**_ledger_totals()).values(
+                    'ledger_points', 'ledger_balance'
+                ).get(pk=row['pk'])
+                User.objects.filter(pk=row['pk']).update(
+                    points=totals['ledger_points'], balance=totals['ledger_balance']
+                )
+    return mismatches
@@ -0,0 +1,29 @@
+"""
+Management command to rotate, export and expire monthly audit partitions
+صيانة أقسام سجل التدقيق الشهرية
+"""
+
+from django.core.management.base import BaseCommand
+
+from accounts import audit_partitions
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming AuditLog partitions, rotate closed months and drop expired ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-export',
+            action='store_true',
+            help='Drop expired months without exporting them first',
+        )
+
+    def handle(self, *args, **kwargs):
+        for name in audit_partitions.ensure_partitions():
+            self.stdout.write(f"Created {name}")
+        for name, count in audit_partitions.rotate().items():
+            self.stdout.write(f"Moved {count} rows to {name}")
+        export = False if kwargs['no_export'] else None
+        for name in audit_partitions.expire(export=export):
+            self.stdout.write(f"Dropped {name}")
+        self.stdout.write(self.style.SUCCESS("✅ Audit partitions maintained"))
@@ -0,0 +1,16 @@
+"""
+Management command to rebuild the designer tag index
+إعادة بناء فهرس وسوم المصممين
+"""
+
+from django.core.management.base import BaseCommand
+
+from accounts.discovery import rebuild_tags
+
+
+class Command(BaseCommand):
+    help = 'Rebuild DesignerTag rows from DesignerProfile skills, specializations and categories'
+
+    def handle(self, *args, **kwargs):
+        count = rebuild_tags()
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {count} designer tags"))
@@ -0,0 +1,33 @@
+"""
+Management command to check user points and balances against the ledger
+مطابقة نقاط وأرصدة المستخدمين مع سجل النقاط
+"""
+
+from django.core.management.base import BaseCommand
+
+from accounts.ledger import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Compare User.points and User.balance with the sums of their ledger entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Set mismatched accounts to their ledger sums',
+        )
+
+    def handle(self, *args, **kwargs):
+        mismatches = reconcile(fix=kwargs['fix'])
+        for row in mismatches:
+            self.stdout.write(
+                f"{row['pk']}: points {row['points']} (ledger {row['ledger_points']}), "
+                f"balance {row['balance']} (ledger {row['ledger_balance']})"
+            )
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("✅ All accounts match the ledger"))
+        elif kwargs['fix']:
+            self.stdout.write(self.style.SUCCESS(f"✅ Repaired {len(mismatches)} accounts"))
+        else:
+            self.stdout.write(self.style.WARNING(f"⚠️ {len(mismatches)} accounts do not match the ledger"))
@@ -0,0 +1,16 @@
+"""
+Management command to load spilled audit events into the database
+تحميل أحداث التدقيق المحفوظة في ملف الفائض
+"""
+
+from django.core.management.base import BaseCommand
+
+from accounts.audit import get_writer
+
+
+class Command(BaseCommand):
+    help = 'Write audit events spilled to AUDIT_SPILL_PATH into AuditLog'
+
+    def handle(self, *args, **kwargs):
+        count = get_writer().replay_spill()
+        self.stdout.write(self.style.SUCCESS(f"✅ Replayed {count} audit events"))
@@ -1,12 +1,19 @@
 """
 Management command to seed initial data
 إنشاء البيانات الأولية للتطبيق
+
+With --scale N it then generates N synthetic users and their activity for
+performance work (see accounts.synthetic).
 """
 
-from django.core.management.base import BaseCommand
+import time
+
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.db import transaction
 from accounts.models import Grade, Subject, DesignerProfile
+from accounts.synthetic import DEMO_PASSWORD, SyntheticData
 from designs.models import DesignCategory, DesignSize, PriceSetting
 from games.models import WheelOfFortune, PuzzleGame
 import json
@@ -17,6 +24,14 @@ User = get_user_model()
 class Command(BaseCommand):
     help = 'Seed initial data including admin user and sample data'
     
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=int,
+            help='Also generate this many synthetic users with requests, chats, notifications and games'
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for --scale')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per bulk insert for --scale')
+    
     def handle(self, *args, **kwargs):
         self.stdout.write("🌱 Starting data seeding...")
         
@@ -36,8 +51,34 @@ class Command(BaseCommand):
         # Create games
         self.create_games()
         
+        if kwargs.get('scale'):
+            self.create_synthetic_data(kwargs['scale'], kwargs['seed'], kwargs['chunk_size'])
+        
         self.stdout.write(self.style.SUCCESS("✅ Data seeding completed successfully!"))
     
+    def create_synthetic_data(self, scale, seed, chunk_size):
+        """Generate a production-sized dataset in one transaction"""
+        if scale < 20:
+            raise CommandError("--scale must be at least 20")
+        
+        def report(label, rows, seconds):
+            self.stdout.write(f"  {label:<28} {rows:>10,} rows  {seconds:8.1f} s  {rows / max(seconds, 1e-9):>10,.0f} rows/s")
+        
+        self.stdout.write(f"🏭 Generating synthetic data: scale={scale} seed={seed}")
+        generator = SyntheticData(scale, seed=seed, chunk_size=chunk_size, report=report)
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                counts = generator.run()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+        rows = sum(counts.values())
+        self.stdout.write(
+            f"✅ {rows:,} rows in {elapsed:.1f} s ({rows / max(elapsed, 1e-9):,.0f} rows/s); "
+            f"synthetic users log in with password {DEMO_PASSWORD}"
+        )
+    
     def create_admin_user(self):
         """Create admin user with credentials admin/admin123"""
         admin_username = settings.ADMIN_USERNAME
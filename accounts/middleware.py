@@ -0,0 +1,25 @@
+"""
+Account middleware
+وسيط الحسابات
+"""
+
+from accounts import presence
+
+
+class LastSeenMiddleware:
+    """
+    Records the authenticated user's activity after each request.
+
+    Runs after the view so users authenticated by DRF are seen too; the
+    write itself is batched by accounts.presence.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated and presence.touch(user.pk):
+            presence.flush()
+        return response
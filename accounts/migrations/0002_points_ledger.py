@@ -0,0 +1,120 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def open_ledger(apps, schema_editor):
+    # Existing points and balances become opening entries, so every account
+    # reconciles against its ledger from the start
+    User = apps.get_model("accounts", "User")
+    LedgerEntry = apps.get_model("accounts", "LedgerEntry")
+
+    batch = []
+    users = User.objects.exclude(points=0, balance=0).values_list("pk", "points", "balance")
+    for pk, points, balance in users.iterator(chunk_size=1000):
+        batch.append(
+            LedgerEntry(
+                user_id=pk,
+                kind="OPENING",
+                points=points,
+                amount=balance,
+                idempotency_key=f"opening:{pk}",
+            )
+        )
+        if len(batch) >= 1000:
+            LedgerEntry.objects.bulk_create(batch)
+            batch = []
+    LedgerEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerEntry",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("OPENING", "رصيد افتتاحي"),
+                            ("WHEEL_PRIZE", "جائزة عجلة الحظ"),
+                            ("PUZZLE_REWARD", "مكافأة البازل"),
+                            ("PAYMENT", "دفع"),
+                            ("REFUND", "استرداد"),
+                            ("REDEMPTION", "استبدال"),
+                            ("ADJUSTMENT", "تسوية"),
+                        ],
+                        max_length=20,
+                        verbose_name="النوع",
+                    ),
+                ),
+                ("points", models.IntegerField(default=0, verbose_name="النقاط")),
+                (
+                    "amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=10,
+                        verbose_name="المبلغ",
+                    ),
+                ),
+                (
+                    "idempotency_key",
+                    models.CharField(
+                        max_length=100, unique=True, verbose_name="مفتاح عدم التكرار"
+                    ),
+                ),
+                (
+                    "reference",
+                    models.CharField(blank=True, max_length=255, verbose_name="المرجع"),
+                ),
+                (
+                    "description",
+                    models.CharField(blank=True, max_length=255, verbose_name="الوصف"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="تاريخ الإنشاء"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_entries",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="المستخدم",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "قيد",
+                "verbose_name_plural": "سجل النقاط والرصيد",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["user", "created_at"],
+                        name="accounts_le_user_id_3c4a94_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
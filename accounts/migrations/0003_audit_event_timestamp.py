@@ -0,0 +1,20 @@
+# Generated by Django 4.2.8 on 2026-10-19 09:08
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0002_points_ledger"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="auditlog",
+            name="timestamp",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, verbose_name="الوقت"
+            ),
+        ),
+    ]
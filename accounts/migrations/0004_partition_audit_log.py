@@ -0,0 +1,85 @@
+# Generated by Django 4.2.8 on 2026-10-19 09:10
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Frozen copies of the accounts.audit_partitions helpers as of this migration
+def month_start(value):
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_audit_log(apps, schema_editor):
+    # Native partitioning is PostgreSQL only; other databases rotate
+    # closed months into their own tables (accounts.audit_partitions)
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    AuditLog = apps.get_model("accounts", "AuditLog")
+    table = AuditLog._meta.db_table
+    old = f"{table}_old"
+    qn = schema_editor.quote_name
+
+    schema_editor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(old)}")
+    schema_editor.execute(
+        f"CREATE TABLE {qn(table)} (LIKE {qn(old)} INCLUDING DEFAULTS) "
+        f"PARTITION BY RANGE ({qn('timestamp')})"
+    )
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT MIN({qn('timestamp')}) FROM {qn(old)}")
+        oldest = cursor.fetchone()[0]
+    now = timezone.now()
+    month = month_start(oldest or now)
+    last = add_months(month_start(now), 2)
+    while month <= last:
+        schema_editor.execute(
+            f"CREATE TABLE {qn(f'{table}_p{month:%Y%m}')} PARTITION OF {qn(table)} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [month, add_months(month, 1)],
+        )
+        month = add_months(month, 1)
+    schema_editor.execute(f"CREATE TABLE {qn(table + '_default')} PARTITION OF {qn(table)} DEFAULT")
+
+    schema_editor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(old)}")
+    schema_editor.execute(f"DROP TABLE {qn(old)}")
+
+    # A partitioned table's primary key must include the partition key
+    schema_editor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY ({qn('id')}, {qn('timestamp')})")
+    user_table = AuditLog._meta.get_field("user").related_model._meta.db_table
+    schema_editor.execute(
+        f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + '_user_id_fk')} "
+        f"FOREIGN KEY ({qn('user_id')}) REFERENCES {qn(user_table)} ({qn('id')}) "
+        f"DEFERRABLE INITIALLY DEFERRED"
+    )
+    # LIKE does not copy indexes: the foreign key's own index, as Django
+    # names it, and the Meta indexes are created again
+    schema_editor.execute(
+        schema_editor._create_index_sql(AuditLog, fields=[AuditLog._meta.get_field("user")])
+    )
+    for index in AuditLog._meta.indexes:
+        schema_editor.add_index(AuditLog, index)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0003_audit_event_timestamp"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["timestamp"], name="accounts_au_timesta_276167_idx"
+            ),
+        ),
+        migrations.RunPython(partition_audit_log, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,112 @@
+# Generated by Django 4.2.8 on 2026-10-19 09:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Frozen copy of accounts.discovery's tag extraction as of this migration
+TAG_FIELDS = {
+    "skill": "skills",
+    "specialization": "specializations",
+    "category": "preferred_categories",
+}
+MAX_TAG_LENGTH = 100
+
+
+def normalize_tag(value):
+    return " ".join(str(value).split()).lower()[:MAX_TAG_LENGTH]
+
+
+def profile_tags(profile):
+    tags = set()
+    for kind, field in TAG_FIELDS.items():
+        values = getattr(profile, field) or []
+        if not isinstance(values, list):
+            values = [values]
+        for value in values:
+            value = normalize_tag(value)
+            if value:
+                tags.add((kind, value))
+    return tags
+
+
+def index_designer_tags(apps, schema_editor):
+    DesignerProfile = apps.get_model("accounts", "DesignerProfile")
+    DesignerTag = apps.get_model("accounts", "DesignerTag")
+    tags = []
+    for profile in DesignerProfile.objects.order_by().iterator(chunk_size=1000):
+        tags.extend(
+            DesignerTag(profile_id=profile.pk, kind=kind, value=value)
+            for kind, value in profile_tags(profile)
+        )
+    DesignerTag.objects.bulk_create(tags, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0004_partition_audit_log"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DesignerTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("skill", "مهارة"),
+                            ("specialization", "تخصص"),
+                            ("category", "فئة"),
+                        ],
+                        max_length=20,
+                        verbose_name="النوع",
+                    ),
+                ),
+                ("value", models.CharField(max_length=100, verbose_name="القيمة")),
+            ],
+            options={
+                "verbose_name": "وسم مصمم",
+                "verbose_name_plural": "وسوم المصممين",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="designerprofile",
+            index=models.Index(
+                fields=["is_available", "-rating", "-completed_projects"],
+                name="accounts_de_is_avai_9a3d99_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="designertag",
+            name="profile",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tags",
+                to="accounts.designerprofile",
+                verbose_name="ملف المصمم",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="designertag",
+            index=models.Index(
+                fields=["kind", "value", "profile"], name="accounts_de_kind_4ce263_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="designertag",
+            constraint=models.UniqueConstraint(
+                fields=("profile", "kind", "value"), name="unique_designer_tag"
+            ),
+        ),
+        migrations.RunPython(index_designer_tags, migrations.RunPython.noop),
+    ]
@@ -143,8 +143,12 @@ class User(AbstractUser):
         return self.role == 'CLIENT'
     
     def update_last_seen(self):
+        """تسجيل الظهور (يُكتب على دفعات، انظر accounts.presence)"""
+        from accounts import presence
+        
         self.last_seen = timezone.now()
-        self.save(update_fields=['last_seen'])
+        if presence.touch(self.pk, self.last_seen):
+            presence.flush()
 
 
 class DesignerProfile(models.Model):
@@ -223,6 +227,9 @@ class DesignerProfile(models.Model):
         verbose_name = _("ملف تعريف المصمم")
         verbose_name_plural = _("ملفات تعريف المصممين")
         ordering = ['-rating', '-completed_projects']
+        indexes = [
+            models.Index(fields=['is_available', '-rating', '-completed_projects']),
+        ]
     
     def __str__(self):
         return f"مصمم: {self.user.name}"
@@ -257,8 +264,50 @@ class DesignerProfile(models.Model):
         ])
 
 
+class DesignerTag(models.Model):
+    """
+    وسم مفهرس لمهارات المصمم وتخصصاته وفئاته
+    
+    One row per normalized value of DesignerProfile.skills, specializations
+    and preferred_categories, kept in sync on save (accounts.discovery), so
+    designers can be found by tag with an index instead of reading JSON.
+    """
+    
+    KIND_CHOICES = [
+        ('skill', 'مهارة'),
+        ('specialization', 'تخصص'),
+        ('category', 'فئة'),
+    ]
+    
+    profile = models.ForeignKey(
+        DesignerProfile,
+        on_delete=models.CASCADE,
+        related_name='tags',
+        verbose_name=_("ملف المصمم")
+    )
+    kind = models.CharField(_("النوع"), max_length=20, choices=KIND_CHOICES)
+    value = models.CharField(_("القيمة"), max_length=100)
+    
+    class Meta:
+        verbose_name = _("وسم مصمم")
+        verbose_name_plural = _("وسوم المصممين")
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'kind', 'value'], name='unique_designer_tag'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'value', 'profile']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind}: {self.value}"
+
+
 class AuditLog(models.Model):
-    """سجل التدقيق لتتبع جميع العمليات الحساسة"""
+    """
+    سجل التدقيق لتتبع جميع العمليات الحساسة
+    
+    Stored in monthly partitions, see accounts.audit_partitions.
+    """
     
     ACTION_CHOICES = [
         ('CREATE', 'إنشاء'),
@@ -284,7 +333,8 @@ class AuditLog(models.Model):
     data = models.JSONField(_("البيانات"), default=dict, blank=True)
     ip_address = models.GenericIPAddressField(_("عنوان IP"), null=True, blank=True)
     user_agent = models.TextField(_("وكيل المستخدم"), blank=True)
-    timestamp = models.DateTimeField(_("الوقت"), auto_now_add=True)
+    # Set when the event happens, not when the batch is written
+    timestamp = models.DateTimeField(_("الوقت"), default=timezone.now)
     
     class Meta:
         verbose_name = _("سجل تدقيق")
@@ -294,7 +344,62 @@ class AuditLog(models.Model):
             models.Index(fields=['user', 'timestamp']),
             models.Index(fields=['action', 'timestamp']),
             models.Index(fields=['model_name', 'object_id']),
+            models.Index(fields=['timestamp']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_action_display()} - {self.user} - {self.timestamp}"
+
+
+class LedgerEntry(models.Model):
+    """
+    قيد في سجل النقاط والرصيد
+    
+    Insert-only: every change to User.points or User.balance is one entry,
+    so the stored values always equal the sum of the user's entries. The
+    idempotency key makes retried credits harmless.
+    """
+    
+    KIND_CHOICES = [
+        ('OPENING', 'رصيد افتتاحي'),
+        ('WHEEL_PRIZE', 'جائزة عجلة الحظ'),
+        ('PUZZLE_REWARD', 'مكافأة البازل'),
+        ('PAYMENT', 'دفع'),
+        ('REFUND', 'استرداد'),
+        ('REDEMPTION', 'استبدال'),
+        ('ADJUSTMENT', 'تسوية'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='ledger_entries',
+        verbose_name=_("المستخدم")
+    )
+    kind = models.CharField(_("النوع"), max_length=20, choices=KIND_CHOICES)
+    points = models.IntegerField(_("النقاط"), default=0)
+    amount = models.DecimalField(_("المبلغ"), max_digits=10, decimal_places=2, default=0)
+    idempotency_key = models.CharField(_("مفتاح عدم التكرار"), max_length=100, unique=True)
+    reference = models.CharField(_("المرجع"), max_length=255, blank=True)
+    description = models.CharField(_("الوصف"), max_length=255, blank=True)
+    created_at = models.DateTimeField(_("تاريخ الإنشاء"), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _("قيد")
+        verbose_name_plural = _("سجل النقاط والرصيد")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
         ]
     
     def __str__(self):
-        return f"{self.get_action_display()} - {self.user} - {self.timestamp}"
\ No newline at end of file
+        return f"{self.get_kind_display()} - {self.user_id} - {self.points} / {self.amount}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Ledger entries cannot be changed; post a new entry instead")
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError("Ledger entries cannot be deleted; post a new entry instead")
@@ -0,0 +1,28 @@
+"""
+Role-based API permissions
+صلاحيات الواجهات حسب دور المستخدم
+"""
+
+from rest_framework.permissions import BasePermission
+
+
+class IsManager(BasePermission):
+    """المدراء فقط"""
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.is_manager)
+
+
+class IsDesigner(BasePermission):
+    """المصممون فقط"""
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.is_designer)
+
+
+class IsDesignerOrManager(BasePermission):
+    """المصممون والمدراء"""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and (user.is_designer or user.is_manager))
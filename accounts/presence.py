@@ -0,0 +1,122 @@
+"""
+Last-seen tracking
+تتبع آخر ظهور المستخدمين
+
+touch() records a user's activity in this process's memory and does no
+I/O. A user already written less than LAST_SEEN_THRESHOLD_SECONDS ago is
+skipped. Once LAST_SEEN_FLUSH_SECONDS have passed, the caller that notices
+runs flush(), which writes every pending timestamp with one UPDATE per few
+hundred users. Rows another worker moved within the threshold are left
+alone. HTTP requests are tracked by LastSeenMiddleware and WebSocket
+messages by atouch(), so "last seen" costs about one UPDATE per worker per
+interval however busy the site is. If the database refuses a flush, the
+unwritten timestamps go back to the pending set for the next one. Activity
+not yet flushed when a worker stops is lost, which at worst makes someone
+look one interval older.
+"""
+
+import logging
+import time
+from datetime import timedelta
+from threading import Lock
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Case, DateTimeField, Q, Value, When
+from django.utils import timezone
+
+from accounts.models import User
+
+logger = logging.getLogger(__name__)
+
+# Users per UPDATE, well under SQLite's bound parameter limit
+BATCH_SIZE = 300
+
+_pending = {}
+_written = {}
+_lock = Lock()
+_next_flush = time.monotonic() + settings.LAST_SEEN_FLUSH_SECONDS
+
+
+def touch(user_id, now=None):
+    """
+    تسجيل نشاط المستخدم في الذاكرة.
+
+    Returns True when a flush is due.
+    """
+    now = now or timezone.now()
+    threshold = timedelta(seconds=settings.LAST_SEEN_THRESHOLD_SECONDS)
+    with _lock:
+        written = _written.get(user_id)
+        if written is None or now - written >= threshold:
+            _pending[user_id] = now
+        return time.monotonic() >= _next_flush
+
+
+def flush(now=None):
+    """
+    كتابة أوقات الظهور المعلقة في قاعدة البيانات.
+
+    Returns the number of users updated. Database errors are logged, not
+    raised, so a request never fails because of last-seen tracking.
+    """
+    global _pending, _next_flush
+    now = now or timezone.now()
+    threshold = timedelta(seconds=settings.LAST_SEEN_THRESHOLD_SECONDS)
+    with _lock:
+        pending, _pending = _pending, {}
+        _next_flush = time.monotonic() + settings.LAST_SEEN_FLUSH_SECONDS
+        # Only recent writes can still suppress a touch
+        for user_id in [u for u, seen in _written.items() if now - seen >= threshold]:
+            del _written[user_id]
+    if not pending:
+        return 0
+
+    updated = 0
+    written = {}
+    stale = Q(last_seen__isnull=True) | Q(last_seen__lt=now - threshold)
+    items = list(pending.items())
+    try:
+        for start in range(0, len(items), BATCH_SIZE):
+            batch = items[start:start + BATCH_SIZE]
+            updated += User.objects.filter(stale, pk__in=[user_id for user_id, _ in batch]).update(
+                last_seen=Case(
+                    *[When(pk=user_id, then=Value(seen)) for user_id, seen in batch],
+                    output_field=DateTimeField(),
+                )
+            )
+            written.update(batch)
+    except DatabaseError:
+        logger.exception("Could not write last seen for %s users", len(items) - len(written))
+        with _lock:
+            for user_id, seen in items:
+                # Keep newer activity recorded since the flush started
+                if user_id not in written and seen > _pending.get(user_id, seen - threshold):
+                    _pending[user_id] = seen
+    with _lock:
+        _written.update(written)
+    return updated
+
+
+def last_seen(user):
+    """آخر ظهور للمستخدم بما فيه النشاط غير المكتوب بعد في هذه العملية"""
+    with _lock:
+        pending = _pending.get(user.pk) or _written.get(user.pk)
+    if pending and (user.last_seen is None or pending > user.last_seen):
+        return pending
+    return user.last_seen
+
+
+async def atouch(user):
+    """تسجيل نشاط من اتصال WebSocket"""
+    if user is not None and user.is_authenticated and touch(user.pk):
+        await database_sync_to_async(flush)()
+
+
+def clear():
+    global _next_flush
+    with _lock:
+        _pending.clear()
+        _written.clear()
+        _next_flush = time.monotonic() + settings.LAST_SEEN_FLUSH_SECONDS
@@ -0,0 +1,38 @@
+"""
+Signal handlers for the accounts app
+معالجات الإشارات لتطبيق الحسابات
+"""
+
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts import discovery
+from accounts.audit import audit
+from accounts.models import DesignerProfile
+
+
+@receiver(user_logged_in)
+def audit_login(sender, request, user, **kwargs):
+    """تسجيل الدخول في سجل التدقيق"""
+    audit('LOGIN', 'User', user.pk, user=user, request=request)
+
+
+@receiver(user_logged_out)
+def audit_logout(sender, request, user, **kwargs):
+    """تسجيل الخروج في سجل التدقيق"""
+    if user is not None:
+        audit('LOGOUT', 'User', user.pk, user=user, request=request)
+
+
+@receiver(post_save, sender=DesignerProfile)
+def sync_designer_tags(sender, instance, update_fields=None, **kwargs):
+    """مزامنة وسوم المصمم وإبطال نتائج البحث"""
+    if not update_fields or set(discovery.TAG_FIELDS.values()) & set(update_fields):
+        discovery.sync_tags(instance)
+    discovery.invalidate()
+
+
+@receiver(post_delete, sender=DesignerProfile)
+def forget_designer(sender, instance, **kwargs):
+    discovery.invalidate()
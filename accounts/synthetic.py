@@ -0,0 +1,542 @@
+"""
+Synthetic data generator
+مولد البيانات التجريبية بأحجام الإنتاج
+
+SyntheticData(scale=N) creates N users and the activity around them:
+designers with profiles and tags, about two design requests per user
+spread over every status, conversations with messages for assigned
+requests, notifications, wheel spins and puzzle attempts. Users start with
+no points and earn them the way real players do: every claimed points
+prize and completed puzzle is a LedgerEntry and every spin and completed
+puzzle a ScoreEvent, so reconcile_ledger finds nothing to fix and the
+leaderboards rank the generated players. Rows are built
+in memory and written with bulk_create, chunk_size rows at a time, so
+generating hundreds of thousands of users takes minutes rather than hours.
+
+Everything is drawn from one random.Random(seed): the same seed and scale
+give the same usernames, primary keys and contents. Timestamps are spread
+over the HISTORY_DAYS before midnight (UTC) of the day of the run. All
+users share the password DEMO_PASSWORD, hashed once.
+
+bulk_create skips save() and signals, so whatever those would maintain is
+written here directly: request numbers, prices and due dates, designer
+project counters and tags, the search index, the conversation's last
+message time, wheel and puzzle counters, prize rollups, the puzzle time
+histogram, User.points from the ledger and the score rollups.
+"""
+
+import io
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from accounts import discovery
+from accounts.models import DesignerProfile, DesignerTag, LedgerEntry, User
+from chat.models import Conversation, Message, Notification
+from designs.models import DesignCategory, DesignRequest, PriceSetting
+from designs.search import index_requests
+from games import analytics, scoring, stats
+from games.models import (
+    WHEEL_POINTS_PER_SPIN, PuzzleAttempt, PuzzleGame, PuzzleTimeBucket, ScoreEvent, WheelOfFortune,
+    WheelSpin,
+)
+from skydesign.db import upsert_counter
+
+USERNAME_PREFIX = 'load'
+DEMO_PASSWORD = 'load12345'
+HISTORY_DAYS = 180
+
+SKILLS = ['Photoshop', 'Illustrator', 'InDesign', 'Figma', 'After Effects', 'Canva', 'Blender', 'Procreate']
+SPECIALIZATIONS = ['تعليمي', 'شعارات', 'هوية بصرية', 'سوشيال ميديا', 'مطبوعات', 'رسوم توضيحية']
+REGIONS = ['بغداد', 'البصرة', 'أربيل', 'الموصل', 'النجف', 'كربلاء', 'الحلة', 'السليمانية']
+WORDS = [
+    'تصميم', 'بطاقة', 'شعار', 'ملصق', 'عرض', 'درس', 'ألوان', 'خط', 'صورة', 'خلفية',
+    'مراجعة', 'تعديل', 'نسخة', 'نهائية', 'طباعة', 'حجم', 'واضح', 'جميل', 'سريع', 'شكرا',
+]
+
+# Relative frequency of each request status
+STATUS_WEIGHTS = {
+    'RECEIVED': 8, 'REVIEWING': 6, 'IN_PROGRESS': 12, 'READY': 6,
+    'DELIVERED': 50, 'ARCHIVED': 10, 'CANCELLED': 8,
+}
+UNASSIGNED = {'RECEIVED', 'REVIEWING'}
+ONGOING = {'IN_PROGRESS', 'READY'}
+FINISHED = {'DELIVERED', 'ARCHIVED'}
+URGENCY_DAYS = {'normal': 4, 'medium': 2, 'urgent': 1}
+
+NOTIFICATION_TYPES = [value for value, _ in Notification.NOTIFICATION_TYPE_CHOICES]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    السماح بكتابة أوقات إنشاء محددة أثناء bulk_create.
+
+    auto_now_add fields would otherwise overwrite them with the current time.
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class SyntheticData:
+    """مولد بيانات تجريبية حتمي"""
+
+    def __init__(self, scale, seed=42, chunk_size=5000, now=None, report=None):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.chunk_size = chunk_size
+        now = now or timezone.now()
+        self.end = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        self.start = self.end - timedelta(days=HISTORY_DAYS)
+        self.report = report or (lambda label, rows, seconds: None)
+        self.counts = {}
+
+    # Helpers
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def moment(self, after=None):
+        """وقت عشوائي ضمن فترة البيانات (بعد after إن وُجد)"""
+        start = max(after or self.start, self.start)
+        span = (self.end - start).total_seconds()
+        return start + timedelta(seconds=self.rng.random() * span)
+
+    def text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words))
+
+    def chunks(self, count):
+        for start in range(0, count, self.chunk_size):
+            yield range(start, min(start + self.chunk_size, count))
+
+    @contextmanager
+    def timed(self, label):
+        """قياس مرحلة وإبلاغ عدد صفوفها والوقت المستغرق"""
+        written = sum(self.counts.values())
+        started = time.perf_counter()
+        yield
+        self.report(label, sum(self.counts.values()) - written, time.perf_counter() - started)
+
+    def write(self, model, objects):
+        model.objects.bulk_create(objects, batch_size=self.chunk_size)
+        label = model._meta.label
+        self.counts[label] = self.counts.get(label, 0) + len(objects)
+
+    # Generation
+
+    def run(self):
+        """
+        توليد جميع البيانات.
+
+        Returns {model label: rows written}.
+        """
+        if User.objects.filter(username__startswith=USERNAME_PREFIX).exists():
+            raise ValueError("Synthetic users already exist; seed an empty database")
+        self.categories = self.load_categories()
+        if not self.categories:
+            raise ValueError("No active design categories; run seed_data without --scale first")
+
+        models = (
+            User, DesignRequest, Conversation, Message, Notification, WheelSpin, PuzzleAttempt, LedgerEntry,
+        )
+        with explicit_timestamps(*models):
+            self.create_users()
+            self.create_requests()
+            self.create_profiles()
+            self.create_conversations()
+            self.create_notifications()
+            self.create_spins()
+            self.create_attempts()
+        self.apply_points()
+        discovery.invalidate()
+        return self.counts
+
+    def load_categories(self):
+        prices = {
+            setting.category_id: setting
+            for setting in PriceSetting.objects.filter(is_active=True)
+        }
+        categories = []
+        for category in DesignCategory.objects.filter(is_active=True).prefetch_related('sizes').order_by('pk'):
+            sizes = sorted(size.pk for size in category.sizes.all())
+            categories.append((category, sizes, prices.get(category.pk)))
+        return categories
+
+    def create_users(self):
+        password = make_password(DEMO_PASSWORD)
+        designers = max(self.scale // 20, 1)
+        managers = max(self.scale // 10000, 1)
+        self.clients, self.designers, self.user_joined = [], [], {}
+        with self.timed('users'):
+            for chunk in self.chunks(self.scale):
+                users = []
+                for i in chunk:
+                    if i < managers:
+                        role = 'MANAGER'
+                    elif i < managers + designers:
+                        role = 'DESIGNER'
+                    else:
+                        role = 'CLIENT'
+                    user_type = self.rng.choice(['teacher', 'teacher', 'shop']) if role == 'CLIENT' else ''
+                    joined = self.moment()
+                    user = User(
+                        id=self.uuid(),
+                        username=f"{USERNAME_PREFIX}{i:07d}",
+                        email=f"{USERNAME_PREFIX}{i:07d}@example.com",
+                        password=password,
+                        name=f"مستخدم تجريبي {i}",
+                        role=role,
+                        user_type=user_type,
+                        gender=self.rng.choice(['male', 'female']),
+                        region=self.rng.choice(REGIONS),
+                        school_name=f"مدرسة {self.rng.choice(REGIONS)}" if user_type == 'teacher' else '',
+                        is_premium=self.rng.random() < 0.05,
+                        date_joined=joined,
+                        created_at=joined,
+                        last_seen=self.moment(joined),
+                    )
+                    users.append(user)
+                    self.user_joined[user.pk] = joined
+                    if role == 'CLIENT':
+                        self.clients.append(user.pk)
+                    elif role == 'DESIGNER':
+                        self.designers.append(user.pk)
+                self.write(User, users)
+
+    def create_requests(self):
+        statuses = list(STATUS_WEIGHTS)
+        weights = list(STATUS_WEIGHTS.values())
+        self.projects = defaultdict(Counter)
+        self.threads = []
+        with self.timed('design requests'):
+            for chunk in self.chunks(self.scale * 2):
+                requests = []
+                for i in chunk:
+                    client = self.rng.choice(self.clients)
+                    category, sizes, price = self.rng.choice(self.categories)
+                    status = self.rng.choices(statuses, weights)[0]
+                    urgency = self.rng.choice(list(URGENCY_DAYS))
+                    quality = self.rng.choice(['standard', 'professional', 'premium'])
+                    base = price.base_price if price else Decimal('50000')
+                    urgency_fee = base * (getattr(price, f'urgency_multiplier_{urgency}', 1) - 1)
+                    quality_fee = base * (getattr(price, f'quality_multiplier_{quality}', 1) - 1)
+                    created = self.moment(self.user_joined[client])
+                    designer = None
+                    if status not in UNASSIGNED and (status != 'CANCELLED' or self.rng.random() < 0.5):
+                        designer = self.rng.choice(self.designers)
+                    started = created + timedelta(hours=self.rng.randint(1, 24)) if designer else None
+                    delivered = (
+                        started + timedelta(hours=self.rng.randint(6, 96))
+                        if status in FINISHED else None
+                    )
+                    request = DesignRequest(
+                        id=self.uuid(),
+                        # Outside the DR{year}{month} range that save() numbers
+                        request_number=f"LD{i:010d}",
+                        client_id=client,
+                        assigned_designer_id=designer,
+                        title=f"{category.name} - {self.text(3)}",
+                        description=self.text(self.rng.randint(10, 40)),
+                        category=category,
+                        size_id=self.rng.choice(sizes) if sizes else None,
+                        urgency=urgency,
+                        quality_level=quality,
+                        base_price=base,
+                        urgency_fee=urgency_fee,
+                        quality_fee=quality_fee,
+                        total_price=base + urgency_fee + quality_fee,
+                        status=status,
+                        client_notes=self.text(self.rng.randint(0, 12)),
+                        client_satisfied=self.rng.random() < 0.9 if status in FINISHED else None,
+                        revision_count=self.rng.randint(0, 3) if designer else 0,
+                        created_at=created,
+                        due_date=created + timedelta(days=URGENCY_DAYS[urgency]),
+                        started_at=started,
+                        delivered_at=delivered,
+                    )
+                    requests.append(request)
+                    if designer:
+                        tally = self.projects[designer]
+                        tally['total'] += 1
+                        tally['completed'] += status in FINISHED
+                        tally['ongoing'] += status in ONGOING
+                        if delivered and delivered > tally.get('last', self.start):
+                            tally['last'] = delivered
+                        if self.rng.random() < 0.5:
+                            self.threads.append((request.pk, request.title, client, designer, started))
+                self.write(DesignRequest, requests)
+                index_requests(requests)
+
+    def create_profiles(self):
+        categories = [category.slug for category, _, _ in self.categories]
+        levels = [level for level, _ in DesignerProfile.SKILL_LEVEL_CHOICES]
+        with self.timed('designer profiles and tags'):
+            for start in range(0, len(self.designers), self.chunk_size):
+                profiles = []
+                for designer in self.designers[start:start + self.chunk_size]:
+                    tally = self.projects[designer]
+                    profile = DesignerProfile(
+                        user_id=designer,
+                        bio=self.text(15),
+                        skills=self.rng.sample(SKILLS, self.rng.randint(2, 5)),
+                        skill_level=self.rng.choice(levels),
+                        rating=Decimal(self.rng.randint(300, 500)) / 100,
+                        total_projects=tally['total'],
+                        completed_projects=tally['completed'],
+                        ongoing_projects=tally['ongoing'],
+                        completion_rate=round(Decimal(tally['completed'] * 100) / max(tally['total'], 1), 2),
+                        average_delivery_time=self.rng.randint(12, 96),
+                        is_available=self.rng.random() < 0.8,
+                        max_concurrent_projects=self.rng.randint(3, 10),
+                        hourly_rate=Decimal(self.rng.randint(5, 40) * 1000),
+                        specializations=self.rng.sample(SPECIALIZATIONS, self.rng.randint(1, 3)),
+                        preferred_categories=self.rng.sample(categories, min(len(categories), 2)),
+                        last_project_date=tally.get('last'),
+                    )
+                    profiles.append(profile)
+                self.write(DesignerProfile, profiles)
+                self.write(DesignerTag, [
+                    DesignerTag(profile=profile, kind=kind, value=value)
+                    for profile in profiles
+                    for kind, value in sorted(discovery.profile_tags(profile))
+                ])
+
+    def create_conversations(self):
+        Participant = Conversation.participants.through
+        with self.timed('conversations and messages'):
+            for start in range(0, len(self.threads), self.chunk_size):
+                conversations, participants, messages = [], [], []
+                for request_id, title, client, designer, started in self.threads[start:start + self.chunk_size]:
+                    conversation = Conversation(
+                        id=self.uuid(),
+                        title=title[:255],
+                        design_request_id=request_id,
+                        created_at=started,
+                    )
+                    sent = started
+                    for _ in range(self.rng.randint(2, 10)):
+                        sent = min(sent + timedelta(minutes=self.rng.randint(1, 720)), self.end)
+                        messages.append(Message(
+                            id=self.uuid(),
+                            conversation_id=conversation.pk,
+                            sender_id=self.rng.choice((client, designer)),
+                            content=self.text(self.rng.randint(3, 25)),
+                            is_read=sent < self.end - timedelta(days=1) or self.rng.random() < 0.5,
+                            sent_at=sent,
+                        ))
+                    conversation.last_message_at = sent
+                    conversations.append(conversation)
+                    participants.append(Participant(conversation_id=conversation.pk, user_id=client))
+                    participants.append(Participant(conversation_id=conversation.pk, user_id=designer))
+                self.write(Conversation, conversations)
+                self.write(Participant, participants)
+                self.write(Message, messages)
+
+    def create_notifications(self):
+        users = self.clients + self.designers
+        with self.timed('notifications'):
+            for chunk in self.chunks(self.scale * 3):
+                notifications = []
+                for _ in chunk:
+                    user = self.rng.choice(users)
+                    created = self.moment(self.user_joined[user])
+                    read = self.rng.random() < 0.6
+                    notifications.append(Notification(
+                        id=self.uuid(),
+                        user_id=user,
+                        type=self.rng.choice(NOTIFICATION_TYPES),
+                        title=self.text(3),
+                        message=self.text(self.rng.randint(5, 20)),
+                        is_read=read,
+                        read_at=created + timedelta(hours=self.rng.randint(1, 48)) if read else None,
+                        created_at=created,
+                    ))
+                self.write(Notification, notifications)
+
+    def create_spins(self):
+        wheels = [wheel for wheel in WheelOfFortune.objects.filter(is_active=True).order_by('pk') if wheel.segments]
+        if not wheels:
+            return
+        totals = Counter()
+        prizes = Counter()
+        with self.timed('wheel spins'):
+            for chunk in self.chunks(self.scale * 2):
+                spins, entries, events = [], [], []
+                for _ in chunk:
+                    wheel = self.rng.choice(wheels)
+                    segment = self.rng.choices(wheel.segments, [s.get('weight', 1) for s in wheel.segments])[0]
+                    user = self.rng.choice(self.clients)
+                    spun = self.moment(self.user_joined[user])
+                    prize_type = segment.get('prize_type', '')
+                    claimed = prize_type != 'nothing' and self.rng.random() < 0.7
+                    claimed_at = spun + timedelta(minutes=self.rng.randint(1, 60)) if claimed else None
+                    spin = WheelSpin(
+                        id=self.uuid(),
+                        wheel=wheel,
+                        user_id=user,
+                        result=segment,
+                        prize_type=prize_type,
+                        prize_value=str(segment.get('prize_value', '')),
+                        prize_claimed=claimed,
+                        claimed_at=claimed_at,
+                        spin_date=spun,
+                    )
+                    spins.append(spin)
+                    events.append(ScoreEvent(
+                        id=self.uuid(),
+                        user_id=user,
+                        game_type='wheel',
+                        source_id=str(spin.pk),
+                        points=WHEEL_POINTS_PER_SPIN,
+                        occurred_at=spun,
+                    ))
+                    if claimed and prize_type == 'points':
+                        entries.append(LedgerEntry(
+                            id=self.uuid(),
+                            user_id=user,
+                            kind='WHEEL_PRIZE',
+                            points=int(spin.prize_value),
+                            idempotency_key=f"wheel-prize:{spin.pk}",
+                            reference=str(spin.pk),
+                            created_at=claimed_at,
+                        ))
+                    totals[wheel.pk] += 1
+                    prizes[wheel.pk] += claimed
+                self.write(WheelSpin, spins)
+                self.write(LedgerEntry, entries)
+                self.write(ScoreEvent, events)
+            for wheel in wheels:
+                WheelOfFortune.objects.filter(pk=wheel.pk).update(
+                    total_spins=F('total_spins') + totals[wheel.pk],
+                    total_prizes_given=F('total_prizes_given') + prizes[wheel.pk],
+                )
+            analytics.rebuild_rollups([wheel.pk for wheel in wheels])
+
+    def create_attempts(self):
+        puzzles = list(PuzzleGame.objects.filter(is_active=True).order_by('pk')) or [self.create_puzzle()]
+        plays = Counter()
+        times = defaultdict(list)
+        with self.timed('puzzle attempts'):
+            for chunk in self.chunks(self.scale):
+                attempts, entries, events = [], [], []
+                for _ in chunk:
+                    puzzle = self.rng.choice(puzzles)
+                    user = self.rng.choice(self.clients)
+                    started = self.moment(self.user_joined[user])
+                    completed = self.rng.random() < 0.7
+                    seconds = round(self.rng.lognormvariate(4.5, 0.6), 2) if completed else None
+                    attempt = PuzzleAttempt(
+                        id=self.uuid(),
+                        puzzle=puzzle,
+                        user_id=user,
+                        started_at=started,
+                        completed_at=started + timedelta(seconds=seconds) if completed else None,
+                        completion_time=seconds,
+                        moves_count=self.rng.randint(puzzle.grid_size ** 2, puzzle.grid_size ** 2 * 4),
+                        is_completed=completed,
+                        points_earned=puzzle.points_reward if completed else 0,
+                    )
+                    attempts.append(attempt)
+                    plays[puzzle.pk] += 1
+                    if completed:
+                        times[puzzle.pk].append(seconds)
+                        entries.append(LedgerEntry(
+                            id=self.uuid(),
+                            user_id=user,
+                            kind='PUZZLE_REWARD',
+                            points=attempt.points_earned,
+                            idempotency_key=f"puzzle:{attempt.pk}",
+                            reference=str(attempt.pk),
+                            created_at=attempt.completed_at,
+                        ))
+                        events.append(ScoreEvent(
+                            id=self.uuid(),
+                            user_id=user,
+                            game_type='puzzle',
+                            source_id=str(attempt.pk),
+                            points=attempt.points_earned,
+                            completion_time=seconds,
+                            occurred_at=attempt.completed_at,
+                        ))
+                self.write(PuzzleAttempt, attempts)
+                self.write(LedgerEntry, entries)
+                self.write(ScoreEvent, events)
+            for puzzle in puzzles:
+                self.add_puzzle_stats(puzzle, plays[puzzle.pk], times[puzzle.pk])
+
+    def apply_points(self):
+        """
+        ضبط نقاط المستخدمين من السجل وإعادة بناء مجاميع النقاط.
+
+        One UPDATE sets every synthetic user's points to their ledger sum;
+        the rollups are rebuilt from all score events.
+        """
+        with self.timed('points and score rollups'):
+            earned = (
+                LedgerEntry.objects.filter(user=OuterRef('pk')).order_by().values('user')
+                .annotate(total=Sum('points')).values('total')
+            )
+            User.objects.filter(username__startswith=USERNAME_PREFIX).update(
+                points=Coalesce(Subquery(earned, output_field=IntegerField()), Value(0))
+            )
+            scoring.rebuild_rollups(batch_size=self.chunk_size)
+
+    def add_puzzle_stats(self, puzzle, plays, times):
+        """إضافة المحاولات المولدة إلى عدادات اللعبة ومدرج الأوقات"""
+        if not plays:
+            return
+        puzzle.refresh_from_db(fields=['total_completions', 'total_time', 'best_time'])
+        completions = puzzle.total_completions + len(times)
+        total_time = puzzle.total_time + sum(times)
+        best = min([t for t in [puzzle.best_time, *times] if t is not None], default=None)
+        PuzzleGame.objects.filter(pk=puzzle.pk).update(
+            total_plays=F('total_plays') + plays,
+            total_completions=completions,
+            total_time=total_time,
+            average_time=total_time / completions if completions else 0,
+            best_time=best,
+        )
+        buckets = Counter(stats.bucket_for(seconds) for seconds in times)
+        upsert_counter(
+            PuzzleTimeBucket,
+            [{'puzzle': puzzle.pk, 'bucket': bucket, 'count': count} for bucket, count in sorted(buckets.items())],
+            unique_fields=['puzzle', 'bucket'],
+            increment_fields=['count'],
+        )
+
+    def create_puzzle(self):
+        """لعبة بازل بصورة مولدة عند عدم وجود أي لعبة"""
+        from PIL import Image
+
+        image = Image.new('RGB', (800, 800))
+        image.putdata([
+            (x * 255 // 800, y * 255 // 800, (x + y) * 255 // 1600)
+            for y in range(800) for x in range(800)
+        ])
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        puzzle = PuzzleGame(title="بازل تجريبي", description="لعبة مولدة لبيانات الأداء")
+        puzzle.original_image.save('synthetic.png', ContentFile(buffer.getvalue()), save=False)
+        with transaction.atomic():
+            puzzle.save()
+        return puzzle
@@ -0,0 +1,21 @@
+"""
+Background tasks for the accounts app
+المهام الخلفية لتطبيق الحسابات
+"""
+
+from celery import shared_task
+
+from accounts import audit_partitions, ledger
+
+
+@shared_task(ignore_result=True)
+def reconcile_ledger():
+    """مطابقة الأرصدة مع سجل النقاط"""
+    # Mismatches are logged; repairs are left to the reconcile_ledger command
+    ledger.reconcile()
+
+
+@shared_task(ignore_result=True)
+def maintain_audit_partitions():
+    """إنشاء أقسام سجل التدقيق القادمة وحذف المنتهية"""
+    audit_partitions.maintain()
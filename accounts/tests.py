@@ -1,3 +1,472 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts import audit, audit_partitions, discovery, ledger, presence
+from accounts.synthetic import SyntheticData
+from accounts.models import AuditLog, DesignerProfile, DesignerTag, LedgerEntry, User
+from chat.models import Conversation, Message
+from designs.models import DesignCategory, DesignRequest
+from games.models import PuzzleAttempt, PuzzleGame, ScoreEvent, ScoreRollup, WheelOfFortune, WheelSpin
+from skydesign.testing import ConcurrentTestCase
+
+
+class MyRequestsTests(TestCase):
+
+    def setUp(self):
+        self.api = APIClient()
+        self.client_user = User.objects.create_user(
+            username='teacher', email='teacher@example.com', password='x', name='Teacher'
+        )
+        other = User.objects.create_user(
+            username='shop', email='shop@example.com', password='x', name='Shop'
+        )
+        category = DesignCategory.objects.create(name='Cards', slug='cards')
+        for i in range(12):
+            DesignRequest.objects.create(
+                client=self.client_user if i % 4 else other,
+                title=f'Card {i}', description='...', category=category,
+            )
+
+    def test_lists_only_own_requests_in_constant_queries(self):
+        self.api.force_authenticate(self.client_user)
+
+        presence.clear()
+        with self.assertNumQueries(2):
+            response = self.api.get(reverse('accounts:my-requests'), {'page_size': 50})
+
+        self.assertEqual(len(response.data['results']), 9)
+        self.assertEqual(response.data['counts']['RECEIVED'], 9)
+        self.assertIsNone(response.data['next_cursor'])
+
+
+class LedgerTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='player', email='player@example.com', name='Player')
+
+    def test_retried_credit_is_applied_once(self):
+        first, created = ledger.credit_points(self.user.pk, 40, idempotency_key='order:1')
+        again, created_again = ledger.credit_points(self.user.pk, 40, idempotency_key='order:1')
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(first.pk, again.pk)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.points, 40)
+
+    def test_debit_cannot_overdraw(self):
+        ledger.credit_balance(self.user.pk, Decimal('10.00'), idempotency_key='topup:1', kind='PAYMENT')
+
+        with self.assertRaises(ledger.InsufficientFunds):
+            ledger.credit_balance(self.user.pk, Decimal('-12.50'), idempotency_key='buy:1', kind='REDEMPTION')
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('10.00'))
+        self.assertFalse(LedgerEntry.objects.filter(idempotency_key='buy:1').exists())
+
+    def test_entries_are_insert_only(self):
+        entry, _ = ledger.credit_points(self.user.pk, 5, idempotency_key='bonus:1')
+        entry.points = 500
+        with self.assertRaises(ValueError):
+            entry.save()
+        with self.assertRaises(ValueError):
+            entry.delete()
+
+    def test_reconcile_reports_and_repairs_drift(self):
+        ledger.credit_points(self.user.pk, 30, idempotency_key='bonus:1')
+        User.objects.filter(pk=self.user.pk).update(points=999)
+
+        mismatches = ledger.reconcile()
+        self.assertEqual([row['pk'] for row in mismatches], [self.user.pk])
+        self.assertEqual(mismatches[0]['ledger_points'], 30)
+
+        ledger.reconcile(fix=True)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.points, 30)
+        self.assertEqual(ledger.reconcile(), [])
+
+    def test_wheel_prize_is_credited_once(self):
+        wheel = WheelOfFortune.objects.create(segments=[{'id': 1, 'weight': 1}])
+        spin = WheelSpin.objects.create(wheel=wheel, user=self.user, prize_type='points', prize_value='50')
+        stale = WheelSpin.objects.get(pk=spin.pk)
+
+        self.assertTrue(spin.claim_prize())
+        self.assertFalse(stale.claim_prize())
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.points, 50)
+        self.assertEqual(self.user.ledger_entries.get().kind, 'WHEEL_PRIZE')
+
+
+class ConcurrentLedgerTests(ConcurrentTestCase):
+
+    def test_concurrent_credits_are_not_lost(self):
+        user = User.objects.create(username='player', email='player@example.com', name='Player')
+        credits = 50
+        barrier = threading.Barrier(credits)
+
+        def credit(i):
+            barrier.wait()
+            try:
+                ledger.credit_points(user.pk, 2, idempotency_key=f'credit:{i % 25}')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=credit, args=(i,)) for i in range(credits)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        user.refresh_from_db()
+        self.assertEqual(user.points, 50)
+        self.assertEqual(LedgerEntry.objects.count(), 25)
+        self.assertEqual(ledger.reconcile(), [])
+
+
+class AuditTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='payer', email='payer@example.com', password='secret', name='Payer'
+        )
+        self.spill_path = os.path.join(tempfile.mkdtemp(), 'audit-spill.jsonl')
+        self.writer = audit.AuditWriter(batch_size=100, spill_path=self.spill_path, autostart=False)
+
+    def event(self, object_id):
+        return audit.make_event('UPDATE', 'User', object_id, user=self.user, data={'field': 'name'})
+
+    def test_events_are_written_in_one_batch(self):
+        events = [self.event(i) for i in range(3)]
+        for event in events:
+            self.writer.put(event)
+        self.assertFalse(AuditLog.objects.exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.writer.flush(), 3)
+        # One INSERT, inside a savepoint the writer can roll back to
+        self.assertEqual([q['sql'].split()[0] for q in queries].count('INSERT'), 1)
+        logs = AuditLog.objects.order_by('object_id')
+        self.assertEqual([log.object_id for log in logs], ['0', '1', '2'])
+        self.assertEqual(logs[0].data, {'field': 'name'})
+        self.assertEqual(logs[0].timestamp.isoformat(), events[0]['timestamp'])
+
+    def test_full_queue_spills_to_file(self):
+        writer = audit.AuditWriter(maxsize=1, spill_path=self.spill_path, autostart=False)
+        writer.put(self.event(1))
+        writer.put(self.event(2))
+        self.assertTrue(os.path.exists(self.spill_path))
+
+        self.assertEqual(writer.flush(), 1)
+        self.assertEqual(writer.replay_spill(), 1)
+        self.assertEqual(AuditLog.objects.count(), 2)
+        self.assertFalse(os.path.exists(self.spill_path))
+
+    def test_database_failure_spills_the_batch(self):
+        self.writer.put(self.event(1))
+        with mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=DatabaseError):
+            self.assertEqual(self.writer.flush(), 0)
+        self.assertFalse(AuditLog.objects.exists())
+
+        self.assertEqual(self.writer.replay_spill(), 1)
+        self.assertEqual(AuditLog.objects.get().object_id, '1')
+
+    def test_rejected_rows_go_to_the_dead_letter_file(self):
+        dead_letter = os.path.join(os.path.dirname(self.spill_path), 'dead-letter.jsonl')
+        writer = audit.AuditWriter(spill_path=self.spill_path, dead_letter_path=dead_letter, autostart=False)
+        poison = {**self.event(2), 'action': None}
+        for event in (self.event(1), poison, self.event(3)):
+            writer.put(event)
+
+        self.assertEqual(writer.flush(), 2)
+        self.assertEqual(sorted(AuditLog.objects.values_list('object_id', flat=True)), ['1', '3'])
+        self.assertFalse(os.path.exists(self.spill_path))
+        with open(dead_letter, encoding='utf-8') as rejected:
+            self.assertEqual([json.loads(line)['object_id'] for line in rejected], ['2'])
+
+    @override_settings(AUDIT_ASYNC=True)
+    def test_queued_events_wait_for_commit(self):
+        with mock.patch.object(audit, 'get_writer', return_value=self.writer):
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    audit.audit('UPDATE', 'User', 1, user=self.user)
+                    raise RuntimeError
+                audit.audit('UPDATE', 'User', 2, user=self.user)
+                self.assertTrue(self.writer.queue.empty())
+
+        self.assertEqual(self.writer.flush(), 1)
+        self.assertEqual(AuditLog.objects.get().object_id, '2')
+
+    def test_payments_commit_with_their_transaction(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            ledger.credit_balance(self.user.pk, Decimal('5.00'), idempotency_key='pay:1', kind='PAYMENT')
+            raise RuntimeError
+        self.assertFalse(AuditLog.objects.exists())
+
+        entry, _ = ledger.credit_balance(self.user.pk, Decimal('5.00'), idempotency_key='pay:2', kind='PAYMENT')
+        log = AuditLog.objects.get()
+        self.assertEqual((log.action, log.object_id), ('PAYMENT', str(entry.pk)))
+        self.assertEqual(log.data['amount'], '5.00')
+
+    @override_settings(AUDIT_ASYNC=False)
+    def test_login_and_status_changes_are_audited(self):
+        self.assertTrue(self.client.login(username='payer', password='secret'))
+        request = DesignRequest.objects.create(
+            client=self.user, title='Card', description='...',
+            category=DesignCategory.objects.create(name='Cards', slug='cards'),
+        )
+        request.mark_as_delivered(user=self.user)
+
+        self.assertEqual(
+            sorted(AuditLog.objects.values_list('action', flat=True)), ['LOGIN', 'STATUS_CHANGE']
+        )
+        change = AuditLog.objects.get(action='STATUS_CHANGE')
+        self.assertEqual(change.data, {'from': 'RECEIVED', 'to': 'DELIVERED'})
+
+
+class AuditPartitionTests(TestCase):
+
+    def setUp(self):
+        self.now = datetime(2026, 10, 19, 12, 0, tzinfo=dt_timezone.utc)
+        for month in (7, 8, 9, 10):
+            for day in (2, 20):
+                AuditLog.objects.create(
+                    action='UPDATE', model_name='DesignRequest', object_id=f'{month}-{day}',
+                    timestamp=datetime(2026, month, day, 9, 0, tzinfo=dt_timezone.utc),
+                )
+
+    def test_closed_months_are_rotated_out(self):
+        moved = audit_partitions.rotate(self.now)
+
+        self.assertEqual(moved, {
+            'accounts_auditlog_p202607': 2,
+            'accounts_auditlog_p202608': 2,
+            'accounts_auditlog_p202609': 2,
+        })
+        self.assertEqual(sorted(AuditLog.objects.values_list('object_id', flat=True)), ['10-2', '10-20'])
+        self.assertEqual(audit_partitions.rotate(self.now), {})
+
+    def test_search_reads_only_overlapping_months(self):
+        audit_partitions.rotate(self.now)
+        start = datetime(2026, 8, 15, tzinfo=dt_timezone.utc)
+        end = datetime(2026, 10, 10, tzinfo=dt_timezone.utc)
+
+        found = audit_partitions.search(start, end)
+        self.assertEqual([e.object_id for e in found], ['10-2', '9-20', '9-2', '8-20'])
+
+        # Live table, table list, then September only
+        with self.assertNumQueries(3):
+            found = audit_partitions.search(
+                datetime(2026, 9, 5, tzinfo=dt_timezone.utc), datetime(2026, 9, 25, tzinfo=dt_timezone.utc)
+            )
+        self.assertEqual([e.object_id for e in found], ['9-20'])
+
+    def test_expired_months_are_exported_and_dropped(self):
+        directory = tempfile.mkdtemp()
+        with self.settings(AUDIT_EXPORT_DIR=directory):
+            dropped = audit_partitions.expire(self.now, retention_months=2, export=True)
+
+        self.assertEqual(dropped, ['accounts_auditlog_p202607'])
+        self.assertNotIn(datetime(2026, 7, 1, tzinfo=dt_timezone.utc), audit_partitions.partitions())
+        with gzip.open(os.path.join(directory, 'accounts_auditlog_p202607.jsonl.gz'), 'rt') as exported:
+            rows = [json.loads(line) for line in exported]
+        self.assertEqual(sorted(row['object_id'] for row in rows), ['7-2', '7-20'])
+
+
+class PresenceTests(TestCase):
+
+    def setUp(self):
+        presence.clear()
+        self.users = [
+            User.objects.create(username=f'user{i}', email=f'user{i}@example.com', name=f'User {i}')
+            for i in range(3)
+        ]
+        self.now = timezone.now()
+
+    def test_activity_is_coalesced_into_one_update(self):
+        for _ in range(50):
+            for user in self.users:
+                presence.touch(user.pk, self.now)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(presence.flush(self.now), 3)
+        self.assertEqual(set(User.objects.values_list('last_seen', flat=True)), {self.now})
+
+        # Written a moment ago, so nothing is pending
+        presence.touch(self.users[0].pk, self.now + timedelta(seconds=5))
+        with self.assertNumQueries(0):
+            self.assertEqual(presence.flush(self.now + timedelta(seconds=5)), 0)
+
+    def test_rows_moved_by_another_worker_are_kept(self):
+        recent = self.now - timedelta(seconds=10)
+        User.objects.filter(pk=self.users[0].pk).update(last_seen=recent)
+        presence.touch(self.users[0].pk, self.now)
+        presence.touch(self.users[1].pk, self.now)
+
+        self.assertEqual(presence.flush(self.now), 1)
+        self.users[0].refresh_from_db()
+        self.assertEqual(self.users[0].last_seen, recent)
+        self.assertEqual(presence.last_seen(self.users[0]), self.now)
+
+    def test_failed_flush_keeps_activity_pending(self):
+        for user in self.users:
+            presence.touch(user.pk, self.now)
+
+        with mock.patch.object(User.objects, 'filter', side_effect=DatabaseError):
+            self.assertEqual(presence.flush(self.now), 0)
+        self.assertEqual(presence.last_seen(self.users[0]), self.now)
+
+        self.assertEqual(presence.flush(self.now), 3)
+        self.assertEqual(set(User.objects.values_list('last_seen', flat=True)), {self.now})
+
+    @override_settings(LAST_SEEN_FLUSH_SECONDS=0)
+    def test_requests_are_tracked_by_the_middleware(self):
+        presence.clear()
+        api = APIClient()
+        api.force_authenticate(self.users[2])
+        api.get(reverse('accounts:my-requests'))
+
+        self.users[2].refresh_from_db()
+        self.assertIsNotNone(self.users[2].last_seen)
+
+
+class DesignerDiscoveryTests(TestCase):
+
+    def designer(self, name, **profile):
+        user = User.objects.create(username=name, email=f'{name}@example.com', name=name, role='DESIGNER')
+        return DesignerProfile.objects.create(user=user, **profile)
+
+    def setUp(self):
+        cache.clear()
+        self.lina = self.designer(
+            'lina', skills=['Logo Design', 'Illustrator'], specializations=['logos'],
+            skill_level='expert', rating=Decimal('4.90'),
+        )
+        self.omar = self.designer(
+            'omar', skills=['logo  design'], specializations=['Logos', 'posters'],
+            skill_level='expert', rating=Decimal('4.50'), ongoing_projects=5, max_concurrent_projects=5,
+        )
+        self.sara = self.designer(
+            'sara', skills=['Photoshop'], specializations=['logos'],
+            skill_level='intermediate', rating=Decimal('4.95'),
+        )
+
+    def test_tags_follow_the_profile(self):
+        self.assertEqual(
+            set(self.omar.tags.values_list('kind', 'value')),
+            {('skill', 'logo design'), ('specialization', 'logos'), ('specialization', 'posters')},
+        )
+        self.omar.specializations = ['posters']
+        self.omar.save(update_fields=['specializations'])
+        self.assertEqual(
+            set(self.omar.tags.values_list('value', flat=True)), {'logo design', 'posters'}
+        )
+
+    def test_combined_filters_in_one_query(self):
+        with self.assertNumQueries(1):
+            page = discovery.search(specializations=['LOGOS'], available=True, min_level='advanced')
+        self.assertEqual([row['name'] for row in page['results']], ['lina'])
+
+        page = discovery.search(skills=['logo design'])
+        self.assertEqual([row['name'] for row in page['results']], ['lina', 'omar'])
+        page = discovery.search(specializations=['logos'], page_size=2, page=2)
+        self.assertEqual(([row['name'] for row in page['results']], page['has_next']), (['omar'], False))
+
+    def test_pages_are_cached_until_a_profile_changes(self):
+        discovery.search(specializations=['logos'], min_rating=Decimal('4.6'))
+        with self.assertNumQueries(0):
+            page = discovery.search(specializations=['logos'], min_rating=Decimal('4.6'))
+        self.assertEqual([row['name'] for row in page['results']], ['sara', 'lina'])
+
+        self.sara.is_available = False
+        self.sara.save(update_fields=['is_available'])
+        page = discovery.search(specializations=['logos'], min_rating=Decimal('4.6'), available=True)
+        self.assertEqual([row['name'] for row in page['results']], ['lina'])
+
+    def test_endpoint(self):
+        api = APIClient()
+        api.force_authenticate(self.lina.user)
+        url = reverse('accounts:designer-search')
+
+        response = api.get(url, {'specializations': 'logos,posters', 'available': '1'})
+        self.assertEqual([row['name'] for row in response.data['results']], ['sara', 'lina'])
+        self.assertEqual(api.get(url, {'level': 'guru'}).status_code, 400)
+        for rating in ('inf', '-Infinity', 'nan', 'x'):
+            self.assertEqual(api.get(url, {'min_rating': rating}).status_code, 400)
+
+    def test_rebuild(self):
+        DesignerTag.objects.all().delete()
+        self.assertEqual(discovery.rebuild_tags(), 8)
+
+
+class SyntheticDataTests(TestCase):
+
+    def setUp(self):
+        DesignCategory.objects.create(name='Cards', slug='cards')
+        WheelOfFortune.objects.create(title='Wheel', segments=[
+            {'id': 1, 'weight': 3, 'prize_type': 'points', 'prize_value': '50'},
+            {'id': 2, 'weight': 1, 'prize_type': 'nothing', 'prize_value': '0'},
+        ])
+        self.puzzle = PuzzleGame.objects.create(title='Puzzle', original_image='puzzles/p.png')
+
+    def generate(self, seed):
+        with transaction.atomic():
+            counts = SyntheticData(100, seed=seed, chunk_size=40).run()
+            snapshot = (
+                counts,
+                list(User.objects.filter(username__startswith='load').order_by('username').values_list('username', 'pk')),
+                list(DesignRequest.objects.order_by('request_number').values_list('pk', 'status', 'total_price')),
+                list(Message.objects.order_by('pk').values_list('pk', 'content', 'sent_at')),
+            )
+            transaction.set_rollback(True)
+        return snapshot
+
+    def test_generates_consistent_activity(self):
+        counts = SyntheticData(100, seed=1, chunk_size=40).run()
+
+        self.assertEqual(counts['accounts.User'], 100)
+        self.assertEqual(counts['designs.DesignRequest'], 200)
+        self.assertEqual(WheelSpin.objects.count(), 200)
+        self.assertEqual(PuzzleAttempt.objects.count(), 100)
+        self.assertEqual(
+            set(DesignRequest.objects.values_list('status', flat=True)),
+            {status for status, _ in DesignRequest.STATUS_CHOICES},
+        )
+        self.assertFalse(DesignRequest.objects.filter(created_at__gte=timezone.now() - timedelta(hours=1)).exists())
+        for profile in DesignerProfile.objects.all():
+            self.assertEqual(profile.total_projects, DesignRequest.objects.filter(assigned_designer=profile.user).count())
+            self.assertTrue(profile.tags.exists())
+        conversation = Conversation.objects.first()
+        self.assertEqual(conversation.participants.count(), 2)
+        self.assertEqual(conversation.last_message_at, conversation.messages.order_by('sent_at').last().sent_at)
+        self.puzzle.refresh_from_db()
+        self.assertEqual(self.puzzle.total_plays, 100)
+        self.assertTrue(User.objects.get(username='load0000050').check_password('load12345'))
+
+        # Points come from the ledger and scores from events, as in real play
+        self.assertEqual(ledger.reconcile(), [])
+        self.assertTrue(User.objects.filter(username__startswith='load', points__gt=0).exists())
+        self.assertEqual(ScoreEvent.objects.filter(game_type='wheel').count(), 200)
+        overall = ScoreRollup.objects.filter(game_type='overall', period='alltime').aggregate(Sum('score'))
+        self.assertEqual(overall['score__sum'], ScoreEvent.objects.aggregate(Sum('points'))['points__sum'])
+
+    def test_same_seed_gives_same_data(self):
+        first = self.generate(seed=7)
+
+        self.assertEqual(self.generate(seed=7), first)
+        self.assertNotEqual(self.generate(seed=8)[1], first[1])
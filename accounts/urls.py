@@ -4,5 +4,6 @@ from . import views
 app_name = 'accounts'
 
 urlpatterns = [
-    # API endpoints will be added here
-]
\ No newline at end of file
+    path('my-requests/', views.MyRequestsView.as_view(), name='my-requests'),
+    path('designers/', views.DesignerSearchView.as_view(), name='designer-search'),
+]
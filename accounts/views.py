@@ -1,3 +1,61 @@
-from django.shortcuts import render
+"""
+Account API views
+واجهات برمجة الحسابات
+"""
 
-# Create your views here.
+from decimal import Decimal, InvalidOperation
+
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts import discovery
+from designs.models import DesignRequest
+from designs.views import DesignRequestListView
+
+
+class MyRequestsView(DesignRequestListView):
+    """Client dashboard: the user's own design requests"""
+
+    def get_queryset(self, request):
+        return DesignRequest.objects.for_client(request.user)
+
+
+class DesignerSearchView(APIView):
+    """
+    Designer discovery.
+
+    ?skills, ?specializations and ?categories take comma separated values;
+    ?available=1 keeps designers with free capacity, ?level a minimum skill
+    level and ?min_rating a minimum rating. Paged with ?page and ?page_size.
+    """
+    permission_classes = [IsAuthenticated]
+    default_page_size = 20
+    max_page_size = 50
+
+    def get(self, request):
+        params = request.query_params
+
+        def values(name):
+            return [value for value in (params.get(name) or '').split(',') if value.strip()]
+
+        try:
+            page = max(int(params.get('page', 1)), 1)
+            page_size = min(max(int(params.get('page_size', self.default_page_size)), 1), self.max_page_size)
+            min_rating = Decimal(params['min_rating']) if params.get('min_rating') else None
+            if min_rating is not None and not min_rating.is_finite():
+                return Response({'detail': 'معاملات غير صالحة'}, status=status.HTTP_400_BAD_REQUEST)
+            results = discovery.search(
+                page=page,
+                page_size=page_size,
+                skills=values('skills'),
+                specializations=values('specializations'),
+                categories=values('categories'),
+                available=params.get('available') in ('1', 'true'),
+                min_level=params.get('level') or None,
+                min_rating=min_rating,
+            )
+        except (ValueError, InvalidOperation):
+            return Response({'detail': 'معاملات غير صالحة'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(results)
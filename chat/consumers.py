@@ -7,6 +7,8 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 
+from accounts import presence
+
 User = get_user_model()
 
 
@@ -47,6 +49,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
     
     async def receive(self, text_data):
         """Handle incoming WebSocket messages"""
+        await presence.atouch(self.user)
         text_data_json = json.loads(text_data)
         message_type = text_data_json.get('type', 'message')
         
@@ -207,6 +210,7 @@ class NotificationConsumer(AsyncWebsocketConsumer):
     
     async def receive(self, text_data):
         """Handle incoming WebSocket messages"""
+        await presence.atouch(self.user)
         text_data_json = json.loads(text_data)
         action = text_data_json.get('action')
         
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("chat", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="attachment_hash",
+            field=models.CharField(
+                blank=True, max_length=64, verbose_name="بصمة المرفق"
+            ),
+        ),
+    ]
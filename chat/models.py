@@ -130,6 +130,7 @@ class Message(models.Model):
     )
     attachment_name = models.CharField(_("اسم المرفق"), max_length=255, blank=True)
     attachment_size = models.IntegerField(_("حجم المرفق"), null=True, blank=True)
+    attachment_hash = models.CharField(_("بصمة المرفق"), max_length=64, blank=True)
     
     # الحالة
     is_read = models.BooleanField(_("مقروءة"), default=False)
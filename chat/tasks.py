@@ -0,0 +1,19 @@
+"""
+Background tasks for the chat app
+المهام الخلفية لتطبيق المحادثات
+"""
+
+from celery import shared_task
+from django.core.mail import send_mail
+
+from chat.models import Notification
+
+
+@shared_task(ignore_result=True)
+def send_notification_email(notification_id):
+    """إرسال الإشعار بالبريد الإلكتروني"""
+    notification = Notification.objects.select_related('user').filter(pk=notification_id).first()
+    if notification is None or notification.is_email_sent or not notification.user.email:
+        return
+    send_mail(notification.title, notification.message, None, [notification.user.email])
+    Notification.objects.filter(pk=notification.pk).update(is_email_sent=True)
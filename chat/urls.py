@@ -4,5 +4,9 @@ from . import views
 app_name = 'chat'
 
 urlpatterns = [
-    # API endpoints will be added here
-]
\ No newline at end of file
+    path(
+        'conversations/<uuid:conversation_id>/attachments/',
+        views.MessageAttachmentView.as_view(),
+        name='message-attachment'
+    ),
+]
@@ -1,3 +1,55 @@
-from django.shortcuts import render
+"""
+Chat API views
+واجهات برمجة الدردشة
+"""
 
-# Create your views here.
+import uuid
+
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from chat.models import Conversation
+from designs import uploads
+from designs.models import UploadSession
+
+
+class MessageAttachmentView(APIView):
+    """Send a message carrying a file from a finished chunked upload"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, conversation_id):
+        conversation = get_object_or_404(
+            Conversation,
+            id=conversation_id,
+            participants=request.user
+        )
+        try:
+            upload_id = uuid.UUID(str(request.data.get('upload_id')))
+        except ValueError:
+            return Response({'detail': 'upload_id must be a UUID'}, status=status.HTTP_400_BAD_REQUEST)
+        session = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+
+        try:
+            message = uploads.attach_to_message(
+                session,
+                conversation,
+                request.user,
+                content=request.data.get('content', ''),
+            )
+        except uploads.UploadError as exc:
+            return Response(
+                {'detail': str(exc), 'offset': exc.expected_offset},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response({
+            'id': str(message.id),
+            'message_type': message.message_type,
+            'attachment_url': message.attachment.url,
+            'attachment_name': message.attachment_name,
+            'attachment_size': message.attachment_size,
+            'timestamp': message.sent_at.isoformat(),
+        }, status=status.HTTP_201_CREATED)
@@ -0,0 +1,208 @@
+"""
+Cold archive for finished design requests
+أرشفة طلبات التصميم المنتهية في التخزين البارد
+
+Delivered, archived and cancelled requests older than the policy window are
+moved out of the hot tables. Each request, with its attachments, review and
+linked conversations, becomes one zlib-compressed JSON document in
+ArchivedDesignRequest, and the live rows are deleted in the same transaction.
+Reviews stay in the live table with their request set to NULL, so designer
+ratings do not change when work is archived.
+Detail reads go through get_request_detail(), which looks in the live table
+first and falls back to the archive, so callers never need to know where a
+request lives.
+"""
+
+import json
+import time
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from designs.models import ArchivedDesignRequest, DesignRequest
+
+
+ARCHIVABLE_STATUSES = ['DELIVERED', 'ARCHIVED', 'CANCELLED']
+PAYLOAD_VERSION = 1
+
+
+def _as_dict(instance):
+    """الحقول الخام لكائن واحد كما يخزنها مُسلسِل Django"""
+    data = serializers.serialize('python', [instance])[0]
+    return {'id': data['pk'], **data['fields']}
+
+
+def snapshot(design_request, include_conversations=True):
+    """
+    الطلب مع مرفقاته وتقييمه ومحادثاته كقاموس واحد.
+
+    Expects attachments, review and conversations to be prefetched when
+    called in a loop.
+    """
+    try:
+        review = design_request.review
+    except DesignRequest.review.RelatedObjectDoesNotExist:
+        review = None
+
+    document = {
+        'version': PAYLOAD_VERSION,
+        'request': _as_dict(design_request),
+        'attachments': [_as_dict(a) for a in design_request.attachments.all()],
+        'review': _as_dict(review) if review else None,
+    }
+    if include_conversations:
+        document['conversations'] = [
+            {
+                **_as_dict(conversation),
+                'messages': [_as_dict(m) for m in conversation.messages.all()],
+            }
+            for conversation in design_request.conversations.all()
+        ]
+    return document
+
+
+def _dumps(document):
+    return json.dumps(document, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+def encode_payload(document):
+    return zlib.compress(_dumps(document).encode(), 6)
+
+
+def decode_payload(payload):
+    return json.loads(zlib.decompress(bytes(payload)))
+
+
+def archive_candidates(older_than_days=None):
+    """الطلبات المنتهية التي تجاوزت مدة الاحتفاظ"""
+    days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = timezone.now() - timedelta(days=days)
+    return DesignRequest.objects.filter(
+        status__in=ARCHIVABLE_STATUSES,
+        updated_at__lt=cutoff,
+    )
+
+
+def _load_batch(ids):
+    from chat.models import Conversation, Message
+
+    return list(
+        DesignRequest.objects.filter(pk__in=ids).select_related('review').prefetch_related(
+            'attachments',
+            Prefetch(
+                'conversations',
+                queryset=Conversation.objects.prefetch_related(
+                    'participants',
+                    Prefetch('messages', queryset=Message.objects.order_by('sent_at')),
+                ),
+            ),
+        )
+    )
+
+
+def archive_batch(ids):
+    """
+    أرشفة مجموعة من الطلبات في معاملة واحدة.
+
+    Returns the number of requests moved. The rows are locked before their
+    status is checked, so a request reopened since it was selected is left
+    alone and cannot be reopened while it is being moved.
+    """
+    from chat.models import Conversation
+
+    with transaction.atomic():
+        # Locked in primary key order, so concurrent batches cannot deadlock
+        locked = list(
+            DesignRequest.objects.select_for_update()
+            .filter(pk__in=ids, status__in=ARCHIVABLE_STATUSES)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        if not locked:
+            return 0
+        requests = _load_batch(locked)
+
+        ArchivedDesignRequest.objects.bulk_create([
+            ArchivedDesignRequest(
+                id=r.pk,
+                request_number=r.request_number,
+                client_id=r.client_id,
+                assigned_designer_id=r.assigned_designer_id,
+                category_id=r.category_id,
+                status=r.status,
+                urgency=r.urgency,
+                quality_level=r.quality_level,
+                total_price=r.total_price,
+                created_at=r.created_at,
+                delivered_at=r.delivered_at,
+                payload=encode_payload(snapshot(r)),
+            )
+            for r in requests
+        ])
+
+        moved = [r.pk for r in requests]
+        # Conversations would otherwise survive with design_request set to NULL
+        Conversation.objects.filter(design_request_id__in=moved).delete()
+        DesignRequest.objects.filter(pk__in=moved).delete()
+    return len(moved)
+
+
+def archive_requests(older_than_days=None, batch_size=200, sleep=0.0, limit=None, progress=None):
+    """
+    نقل كل الطلبات المؤهلة إلى الأرشيف على دفعات.
+
+    Each batch is its own short transaction, followed by an optional pause so
+    the mover never holds locks for long or saturates the database.
+    """
+    candidates = archive_candidates(older_than_days).order_by('updated_at')
+    total = 0
+    while limit is None or total < limit:
+        size = batch_size if limit is None else min(batch_size, limit - total)
+        ids = list(candidates.values_list('pk', flat=True)[:size])
+        if not ids:
+            break
+        total += archive_batch(ids)
+        if progress:
+            progress(total)
+        if sleep:
+            time.sleep(sleep)
+    return total
+
+
+def get_request_detail(request_id, include_conversations=False):
+    """
+    تفاصيل الطلب من الجدول الحي أو من الأرشيف.
+
+    Returns (document, record) where record is the DesignRequest or the
+    ArchivedDesignRequest, or (None, None) when neither exists.
+    """
+    design_request = (
+        DesignRequest.objects.filter(pk=request_id)
+        .select_related('review')
+        .prefetch_related('attachments')
+        .first()
+    )
+    if design_request is not None:
+        # Same JSON types (decimals and dates as strings) as an archived document
+        document = json.loads(_dumps(
+            snapshot(design_request, include_conversations=include_conversations)
+        ))
+        document['is_archived'] = False
+        return document, design_request
+
+    archived = ArchivedDesignRequest.objects.filter(pk=request_id).first()
+    if archived is None:
+        return None, None
+
+    document = decode_payload(archived.payload)
+    if not include_conversations:
+        document.pop('conversations', None)
+    document['is_archived'] = True
+    document['archived_at'] = archived.archived_at
+    return document, archived
@@ -0,0 +1,123 @@
+"""
+Cached design catalog
+كتالوج فئات التصميم المخزّن مؤقتاً
+
+The full active category tree, with sizes and price settings, is built in
+three queries, serialized once and cached under a version number. Each
+process also keeps the last catalog it saw in memory, so a warm request only
+checks the version in the cache and never touches the database. Any change to
+a category, size or price setting bumps the version (see designs.signals).
+"""
+
+import json
+
+from designs.models import DesignCategory, DesignSize, PriceSetting
+from skydesign.cache import Namespace
+
+
+CATALOG = Namespace('designs:catalog', timeout=60 * 60 * 24)
+
+# (version, catalog, json bytes) of the catalog this process last served
+_local = (None, None, None)
+
+
+def _serialize_price(setting):
+    return {
+        'base_price': str(setting.base_price),
+        'quality_multipliers': {
+            'standard': str(setting.quality_multiplier_standard),
+            'professional': str(setting.quality_multiplier_professional),
+            'premium': str(setting.quality_multiplier_premium),
+        },
+        'urgency_multipliers': {
+            'normal': str(setting.urgency_multiplier_normal),
+            'medium': str(setting.urgency_multiplier_medium),
+            'urgent': str(setting.urgency_multiplier_urgent),
+        },
+        'bulk_discount_threshold': setting.bulk_discount_threshold,
+        'bulk_discount_percentage': str(setting.bulk_discount_percentage),
+    }
+
+
+def build_catalog():
+    """بناء شجرة الفئات النشطة مع الأحجام والأسعار"""
+    categories = list(
+        DesignCategory.objects.filter(is_active=True).order_by('depth', 'order', 'name')
+    )
+    category_ids = [c.pk for c in categories]
+
+    sizes = {}
+    for size in DesignSize.objects.filter(category_id__in=category_ids).order_by('name'):
+        sizes.setdefault(size.category_id, []).append({
+            'id': size.pk,
+            'name': size.name,
+            'width': size.width,
+            'height': size.height,
+            'platform': size.platform,
+            'is_custom': size.is_custom,
+            'price_multiplier': str(size.price_multiplier),
+        })
+
+    prices = {
+        setting.category_id: _serialize_price(setting)
+        for setting in PriceSetting.objects.filter(category_id__in=category_ids, is_active=True)
+    }
+
+    # Categories are ordered by depth, so parents are placed before children
+    nodes = {}
+    roots = []
+    for category in categories:
+        node = {
+            'id': category.pk,
+            'name': category.name,
+            'slug': category.slug,
+            'description': category.description,
+            'icon': category.icon,
+            'color': category.color,
+            'depth': category.depth,
+            'sizes': sizes.get(category.pk, []),
+            'pricing': prices.get(category.pk),
+            'children': [],
+        }
+        if category.parent_id is None:
+            roots.append(node)
+        elif category.parent_id in nodes:
+            nodes[category.parent_id]['children'].append(node)
+        else:
+            # Parent is inactive, so the whole branch is hidden
+            continue
+        nodes[category.pk] = node
+
+    return roots
+
+
+def _load():
+    global _local
+
+    version = CATALOG.version()
+    if _local[0] == version:
+        return _local
+
+    payload = CATALOG.get_or_set(
+        'tree',
+        lambda: json.dumps(build_catalog(), ensure_ascii=False).encode(),
+        version=version,
+    )
+
+    _local = (version, json.loads(payload), payload)
+    return _local
+
+
+def get_catalog():
+    """الكتالوج الكامل كقائمة من الفئات الجذرية"""
+    return _load()[1]
+
+
+def get_catalog_json():
+    """الكتالوج الكامل بصيغة JSON جاهزة للإرسال"""
+    return _load()[2]
+
+
+def invalidate_catalog():
+    """إبطال الكتالوج بعد أي تعديل على الفئات أو الأحجام أو الأسعار"""
+    CATALOG.invalidate()
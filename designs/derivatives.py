@@ -0,0 +1,251 @@
+"""
+Image derivatives (thumbnails and web-optimized copies)
+النسخ المصغرة والمحسّنة للويب من الصور
+
+Derivatives are generated by Celery workers when an image is saved. A
+request for a variant that is still missing queues the same task instead
+of resizing on the request path. Images are looked up through the object
+that owns them (resolve_source), never by a client-supplied path. Rows are
+keyed by the source path and the source content hash, so the same picture
+uploaded twice is only resized once.
+"""
+
+import hashlib
+import io
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from PIL import Image, ImageOps
+
+from designs.models import ImageDerivative
+from skydesign.files import source_sha256
+
+
+CACHE_TIMEOUT = 60 * 60 * 24
+# How long a queued variant is not queued again, in case the job is lost
+QUEUED_TIMEOUT = 60
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.tif', '.tiff'}
+
+
+def is_image_name(name):
+    """التحقق من أن المسار يشير إلى صورة مخزنة محلياً"""
+    if not name or '://' in name:
+        return False
+    return PurePosixPath(name).suffix.lower() in IMAGE_EXTENSIONS
+
+
+def derivative_name(source_hash, variant):
+    return f"derivatives/{source_hash[:2]}/{source_hash}_{variant}.webp"
+
+
+def _cache_key(source_name, variant):
+    digest = hashlib.md5(source_name.encode()).hexdigest()
+    return f"derivative:{variant}:{digest}"
+
+
+def queue_key(kind, object_id, index, variant):
+    """مفتاح يمنع جدولة النسخة نفسها أكثر من مرة"""
+    return f"derivative:queued:{kind}:{object_id}:{index}:{variant}"
+
+
+def render_variants(source, variants):
+    """
+    تصغير الصورة إلى النسخ المطلوبة.
+
+    The image is decoded once and resized from the largest variant down, so
+    each smaller variant starts from an already reduced copy.
+    """
+    specs = settings.IMAGE_DERIVATIVE_VARIANTS
+    ordered = sorted(variants, key=lambda v: specs[v]['size'][0], reverse=True)
+
+    with Image.open(source) as image:
+        # Let the JPEG decoder skip detail we are about to throw away
+        image.draft('RGB', specs[ordered[0]]['size'])
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+        rendered = {}
+        for variant in ordered:
+            spec = specs[variant]
+            image.thumbnail(spec['size'], Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, 'WEBP', quality=spec['quality'], method=4)
+            rendered[variant] = (buffer.getvalue(), image.width, image.height)
+    return rendered
+
+
+def _store(source_name, source_hash, variant, content, width, height):
+    name = derivative_name(source_hash, variant)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    try:
+        with transaction.atomic():
+            return ImageDerivative.objects.create(
+                source_name=source_name,
+                source_hash=source_hash,
+                variant=variant,
+                file=name,
+                width=width,
+                height=height,
+                size=len(content),
+            )
+    except IntegrityError:
+        return ImageDerivative.objects.get(source_name=source_name, variant=variant)
+
+
+def _link(source_name, twin):
+    try:
+        with transaction.atomic():
+            return ImageDerivative.objects.create(
+                source_name=source_name,
+                source_hash=twin.source_hash,
+                variant=twin.variant,
+                file=twin.file.name,
+                width=twin.width,
+                height=twin.height,
+                size=twin.size,
+            )
+    except IntegrityError:
+        return ImageDerivative.objects.get(source_name=source_name, variant=twin.variant)
+
+
+def generate_derivatives(source_name, variants=None):
+    """إنشاء النسخ الناقصة لصورة واحدة"""
+    variants = list(variants or settings.IMAGE_DERIVATIVE_VARIANTS)
+    existing = set(
+        ImageDerivative.objects.filter(
+            source_name=source_name,
+            variant__in=variants
+        ).values_list('variant', flat=True)
+    )
+    missing = [v for v in variants if v not in existing]
+    if not missing:
+        return []
+
+    source_hash = source_sha256(source_name)
+
+    # Reuse files already rendered for identical content under another path
+    created = []
+    for twin in ImageDerivative.objects.filter(source_hash=source_hash, variant__in=missing):
+        if twin.variant in missing and default_storage.exists(twin.file.name):
+            missing.remove(twin.variant)
+            created.append(_link(source_name, twin))
+
+    if missing:
+        with default_storage.open(source_name, 'rb') as source:
+            rendered = render_variants(source, missing)
+        for variant, (content, width, height) in rendered.items():
+            created.append(_store(source_name, source_hash, variant, content, width, height))
+
+    for derivative in created:
+        cache.set(_cache_key(source_name, derivative.variant), derivative.file.url, CACHE_TIMEOUT)
+    return created
+
+
+def get_derivative_url(source_name, variant, generate=True):
+    """
+    رابط النسخة المطلوبة من الصورة.
+
+    Looks in the cache, then the database, and renders the variant inline on
+    a miss. Returns None when the source is not an image we can resize.
+    """
+    if variant not in settings.IMAGE_DERIVATIVE_VARIANTS or not is_image_name(source_name):
+        return None
+
+    key = _cache_key(source_name, variant)
+    url = cache.get(key)
+    if url:
+        return url
+
+    derivative = ImageDerivative.objects.filter(source_name=source_name, variant=variant).first()
+    if derivative is None and generate:
+        if not default_storage.exists(source_name):
+            return None
+        generate_derivatives(source_name, [variant])
+        derivative = ImageDerivative.objects.filter(source_name=source_name, variant=variant).first()
+    if derivative is None:
+        return None
+
+    url = derivative.file.url
+    cache.set(key, url, CACHE_TIMEOUT)
+    return url
+
+
+SOURCE_KINDS = ('attachment', 'request', 'avatar', 'portfolio')
+
+
+def resolve_source(kind, object_id, index, user):
+    """
+    مسار صورة مصدر يحق للمستخدم رؤيتها.
+
+    Attachments and request finals are visible to whoever may access the
+    request; profile pictures and portfolios to any signed-in user. index
+    picks one of the object's images. Returns None when the object does
+    not exist, is not visible or has no such image.
+    """
+    from accounts.models import DesignerProfile, User
+    from designs.models import Attachment, DesignRequest
+
+    if kind == 'attachment':
+        instance = Attachment.objects.select_related('request').filter(pk=object_id).first()
+        visible = instance is not None and instance.request.is_accessible_by(user)
+    elif kind == 'request':
+        instance = DesignRequest.objects.filter(pk=object_id).first()
+        visible = instance is not None and instance.is_accessible_by(user)
+    elif kind == 'avatar':
+        instance = User.objects.filter(pk=object_id, is_active=True).first()
+        visible = instance is not None and user.is_authenticated
+    elif kind == 'portfolio':
+        instance = DesignerProfile.objects.filter(user_id=object_id).first()
+        visible = instance is not None and user.is_authenticated
+    else:
+        return None
+
+    if not visible:
+        return None
+    names = image_sources_for(instance)
+    return names[index] if 0 <= index < len(names) else None
+
+
+def source_kind(instance):
+    """
+    نوع الكائن المالك للصور ومعرفه كما يُستخدمان في الرابط.
+
+    Returns (kind, object_id), or None for objects without images.
+    """
+    from accounts.models import DesignerProfile, User
+    from designs.models import Attachment, DesignRequest
+
+    if isinstance(instance, Attachment):
+        return 'attachment', instance.pk
+    if isinstance(instance, DesignRequest):
+        return 'request', instance.pk
+    if isinstance(instance, User):
+        return 'avatar', instance.pk
+    if isinstance(instance, DesignerProfile):
+        return 'portfolio', instance.user_id
+    return None
+
+
+def image_sources_for(instance):
+    """مسارات الصور التي تحتاج نسخاً لكائن معين"""
+    from accounts.models import DesignerProfile, User
+    from designs.models import Attachment, DesignRequest
+
+    if isinstance(instance, Attachment):
+        names = [instance.file.name] if instance.type == 'final' else []
+    elif isinstance(instance, DesignRequest):
+        names = list(instance.final_designs or [])
+    elif isinstance(instance, User):
+        names = [instance.profile_image.name] if instance.profile_image else []
+    elif isinstance(instance, DesignerProfile):
+        names = list(instance.portfolio_images or [])
+    else:
+        names = []
+
+    return [name for name in names if isinstance(name, str) and is_image_name(name)]
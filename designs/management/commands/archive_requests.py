@@ -0,0 +1,36 @@
+"""
+Management command to move finished design requests to the cold archive
+نقل طلبات التصميم المنتهية إلى الأرشيف
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from designs.archive import archive_candidates, archive_requests
+
+
+class Command(BaseCommand):
+    help = 'Move delivered, archived and cancelled requests past the retention window to the archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=settings.ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--sleep', type=float, default=0.5, help='Pause between batches, in seconds')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many requests')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        days = options['older_than_days']
+        if options['dry_run']:
+            count = archive_candidates(days).count()
+            self.stdout.write(f"{count} requests older than {days} days would be archived")
+            return
+
+        count = archive_requests(
+            older_than_days=days,
+            batch_size=options['batch_size'],
+            sleep=options['sleep'],
+            limit=options['limit'],
+            progress=lambda total: self.stdout.write(f"  archived {total}..."),
+        )
+        self.stdout.write(self.style.SUCCESS(f"✅ Archived {count} design requests"))
@@ -0,0 +1,161 @@
+"""
+Benchmark for the design request search index
+قياس أداء فهرس البحث على بيانات تجريبية
+
+Builds a synthetic dataset in temporary tables (nothing is written to the
+real tables), then compares ranked index queries with the icontains-style
+LIKE scan they replace.
+"""
+
+import random
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from designs.search import (
+    PostgresSearchBackend,
+    SQLiteSearchBackend,
+    index_text,
+)
+
+
+# Vocabulary with the spelling variants clients actually type
+WORDS = [
+    'تصميم', 'تَصْمِيم', 'شعار', 'شعـــار', 'مدرسة', 'مدرسه', 'إعلان', 'اعلان', 'أستاذ', 'استاذ',
+    'بطاقة', 'بطاقه', 'منشور', 'فيسبوك', 'انستغرام', 'يوتيوب', 'غلاف', 'كتاب', 'ملزمة', 'ملزمه',
+    'الرياضيات', 'الفيزياء', 'الكيمياء', 'الأحياء', 'العربية', 'الإنجليزية', 'مطعم', 'محل', 'طباعة',
+    'بوستر', 'هوية', 'بصرية', 'عرض', 'تقديمي', 'ألوان', 'الوان', 'أزرق', 'ازرق', 'ذهبي', 'مستعجل',
+    'الصف', 'الأول', 'الثاني', 'الثالث', 'ابتدائي', 'متوسطة', 'إعدادية', 'جامعة', 'دورة', 'مسابقة',
+]
+# Letters used to make up client, school and shop names
+LETTERS = 'ابتثجحخدذرزسشصضطظعغفقكلمنهوي'
+NAME_COUNT = 50_000
+STATUSES = ['RECEIVED', 'REVIEWING', 'IN_PROGRESS', 'READY', 'DELIVERED', 'ARCHIVED', 'CANCELLED']
+QUERIES = [
+    'شعار مدرسة', 'اعلان مطعم', 'إعلان', 'ملزمه الرياضيات', 'غلاف كتاب', 'بطاقة الصف الأول',
+    'تصميم ازرق', 'بوستر مسابقة', 'هوية بصرية', 'استاذ الفيزياء', 'منشور انستغرام', 'DR2025',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the full-text search index on a synthetic dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        backend_class = (
+            PostgresSearchBackend if connection.vendor == 'postgresql' else SQLiteSearchBackend
+        )
+        backend = backend_class(table='bench_search', requests_table='bench_requests')
+
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS bench_requests")
+            cursor.execute(
+                "CREATE TEMP TABLE bench_requests ("
+                f"id {'uuid' if connection.vendor == 'postgresql' else 'char(32)'} PRIMARY KEY, "
+                "status varchar(20), category_id integer, assigned_designer_id char(32), "
+                "title text, body text, created_at integer)"
+            )
+            backend.drop_table(cursor)
+            backend.create_table(cursor, temporary=True)
+
+        designers = [uuid.uuid4().hex for _ in range(50)]
+        names = [''.join(rng.choices(LETTERS, k=rng.randint(4, 7))) for _ in range(NAME_COUNT)]
+        self.stdout.write(f"Generating {options['rows']:,} synthetic requests...")
+        started = time.perf_counter()
+        self.populate(backend, rng, options['rows'], options['batch_size'], designers, names)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Indexed {options['rows']:,} rows in {elapsed:.1f}s "
+            f"({options['rows'] / elapsed:,.0f} rows/s)"
+        )
+
+        # Half common phrases, half selective queries naming a client
+        queries = [
+            rng.choice(QUERIES) if i % 2 else f"{rng.choice(names)} {rng.choice(WORDS)}"
+            for i in range(options['queries'])
+        ]
+        self.report('index, ranked', [
+            lambda q=q: backend.search_ids(q, limit=20) for q in queries
+        ])
+        self.report('index, ranked + filters', [
+            lambda q=q: backend.search_ids(
+                q,
+                statuses=['IN_PROGRESS', 'REVIEWING'],
+                category_id=rng.randint(1, 10),
+                limit=20,
+            ) for q in queries
+        ])
+        self.report('LIKE scan (icontains)', [
+            lambda q=q: self.like_scan(q) for q in queries[:max(len(queries) // 10, 1)]
+        ])
+
+        with connection.cursor() as cursor:
+            backend.drop_table(cursor)
+            cursor.execute("DROP TABLE IF EXISTS bench_requests")
+
+    def populate(self, backend, rng, rows, batch_size, designers, names):
+        for start in range(0, rows, batch_size):
+            requests = []
+            documents = []
+            for number in range(start, min(start + batch_size, rows)):
+                request_id = uuid.uuid4()
+                title = ' '.join(rng.choices(WORDS, k=rng.randint(2, 5)) + [rng.choice(names)])
+                body = ' '.join(rng.choices(WORDS, k=rng.randint(10, 40)))
+                request_number = f"DR{2024 + number % 3}{number % 12 + 1:02d}{number % 10000:04d}"
+                requests.append((
+                    request_id.hex,
+                    rng.choice(STATUSES),
+                    rng.randint(1, 10),
+                    rng.choice(designers),
+                    title,
+                    body,
+                    number,
+                ))
+                documents.append((
+                    request_id,
+                    index_text(title),
+                    index_text(body),
+                    index_text(request_number),
+                ))
+
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    "INSERT INTO bench_requests VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                    requests
+                )
+            backend.index_rows(documents)
+
+    def like_scan(self, query):
+        words = query.split()
+        where = ' AND '.join(['(title LIKE %s OR body LIKE %s)'] * len(words))
+        params = []
+        for word in words:
+            params.extend([f'%{word}%', f'%{word}%'])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id FROM bench_requests WHERE {where} ORDER BY created_at DESC LIMIT 20",
+                params
+            )
+            return cursor.fetchall()
+
+    def report(self, label, calls):
+        timings = []
+        for call in calls:
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+        self.stdout.write(
+            f"{label:<28} n={len(timings):<5} "
+            f"p50={statistics.median(timings):8.2f}ms  p95={p95:8.2f}ms  max={timings[-1]:8.2f}ms"
+        )
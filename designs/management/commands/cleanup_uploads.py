@@ -0,0 +1,16 @@
+"""
+Management command to expire abandoned chunked uploads
+حذف جلسات الرفع المتروكة
+"""
+
+from django.core.management.base import BaseCommand
+
+from designs.uploads import cleanup_expired_sessions
+
+
+class Command(BaseCommand):
+    help = 'Expire abandoned chunked upload sessions and delete their part files'
+
+    def handle(self, *args, **kwargs):
+        count = cleanup_expired_sessions()
+        self.stdout.write(self.style.SUCCESS(f"✅ Expired {count} upload sessions"))
@@ -0,0 +1,42 @@
+"""
+Management command to backfill image derivatives
+إنشاء النسخ المصغرة للصور الموجودة
+"""
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import DesignerProfile, User
+from designs.derivatives import generate_derivatives, image_sources_for
+from designs.models import Attachment, DesignRequest
+from designs.tasks import generate_image_derivatives
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnails and web-optimized copies for existing images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--inline',
+            action='store_true',
+            help='Render in this process instead of queueing Celery tasks'
+        )
+
+    def handle(self, *args, **options):
+        querysets = [
+            Attachment.objects.filter(type='final').only('file', 'type'),
+            DesignRequest.objects.exclude(final_designs=[]).only('final_designs'),
+            User.objects.exclude(profile_image='').exclude(profile_image=None).only('profile_image'),
+            DesignerProfile.objects.exclude(portfolio_images=[]).only('portfolio_images'),
+        ]
+
+        count = 0
+        for queryset in querysets:
+            for instance in queryset.iterator(chunk_size=500):
+                for name in image_sources_for(instance):
+                    if options['inline']:
+                        generate_derivatives(name)
+                    else:
+                        generate_image_derivatives.delay(name)
+                    count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Processed {count} images"))
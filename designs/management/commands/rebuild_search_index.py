@@ -0,0 +1,42 @@
+"""
+Management command to rebuild the design request search index
+إعادة بناء فهرس البحث في طلبات التصميم
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from designs.models import DesignRequest
+from designs.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for design requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        batch_size = options['batch_size']
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                backend.drop_table(cursor)
+                backend.create_table(cursor)
+
+            queryset = DesignRequest.objects.only(
+                'title', 'description', 'client_notes', 'request_number'
+            )
+            batch = []
+            total = 0
+            for design_request in queryset.iterator(chunk_size=batch_size):
+                batch.append(design_request)
+                if len(batch) >= batch_size:
+                    backend.index(batch)
+                    total += len(batch)
+                    batch = []
+            backend.index(batch)
+            total += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Indexed {total} design requests"))
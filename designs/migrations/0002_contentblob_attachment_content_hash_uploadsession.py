@@ -0,0 +1,154 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("designs", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContentBlob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "sha256",
+                    models.CharField(
+                        max_length=64, unique=True, verbose_name="بصمة المحتوى"
+                    ),
+                ),
+                (
+                    "file",
+                    models.FileField(
+                        max_length=255, upload_to="blobs/", verbose_name="الملف"
+                    ),
+                ),
+                (
+                    "size",
+                    models.BigIntegerField(help_text="بالبايت", verbose_name="الحجم"),
+                ),
+                (
+                    "mime_type",
+                    models.CharField(max_length=100, verbose_name="نوع الملف"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="تاريخ الإنشاء"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "ملف مخزّن",
+                "verbose_name_plural": "الملفات المخزّنة",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddField(
+            model_name="attachment",
+            name="content_hash",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="SHA-256 لمحتوى الملف",
+                max_length=64,
+                verbose_name="بصمة المحتوى",
+            ),
+        ),
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "filename",
+                    models.CharField(max_length=255, verbose_name="اسم الملف"),
+                ),
+                (
+                    "total_size",
+                    models.BigIntegerField(
+                        help_text="بالبايت", verbose_name="الحجم الكلي"
+                    ),
+                ),
+                (
+                    "received_size",
+                    models.BigIntegerField(default=0, verbose_name="الحجم المستلم"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("uploading", "قيد الرفع"),
+                            ("complete", "مكتمل"),
+                            ("expired", "منتهي"),
+                        ],
+                        default="uploading",
+                        max_length=20,
+                        verbose_name="الحالة",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="تاريخ الإنشاء"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="تاريخ التحديث"),
+                ),
+                (
+                    "blob",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="upload_sessions",
+                        to="designs.contentblob",
+                        verbose_name="الملف المخزّن",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_sessions",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="المستخدم",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "جلسة رفع",
+                "verbose_name_plural": "جلسات الرفع",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "updated_at"],
+                        name="designs_upl_status_dbea0c_idx",
+                    )
+                ],
+            },
+        ),
+    ]
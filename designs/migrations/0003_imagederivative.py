@@ -0,0 +1,64 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("designs", "0002_contentblob_attachment_content_hash_uploadsession"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImageDerivative",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "source_name",
+                    models.CharField(max_length=255, verbose_name="مسار المصدر"),
+                ),
+                (
+                    "source_hash",
+                    models.CharField(max_length=64, verbose_name="بصمة المصدر"),
+                ),
+                ("variant", models.CharField(max_length=20, verbose_name="النسخة")),
+                (
+                    "file",
+                    models.ImageField(
+                        max_length=255, upload_to="derivatives/", verbose_name="الملف"
+                    ),
+                ),
+                ("width", models.IntegerField(verbose_name="العرض")),
+                ("height", models.IntegerField(verbose_name="الارتفاع")),
+                (
+                    "size",
+                    models.IntegerField(help_text="بالبايت", verbose_name="الحجم"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="تاريخ الإنشاء"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "نسخة صورة",
+                "verbose_name_plural": "نسخ الصور",
+                "indexes": [
+                    models.Index(
+                        fields=["source_hash", "variant"],
+                        name="designs_ima_source__fd5be4_idx",
+                    )
+                ],
+                "unique_together": {("source_name", "variant")},
+            },
+        ),
+    ]
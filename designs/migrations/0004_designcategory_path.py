@@ -0,0 +1,51 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:28
+
+from django.db import migrations, models
+
+
+def populate_paths(apps, schema_editor):
+    DesignCategory = apps.get_model("designs", "DesignCategory")
+    categories = {c.pk: c for c in DesignCategory.objects.all()}
+
+    def resolve(category):
+        if category.path:
+            return category
+        segment = f"{category.pk:05d}/"
+        if category.parent_id is None:
+            category.path, category.depth = segment, 0
+        else:
+            parent = resolve(categories[category.parent_id])
+            category.path, category.depth = parent.path + segment, parent.depth + 1
+        return category
+
+    for category in categories.values():
+        resolve(category)
+    DesignCategory.objects.bulk_update(categories.values(), ["path", "depth"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("designs", "0003_imagederivative"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="designcategory",
+            name="depth",
+            field=models.PositiveSmallIntegerField(
+                default=0, editable=False, verbose_name="العمق"
+            ),
+        ),
+        migrations.AddField(
+            model_name="designcategory",
+            name="path",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                max_length=255,
+                verbose_name="المسار",
+            ),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,151 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:30
+
+import re
+
+from django.db import migrations
+
+
+TABLE = "designs_designrequest_search"
+IDS_TABLE = f"{TABLE}_ids"
+REQUESTS_TABLE = "designs_designrequest"
+BATCH_SIZE = 1000
+
+# Frozen copy of the designs.search normalization this index was built with
+ARABIC_DIACRITICS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]")
+TOKEN_RE = re.compile(r"\w+")
+ARABIC_VARIANTS = str.maketrans(
+    {
+        "أ": "ا",
+        "إ": "ا",
+        "آ": "ا",
+        "ٱ": "ا",
+        "ة": "ه",
+        "ى": "ي",
+        "ؤ": "و",
+        "ئ": "ي",
+        "ـ": None,
+        "٠": "0",
+        "١": "1",
+        "٢": "2",
+        "٣": "3",
+        "٤": "4",
+        "٥": "5",
+        "٦": "6",
+        "٧": "7",
+        "٨": "8",
+        "٩": "9",
+    }
+)
+ARTICLE_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+
+VECTOR_SQL = (
+    "setweight(to_tsvector('simple', %s), 'A') || "
+    "setweight(to_tsvector('simple', %s), 'B') || "
+    "setweight(to_tsvector('simple', %s), 'A')"
+)
+
+
+def index_text(text):
+    if not text:
+        return ""
+    text = ARABIC_DIACRITICS.sub("", text.lower())
+    text = " ".join(text.translate(ARABIC_VARIANTS).split())
+    tokens = []
+    for token in TOKEN_RE.findall(text):
+        for prefix in ARTICLE_PREFIXES:
+            if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+                token = token[len(prefix) :]
+                break
+        tokens.append(token)
+    return " ".join(tokens)
+
+
+def create_tables(cursor, postgres):
+    if postgres:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+            f"request_id uuid PRIMARY KEY REFERENCES {REQUESTS_TABLE} (id) "
+            "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "vector tsvector NOT NULL)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {TABLE}_vector_gin ON {TABLE} USING gin (vector)"
+        )
+    else:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {IDS_TABLE} ("
+            "id integer PRIMARY KEY, request_id char(32) NOT NULL UNIQUE)"
+        )
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            "title, body, number, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def insert_rows(cursor, postgres, rows, first_rowid):
+    if not rows:
+        return
+    if postgres:
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (request_id, vector) VALUES (%s, {VECTOR_SQL}) "
+            "ON CONFLICT (request_id) DO UPDATE SET vector = EXCLUDED.vector",
+            rows,
+        )
+        return
+    # Both tables are new, so rowids can simply be numbered
+    numbered = list(enumerate(rows, start=first_rowid))
+    cursor.executemany(
+        f"INSERT INTO {IDS_TABLE} (id, request_id) VALUES (%s, %s)",
+        [(rowid, row[0]) for rowid, row in numbered],
+    )
+    cursor.executemany(
+        f"INSERT INTO {TABLE} (rowid, title, body, number) VALUES (%s, %s, %s, %s)",
+        [(rowid, *row[1:]) for rowid, row in numbered],
+    )
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    postgres = connection.vendor == "postgresql"
+    DesignRequest = apps.get_model("designs", "DesignRequest")
+    pk_field = DesignRequest._meta.pk
+
+    with connection.cursor() as cursor:
+        create_tables(cursor, postgres)
+
+        written = 0
+        batch = []
+        for design_request in DesignRequest.objects.only(
+            "title", "description", "client_notes", "request_number"
+        ).iterator(chunk_size=BATCH_SIZE):
+            batch.append(
+                (
+                    pk_field.get_db_prep_value(design_request.pk, connection),
+                    index_text(design_request.title),
+                    index_text(
+                        f"{design_request.description} {design_request.client_notes}"
+                    ),
+                    index_text(design_request.request_number),
+                )
+            )
+            if len(batch) >= BATCH_SIZE:
+                insert_rows(cursor, postgres, batch, written + 1)
+                written += len(batch)
+                batch = []
+        insert_rows(cursor, postgres, batch, written + 1)
+
+
+def drop_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.execute(f"DROP TABLE IF EXISTS {IDS_TABLE}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("designs", "0004_designcategory_path"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
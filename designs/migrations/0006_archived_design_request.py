@@ -0,0 +1,84 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("designs", "0005_designrequest_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedDesignRequest",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(editable=False, primary_key=True, serialize=False),
+                ),
+                (
+                    "request_number",
+                    models.CharField(
+                        max_length=20, unique=True, verbose_name="رقم الطلب"
+                    ),
+                ),
+                ("status", models.CharField(max_length=20, verbose_name="الحالة")),
+                (
+                    "total_price",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=10,
+                        verbose_name="السعر الإجمالي",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(verbose_name="تاريخ الإنشاء")),
+                (
+                    "archived_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="تاريخ الأرشفة"
+                    ),
+                ),
+                ("payload", models.BinaryField(verbose_name="البيانات المضغوطة")),
+                (
+                    "assigned_designer",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="archived_assigned_designs",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="المصمم المعين",
+                    ),
+                ),
+                (
+                    "client",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="archived_design_requests",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="العميل",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "طلب مؤرشف",
+                "verbose_name_plural": "الطلبات المؤرشفة",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["client", "created_at"],
+                        name="designs_arc_client__b5f4cd_idx",
+                    ),
+                    models.Index(
+                        fields=["assigned_designer", "created_at"],
+                        name="designs_arc_assigne_f793af_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
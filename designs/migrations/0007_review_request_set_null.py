@@ -0,0 +1,25 @@
+# Generated by Django 4.2.8 on 2026-10-19 09:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("designs", "0006_archived_design_request"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="review",
+            name="request",
+            field=models.OneToOneField(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="review",
+                to="designs.designrequest",
+                verbose_name="الطلب",
+            ),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 4.2.8 on 2026-10-19 09:32
+
+import json
+import zlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils.dateparse import parse_datetime
+
+
+def copy_report_columns(apps, schema_editor):
+    ArchivedDesignRequest = apps.get_model("designs", "ArchivedDesignRequest")
+    DesignCategory = apps.get_model("designs", "DesignCategory")
+    category_ids = set(DesignCategory.objects.values_list("pk", flat=True))
+
+    batch = []
+    for archived in ArchivedDesignRequest.objects.only("pk", "payload").iterator(
+        chunk_size=500
+    ):
+        request = json.loads(zlib.decompress(bytes(archived.payload)))["request"]
+        delivered_at = request.get("delivered_at")
+        archived.category_id = (
+            request.get("category") if request.get("category") in category_ids else None
+        )
+        archived.urgency = request.get("urgency") or ""
+        archived.quality_level = request.get("quality_level") or ""
+        archived.delivered_at = parse_datetime(delivered_at) if delivered_at else None
+        batch.append(archived)
+        if len(batch) >= 500:
+            ArchivedDesignRequest.objects.bulk_update(
+                batch, ["category", "urgency", "quality_level", "delivered_at"]
+            )
+            batch = []
+    ArchivedDesignRequest.objects.bulk_update(
+        batch, ["category", "urgency", "quality_level", "delivered_at"]
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("designs", "0007_review_request_set_null"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archiveddesignrequest",
+            name="category",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="designs.designcategory",
+                verbose_name="فئة التصميم",
+            ),
+        ),
+        migrations.AddField(
+            model_name="archiveddesignrequest",
+            name="delivered_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="تاريخ التسليم"
+            ),
+        ),
+        migrations.AddField(
+            model_name="archiveddesignrequest",
+            name="quality_level",
+            field=models.CharField(
+                blank=True, max_length=20, verbose_name="مستوى الجودة"
+            ),
+        ),
+        migrations.AddField(
+            model_name="archiveddesignrequest",
+            name="urgency",
+            field=models.CharField(
+                blank=True, max_length=10, verbose_name="مستوى الاستعجال"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="archiveddesignrequest",
+            index=models.Index(
+                fields=["delivered_at"], name="designs_arc_deliver_a65978_idx"
+            ),
+        ),
+        migrations.RunPython(copy_report_columns, migrations.RunPython.noop),
+    ]
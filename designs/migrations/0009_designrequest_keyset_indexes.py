@@ -0,0 +1,26 @@
+# Generated by Django 4.2.8 on 2026-10-19 09:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("designs", "0008_archived_request_report_columns"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="designrequest",
+            index=models.Index(
+                fields=["client", "-created_at", "-id"],
+                name="designs_des_client__872b37_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="designrequest",
+            index=models.Index(
+                fields=["assigned_designer", "-created_at", "-id"],
+                name="designs_des_assigne_84f9b2_idx",
+            ),
+        ),
+    ]
@@ -5,6 +5,7 @@ Design Request and Order Models
 
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from django.conf import settings
@@ -29,6 +30,12 @@ class DesignCategory(models.Model):
     is_active = models.BooleanField(_("نشط"), default=True)
     order = models.IntegerField(_("الترتيب"), default=0)
     
+    # المسار الكامل في الشجرة (مثال: "00001/00007/")
+    path = models.CharField(_("المسار"), max_length=255, blank=True, db_index=True, editable=False)
+    depth = models.PositiveSmallIntegerField(_("العمق"), default=0, editable=False)
+    
+    PATH_SEGMENT_WIDTH = 5
+    
     class Meta:
         verbose_name = _("فئة التصميم")
         verbose_name_plural = _("فئات التصميم")
@@ -36,6 +43,63 @@ class DesignCategory(models.Model):
     
     def __str__(self):
         return self.name
+    
+    def creates_cycle(self):
+        """التحقق من أن الفئة الأم ليست الفئة نفسها أو إحدى فروعها"""
+        if not (self.parent_id and self.path):
+            return False
+        parent_path = DesignCategory.objects.filter(
+            pk=self.parent_id
+        ).values_list('path', flat=True).first() or ''
+        return parent_path.startswith(self.path)
+    
+    def clean(self):
+        super().clean()
+        if self.creates_cycle():
+            raise ValidationError({'parent': _("لا يمكن جعل الفئة فرعاً من نفسها")})
+    
+    def save(self, *args, **kwargs):
+        # Saving a cycle would corrupt the paths
+        self.clean()
+        
+        super().save(*args, **kwargs)
+        self.update_path()
+    
+    def build_path(self):
+        """حساب المسار من مسار الفئة الأم"""
+        segment = f"{self.pk:0{self.PATH_SEGMENT_WIDTH}d}/"
+        if self.parent_id is None:
+            return segment, 0
+        parent = DesignCategory.objects.only('path', 'depth').get(pk=self.parent_id)
+        return parent.path + segment, parent.depth + 1
+    
+    def update_path(self):
+        """تحديث مسار الفئة ومسارات جميع الفئات المتفرعة منها"""
+        old_path = self.path
+        new_path, new_depth = self.build_path()
+        if new_path == old_path and new_depth == self.depth:
+            return
+        
+        DesignCategory.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+        if old_path:
+            depth_delta = new_depth - self.depth
+            descendants = list(DesignCategory.objects.filter(
+                path__startswith=old_path
+            ).exclude(pk=self.pk).only('path', 'depth'))
+            for descendant in descendants:
+                descendant.path = new_path + descendant.path[len(old_path):]
+                descendant.depth += depth_delta
+            DesignCategory.objects.bulk_update(descendants, ['path', 'depth'])
+        
+        self.path = new_path
+        self.depth = new_depth
+    
+    def get_descendants(self, include_self=False):
+        """جميع الفئات المتفرعة باستعلام واحد"""
+        descendants = DesignCategory.objects.filter(path__startswith=self.path).order_by('path')
+        if not include_self:
+            descendants = descendants.exclude(pk=self.pk)
+        return descendants
 
 
 class DesignSize(models.Model):
@@ -76,6 +140,39 @@ class DesignSize(models.Model):
         return f"{self.name} ({self.width}x{self.height})"
 
 
+class DesignRequestQuerySet(models.QuerySet):
+    """استعلامات جاهزة لقوائم الطلبات"""
+    
+    LIST_FIELDS = [
+        'id', 'request_number', 'title', 'status', 'urgency', 'quality_level',
+        'total_price', 'created_at', 'due_date', 'delivered_at',
+        'client', 'client__name',
+        'category', 'category__name', 'category__slug',
+        'size', 'size__name', 'size__width', 'size__height',
+        'assigned_designer', 'assigned_designer__name',
+        'review', 'review__rating',
+    ]
+    
+    def for_listing(self):
+        """كل ما تحتاجه القوائم باستعلام واحد"""
+        return self.select_related(
+            'client', 'category', 'size', 'assigned_designer', 'review'
+        ).only(*self.LIST_FIELDS)
+    
+    def assigned_to(self, designer):
+        return self.filter(assigned_designer=designer)
+    
+    def for_client(self, client):
+        return self.filter(client=client)
+    
+    def status_counts(self):
+        """عدد الطلبات لكل حالة باستعلام تجميعي واحد"""
+        return self.order_by().aggregate(**{
+            status: models.Count('id', filter=models.Q(status=status))
+            for status, _ in DesignRequest.STATUS_CHOICES
+        })
+
+
 class DesignRequest(models.Model):
     """طلبات التصميم"""
     
@@ -255,6 +352,8 @@ class DesignRequest(models.Model):
     # البيانات الإضافية
     metadata = models.JSONField(_("بيانات إضافية"), default=dict, blank=True)
     
+    objects = DesignRequestQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _("طلب تصميم")
         verbose_name_plural = _("طلبات التصميم")
@@ -264,6 +363,9 @@ class DesignRequest(models.Model):
             models.Index(fields=['client', 'status']),
             models.Index(fields=['assigned_designer', 'status']),
             models.Index(fields=['request_number']),
+            # Keyset pages of one client's or designer's requests (designs.pagination)
+            models.Index(fields=['client', '-created_at', '-id']),
+            models.Index(fields=['assigned_designer', '-created_at', '-id']),
         ]
     
     def __str__(self):
@@ -305,18 +407,38 @@ class DesignRequest(models.Model):
         self.total_price = self.base_price + self.urgency_fee + self.quality_fee
         return self.total_price
     
-    def assign_designer(self, designer):
+    def assign_designer(self, designer, user=None):
         """تعيين مصمم للطلب"""
+        previous = self.status
         self.assigned_designer = designer
         self.status = 'IN_PROGRESS'
         self.started_at = timezone.now()
         self.save(update_fields=['assigned_designer', 'status', 'started_at'])
+        self._audit_status(previous, user, designer=str(designer.pk))
     
-    def mark_as_delivered(self):
+    def mark_as_delivered(self, user=None):
         """تحديد الطلب كمسلّم"""
+        previous = self.status
         self.status = 'DELIVERED'
         self.delivered_at = timezone.now()
         self.save(update_fields=['status', 'delivered_at'])
+        self._audit_status(previous, user)
+    
+    def _audit_status(self, previous, user, **data):
+        from accounts.audit import audit
+        
+        audit('STATUS_CHANGE', 'DesignRequest', self.pk, user=user,
+              data={'from': previous, 'to': self.status, **data})
+    
+    def is_accessible_by(self, user):
+        """التحقق من صلاحية المستخدم للوصول إلى الطلب"""
+        if not user.is_authenticated:
+            return False
+        return (
+            user.is_manager
+            or self.client_id == user.pk
+            or self.assigned_designer_id == user.pk
+        )
     
     @property
     def is_overdue(self):
@@ -334,6 +456,65 @@ class DesignRequest(models.Model):
         return None
 
 
+class ArchivedDesignRequest(models.Model):
+    """
+    طلبات التصميم المؤرشفة (التخزين البارد)
+    
+    Only the columns needed to find, authorize and report on a request are
+    kept as columns; the request itself, its attachments, review and
+    conversations are stored as one compressed JSON document in ``payload``.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    request_number = models.CharField(_("رقم الطلب"), max_length=20, unique=True)
+    client = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='archived_design_requests',
+        verbose_name=_("العميل")
+    )
+    assigned_designer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_assigned_designs',
+        verbose_name=_("المصمم المعين")
+    )
+    category = models.ForeignKey(
+        DesignCategory,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name=_("فئة التصميم")
+    )
+    status = models.CharField(_("الحالة"), max_length=20)
+    urgency = models.CharField(_("مستوى الاستعجال"), max_length=10, blank=True)
+    quality_level = models.CharField(_("مستوى الجودة"), max_length=20, blank=True)
+    total_price = models.DecimalField(_("السعر الإجمالي"), max_digits=10, decimal_places=2, default=0)
+    created_at = models.DateTimeField(_("تاريخ الإنشاء"))
+    delivered_at = models.DateTimeField(_("تاريخ التسليم"), null=True, blank=True)
+    archived_at = models.DateTimeField(_("تاريخ الأرشفة"), auto_now_add=True)
+    payload = models.BinaryField(_("البيانات المضغوطة"))
+    
+    class Meta:
+        verbose_name = _("طلب مؤرشف")
+        verbose_name_plural = _("الطلبات المؤرشفة")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['client', 'created_at']),
+            models.Index(fields=['assigned_designer', 'created_at']),
+            models.Index(fields=['delivered_at']),
+        ]
+    
+    def __str__(self):
+        return f"#{self.request_number} (مؤرشف)"
+    
+    def is_accessible_by(self, user):
+        """التحقق من صلاحية المستخدم للوصول إلى الطلب"""
+        return DesignRequest.is_accessible_by(self, user)
+
+
 class Attachment(models.Model):
     """المرفقات"""
     
@@ -364,6 +545,13 @@ class Attachment(models.Model):
     original_name = models.CharField(_("اسم الملف الأصلي"), max_length=255)
     file_size = models.IntegerField(_("حجم الملف"), help_text="بالبايت")
     mime_type = models.CharField(_("نوع الملف"), max_length=100)
+    content_hash = models.CharField(
+        _("بصمة المحتوى"),
+        max_length=64,
+        blank=True,
+        db_index=True,
+        help_text="SHA-256 لمحتوى الملف"
+    )
     
     uploaded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -385,12 +573,107 @@ class Attachment(models.Model):
         return f"{self.original_name} - {self.get_type_display()}"
 
 
+class ContentBlob(models.Model):
+    """ملف مخزّن حسب بصمة المحتوى (بدون تكرار)"""
+    sha256 = models.CharField(_("بصمة المحتوى"), max_length=64, unique=True)
+    file = models.FileField(_("الملف"), upload_to='blobs/', max_length=255)
+    size = models.BigIntegerField(_("الحجم"), help_text="بالبايت")
+    mime_type = models.CharField(_("نوع الملف"), max_length=100)
+    created_at = models.DateTimeField(_("تاريخ الإنشاء"), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _("ملف مخزّن")
+        verbose_name_plural = _("الملفات المخزّنة")
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} بايت)"
+
+
+class ImageDerivative(models.Model):
+    """نسخ مصغرة ومحسّنة للويب من الصور"""
+    source_name = models.CharField(_("مسار المصدر"), max_length=255)
+    source_hash = models.CharField(_("بصمة المصدر"), max_length=64)
+    variant = models.CharField(_("النسخة"), max_length=20)
+    file = models.ImageField(_("الملف"), upload_to='derivatives/', max_length=255)
+    width = models.IntegerField(_("العرض"))
+    height = models.IntegerField(_("الارتفاع"))
+    size = models.IntegerField(_("الحجم"), help_text="بالبايت")
+    created_at = models.DateTimeField(_("تاريخ الإنشاء"), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _("نسخة صورة")
+        verbose_name_plural = _("نسخ الصور")
+        unique_together = [['source_name', 'variant']]
+        indexes = [
+            models.Index(fields=['source_hash', 'variant']),
+        ]
+    
+    def __str__(self):
+        return f"{self.source_name} ({self.variant})"
+
+
+class UploadSession(models.Model):
+    """جلسة رفع مجزأ قابلة للاستكمال"""
+    
+    STATUS_CHOICES = [
+        ('uploading', 'قيد الرفع'),
+        ('complete', 'مكتمل'),
+        ('expired', 'منتهي'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        verbose_name=_("المستخدم")
+    )
+    filename = models.CharField(_("اسم الملف"), max_length=255)
+    total_size = models.BigIntegerField(_("الحجم الكلي"), help_text="بالبايت")
+    received_size = models.BigIntegerField(_("الحجم المستلم"), default=0)
+    status = models.CharField(
+        _("الحالة"),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='uploading'
+    )
+    blob = models.ForeignKey(
+        ContentBlob,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='upload_sessions',
+        verbose_name=_("الملف المخزّن")
+    )
+    created_at = models.DateTimeField(_("تاريخ الإنشاء"), auto_now_add=True)
+    updated_at = models.DateTimeField(_("تاريخ التحديث"), auto_now=True)
+    
+    class Meta:
+        verbose_name = _("جلسة رفع")
+        verbose_name_plural = _("جلسات الرفع")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.filename} ({self.received_size}/{self.total_size})"
+    
+    @property
+    def is_complete(self):
+        return self.received_size >= self.total_size
+
+
 class Review(models.Model):
     """التقييمات والمراجعات"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Archiving deletes the request but keeps the review for designer ratings
     request = models.OneToOneField(
         DesignRequest,
-        on_delete=models.CASCADE,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
         related_name='review',
         verbose_name=_("الطلب")
     )
@@ -440,6 +723,8 @@ class Review(models.Model):
         unique_together = [['request', 'client']]
     
     def __str__(self):
+        if self.request_id is None:
+            return f"تقييم {self.client.name} لطلب مؤرشف"
         return f"تقييم {self.client.name} للطلب #{self.request.request_number}"
 
 
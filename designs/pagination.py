@@ -0,0 +1,52 @@
+"""
+Keyset (cursor) pagination
+التصفح باستخدام المؤشر بدلاً من الإزاحة
+
+Pages are addressed by the (created_at, id) of the last row seen, so every
+page is an index range scan no matter how deep the client scrolls. The
+per-client and per-designer lists are served by the (client, -created_at,
+-id) and (assigned_designer, -created_at, -id) indexes on DesignRequest.
+"""
+
+import base64
+import uuid
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(obj):
+    raw = f"{obj.created_at.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(pk)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(str(exc))
+
+
+def keyset_page(queryset, cursor=None, page_size=20):
+    """
+    صفحة من النتائج مرتبة من الأحدث.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    queryset = queryset.order_by('-created_at', '-pk')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        )
+
+    rows = list(queryset[:page_size + 1])
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
@@ -0,0 +1,349 @@
+"""
+Arabic-aware full-text search over design requests
+البحث النصي في طلبات التصميم مع مراعاة الإملاء العربي
+
+Text is normalized before it is indexed and before it is searched, so
+spelling variants (alef forms, taa marbuta, alef maqsura, diacritics,
+tatweel, the definite article) match each other. The index lives next to the requests table: an
+FTS5 virtual table on SQLite and a tsvector table with a GIN index on
+PostgreSQL. Both implement the same small interface, and filters on status,
+category and designer are applied by joining back to the requests table.
+"""
+
+import re
+
+from django.db import connection
+
+from designs.models import DesignRequest
+
+
+ARABIC_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]')
+TOKEN_RE = re.compile(r'\w+')
+
+ARABIC_VARIANTS = str.maketrans({
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ة': 'ه',
+    'ى': 'ي',
+    'ؤ': 'و',
+    'ئ': 'ي',
+    'ـ': None,  # tatweel
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
+})
+
+# Definite article forms stripped from words so "المدرسة" matches "مدرسة"
+ARTICLE_PREFIXES = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال')
+
+INDEXED_FIELDS = {'title', 'description', 'client_notes', 'request_number'}
+
+
+def normalize_arabic(text):
+    """توحيد أشكال الحروف العربية وإزالة التشكيل والتطويل"""
+    if not text:
+        return ''
+    text = ARABIC_DIACRITICS.sub('', text.lower())
+    return ' '.join(text.translate(ARABIC_VARIANTS).split())
+
+
+def strip_article(token):
+    for prefix in ARTICLE_PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+            return token[len(prefix):]
+    return token
+
+
+def tokenize(text):
+    """تقسيم النص الموحد إلى كلمات بدون أداة التعريف"""
+    return [strip_article(token) for token in TOKEN_RE.findall(normalize_arabic(text))]
+
+
+def index_text(text):
+    """النص كما يُخزَّن في الفهرس"""
+    return ' '.join(tokenize(text))
+
+
+def document_for(design_request):
+    """(العنوان، النص، رقم الطلب) بعد التوحيد"""
+    return (
+        index_text(design_request.title),
+        index_text(f"{design_request.description} {design_request.client_notes}"),
+        index_text(design_request.request_number),
+    )
+
+
+def _db_id(value):
+    return DesignRequest._meta.pk.get_db_prep_value(value, connection)
+
+
+class SearchBackend:
+    """الواجهة المشتركة لمحركات البحث"""
+
+    def __init__(self, table='designs_designrequest_search', requests_table=None):
+        self.table = table
+        self.requests_table = requests_table or DesignRequest._meta.db_table
+
+    def create_table(self, cursor, temporary=False):
+        raise NotImplementedError
+
+    def drop_table(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index(self, design_requests):
+        """إضافة الطلبات إلى الفهرس أو تحديثها"""
+        self.index_rows([(r.pk, *document_for(r)) for r in design_requests])
+
+    def index_rows(self, rows):
+        """rows: (request_id, title, body, number) already normalized"""
+        raise NotImplementedError
+
+    def remove(self, request_ids):
+        """حذف الطلبات من الفهرس"""
+        ids = [_db_id(pk) for pk in request_ids]
+        if not ids:
+            return
+        placeholders = ', '.join(['%s'] * len(ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE request_id IN ({placeholders})", ids)
+
+    def from_clause(self):
+        return (
+            f"{self.table} JOIN {self.requests_table} r "
+            f"ON r.id = {self.table}.request_id"
+        )
+
+    def id_column(self):
+        return f"{self.table}.request_id"
+
+    def match_clause(self):
+        raise NotImplementedError
+
+    def match_expression(self, tokens):
+        raise NotImplementedError
+
+    def rank_clause(self):
+        raise NotImplementedError
+
+    def rank_params(self, tokens):
+        return []
+
+    def search_ids(self, query, statuses=None, category_id=None, designer_id=None,
+                   limit=20, offset=0):
+        """معرفات الطلبات المطابقة مرتبة حسب الصلة"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        where = [self.match_clause()]
+        params = [self.match_expression(tokens)]
+        if statuses:
+            where.append(f"r.status IN ({', '.join(['%s'] * len(statuses))})")
+            params.extend(statuses)
+        if category_id:
+            where.append("r.category_id = %s")
+            params.append(category_id)
+        if designer_id:
+            where.append("r.assigned_designer_id = %s")
+            params.append(_db_id(designer_id))
+
+        sql = (
+            f"SELECT {self.id_column()} FROM {self.from_clause()} "
+            f"WHERE {' AND '.join(where)} "
+            f"ORDER BY {self.rank_clause()} LIMIT %s OFFSET %s"
+        )
+        params.extend(self.rank_params(tokens))
+        params.extend([limit, offset])
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [DesignRequest._meta.pk.to_python(row[0]) for row in cursor.fetchall()]
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    فهرس FTS5 على SQLite
+
+    FTS5 rows are addressed by integer rowid, so a small side table maps each
+    request id to its rowid; updates and deletes then touch a single row
+    instead of scanning the index.
+    """
+    CHUNK_SIZE = 500
+
+    @property
+    def ids_table(self):
+        return f"{self.table}_ids"
+
+    def create_table(self, cursor, temporary=False):
+        schema = 'temp.' if temporary else ''
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {schema}{self.ids_table} ("
+            "id integer PRIMARY KEY, request_id char(32) NOT NULL UNIQUE)"
+        )
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {schema}{self.table} USING fts5("
+            "title, body, number, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+    def drop_table(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+        cursor.execute(f"DROP TABLE IF EXISTS {self.ids_table}")
+
+    def _rowids(self, cursor, db_ids):
+        rowids = {}
+        for start in range(0, len(db_ids), self.CHUNK_SIZE):
+            chunk = db_ids[start:start + self.CHUNK_SIZE]
+            cursor.execute(
+                f"SELECT request_id, id FROM {self.ids_table} "
+                f"WHERE request_id IN ({', '.join(['%s'] * len(chunk))})",
+                chunk
+            )
+            rowids.update(cursor.fetchall())
+        return rowids
+
+    def _delete_rows(self, cursor, rowids):
+        rowids = list(rowids)
+        for start in range(0, len(rowids), self.CHUNK_SIZE):
+            chunk = rowids[start:start + self.CHUNK_SIZE]
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN ({', '.join(['%s'] * len(chunk))})",
+                chunk
+            )
+
+    def _delete_ids(self, cursor, rowids):
+        rowids = list(rowids)
+        for start in range(0, len(rowids), self.CHUNK_SIZE):
+            chunk = rowids[start:start + self.CHUNK_SIZE]
+            cursor.execute(
+                f"DELETE FROM {self.ids_table} WHERE id IN ({', '.join(['%s'] * len(chunk))})",
+                chunk
+            )
+
+    def index_rows(self, rows):
+        if not rows:
+            return
+        db_ids = [_db_id(row[0]) for row in rows]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR IGNORE INTO {self.ids_table} (request_id) VALUES (%s)",
+                [(db_id,) for db_id in db_ids]
+            )
+            rowids = self._rowids(cursor, db_ids)
+            self._delete_rows(cursor, rowids.values())
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, title, body, number) VALUES (%s, %s, %s, %s)",
+                [(rowids[db_id], *row[1:]) for db_id, row in zip(db_ids, rows)]
+            )
+
+    def remove(self, request_ids):
+        db_ids = [_db_id(pk) for pk in request_ids]
+        if not db_ids:
+            return
+        with connection.cursor() as cursor:
+            rowids = self._rowids(cursor, db_ids)
+            self._delete_rows(cursor, rowids.values())
+            self._delete_ids(cursor, rowids.values())
+
+    def from_clause(self):
+        return (
+            f"{self.table} JOIN {self.ids_table} m ON m.id = {self.table}.rowid "
+            f"JOIN {self.requests_table} r ON r.id = m.request_id"
+        )
+
+    def id_column(self):
+        return "m.request_id"
+
+    def match_clause(self):
+        return f"{self.table} MATCH %s"
+
+    def match_expression(self, tokens):
+        # Every token must match, as a prefix so partial words still find results
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def rank_clause(self):
+        # bm25() is lower for better matches; titles and numbers weigh more
+        return f"bm25({self.table}, 10.0, 1.0, 5.0)"
+
+
+class PostgresSearchBackend(SearchBackend):
+    """فهرس tsvector مع GIN على PostgreSQL"""
+
+    VECTOR_SQL = (
+        "setweight(to_tsvector('simple', %s), 'A') || "
+        "setweight(to_tsvector('simple', %s), 'B') || "
+        "setweight(to_tsvector('simple', %s), 'A')"
+    )
+
+    def create_table(self, cursor, temporary=False):
+        if temporary:
+            cursor.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {self.table} ("
+                "request_id uuid PRIMARY KEY, vector tsvector NOT NULL)"
+            )
+        else:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                f"request_id uuid PRIMARY KEY REFERENCES {self.requests_table} (id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "vector tsvector NOT NULL)"
+            )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.table}_vector_gin "
+            f"ON {self.table} USING gin (vector)"
+        )
+
+    def index_rows(self, rows):
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table} (request_id, vector) VALUES (%s, {self.VECTOR_SQL}) "
+                "ON CONFLICT (request_id) DO UPDATE SET vector = EXCLUDED.vector",
+                [(_db_id(pk), *document) for pk, *document in rows]
+            )
+
+    def match_clause(self):
+        return f"{self.table}.vector @@ to_tsquery('simple', %s)"
+
+    def match_expression(self, tokens):
+        return ' & '.join(f"{token}:*" for token in tokens)
+
+    def rank_clause(self):
+        return f"ts_rank_cd({self.table}.vector, to_tsquery('simple', %s)) DESC"
+
+    def rank_params(self, tokens):
+        return [self.match_expression(tokens)]
+
+
+def get_backend():
+    """محرك البحث المناسب لقاعدة البيانات الحالية"""
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return SQLiteSearchBackend()
+
+
+def index_requests(design_requests):
+    get_backend().index(list(design_requests))
+
+
+def remove_requests(request_ids):
+    get_backend().remove(list(request_ids))
+
+
+def search_requests(query, statuses=None, category_id=None, designer_id=None, limit=20, offset=0):
+    """
+    البحث في طلبات التصميم.
+
+    Returns DesignRequest objects in relevance order.
+    """
+    ids = get_backend().search_ids(
+        query,
+        statuses=statuses,
+        category_id=category_id,
+        designer_id=designer_id,
+        limit=limit,
+        offset=offset,
+    )
+    requests = DesignRequest.objects.for_listing().in_bulk(ids)
+    return [requests[pk] for pk in ids if pk in requests]
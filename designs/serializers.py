@@ -0,0 +1,40 @@
+"""
+Design request serializers
+محولات بيانات طلبات التصميم
+"""
+
+from rest_framework import serializers
+
+from designs.models import DesignRequest
+
+
+class DesignRequestListSerializer(serializers.ModelSerializer):
+    """
+    Row shape for request lists.
+
+    Only reads fields loaded by DesignRequestQuerySet.for_listing().
+    """
+    client = serializers.CharField(source='client.name')
+    category = serializers.CharField(source='category.name', default=None)
+    size = serializers.SerializerMethodField()
+    assigned_designer = serializers.CharField(source='assigned_designer.name', default=None)
+    review_rating = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DesignRequest
+        fields = [
+            'id', 'request_number', 'title', 'status', 'urgency', 'quality_level',
+            'total_price', 'created_at', 'due_date', 'delivered_at',
+            'client', 'category', 'size', 'assigned_designer', 'review_rating',
+        ]
+
+    def get_size(self, obj):
+        if obj.size is None:
+            return None
+        return {'name': obj.size.name, 'width': obj.size.width, 'height': obj.size.height}
+
+    def get_review_rating(self, obj):
+        try:
+            return obj.review.rating
+        except DesignRequest.review.RelatedObjectDoesNotExist:
+            return None
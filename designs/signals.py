@@ -0,0 +1,53 @@
+"""
+Signal handlers for the designs app
+معالجات الإشارات لتطبيق التصاميم
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import DesignerProfile, User
+from designs.catalog import CATALOG
+from designs.derivatives import image_sources_for
+from designs.search import INDEXED_FIELDS, index_requests, remove_requests
+from designs.models import (
+    Attachment,
+    DesignCategory,
+    DesignRequest,
+    DesignSize,
+    PriceSetting,
+)
+
+
+@receiver(post_save, sender=Attachment)
+@receiver(post_save, sender=DesignRequest)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=DesignerProfile)
+def queue_image_derivatives(sender, instance, update_fields=None, **kwargs):
+    """جدولة إنشاء نسخ الصور بعد حفظ الكائن"""
+    if update_fields and not {'file', 'final_designs', 'profile_image', 'portfolio_images'} & set(update_fields):
+        return
+
+    from designs.tasks import generate_image_derivatives
+
+    for name in image_sources_for(instance):
+        transaction.on_commit(lambda name=name: generate_image_derivatives.delay(name))
+
+
+# إبطال كتالوج الفئات بعد أي تعديل
+CATALOG.invalidate_on(DesignCategory, DesignSize, PriceSetting)
+
+
+@receiver(post_save, sender=DesignRequest)
+def index_design_request(sender, instance, update_fields=None, **kwargs):
+    """تحديث فهرس البحث عند تعديل نص الطلب"""
+    if update_fields and not INDEXED_FIELDS & set(update_fields):
+        return
+    transaction.on_commit(lambda: index_requests([instance]))
+
+
+@receiver(post_delete, sender=DesignRequest)
+def unindex_design_request(sender, instance, **kwargs):
+    """حذف الطلب من فهرس البحث"""
+    transaction.on_commit(lambda pk=instance.pk: remove_requests([pk]))
@@ -0,0 +1,14 @@
+"""
+Background tasks for the designs app
+المهام الخلفية لتطبيق التصاميم
+"""
+
+from celery import shared_task
+
+from designs import derivatives
+
+
+@shared_task(ignore_result=True)
+def generate_image_derivatives(source_name):
+    """إنشاء النسخ المصغرة والمحسّنة لصورة"""
+    derivatives.generate_derivatives(source_name)
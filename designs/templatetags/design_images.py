@@ -0,0 +1,26 @@
+from django import template
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from designs.derivatives import source_kind
+
+register = template.Library()
+
+
+@register.simple_tag
+def derivative(instance, variant='thumb', index=0):
+    """
+    رابط نسخة مصغرة من صورة كائن
+
+    Usage: ``<img src="{% derivative design_request 'thumb' %}">``; index
+    picks one image of objects that have several.
+    """
+    owner = source_kind(instance) if instance else None
+    if owner is None:
+        return ''
+    kind, object_id = owner
+    url = reverse(
+        'designs:image-derivative',
+        kwargs={'kind': kind, 'object_id': object_id, 'variant': variant},
+    )
+    return f"{url}?{urlencode({'index': index})}" if index else url
@@ -1,3 +1,479 @@
-from django.test import TestCase
+import base64
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from accounts.models import DesignerProfile
+from chat.models import Conversation, Message
+from designs import archive, catalog, search, uploads
+from designs.derivatives import generate_derivatives, get_derivative_url
+from designs.models import (
+    ArchivedDesignRequest,
+    Attachment,
+    ContentBlob,
+    DesignCategory,
+    DesignRequest,
+    DesignSize,
+    ImageDerivative,
+    PriceSetting,
+    Review,
+    UploadSession,
+)
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, CHUNKED_UPLOAD_DIR=f"{MEDIA_ROOT}/parts")
+class ChunkedUploadTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='client', email='client@example.com', password='x', name='Client'
+        )
+        category = DesignCategory.objects.create(name='Logos', slug='logos')
+        self.design_request = DesignRequest.objects.create(
+            client=self.user, title='Logo', description='...', category=category
+        )
+        self.content = b'\x89PNG\r\n\x1a\n' + b'x' * 1000
+
+    def upload(self, content, chunk_size=300):
+        session = uploads.create_session(self.user, 'ref.png', len(content))
+        for offset in range(0, len(content), chunk_size):
+            chunk = content[offset:offset + chunk_size]
+            uploads.append_chunk(session, io.BytesIO(chunk), offset, len(chunk))
+        return session
+
+    def test_upload_fills_metadata_from_stream(self):
+        session = self.upload(self.content)
+        attachment = uploads.attach_to_request(session, self.design_request, self.user)
+
+        self.assertEqual(attachment.file_size, len(self.content))
+        self.assertEqual(attachment.mime_type, 'image/png')
+        self.assertEqual(len(attachment.content_hash), 64)
+        with attachment.file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.content)
+
+    def test_out_of_order_chunk_reports_resume_offset(self):
+        session = uploads.create_session(self.user, 'ref.png', len(self.content))
+        uploads.append_chunk(session, io.BytesIO(self.content[:300]), 0, 300)
+
+        with self.assertRaises(uploads.UploadError) as ctx:
+            uploads.append_chunk(session, io.BytesIO(self.content[600:900]), 600, 300)
+        self.assertEqual(ctx.exception.expected_offset, 300)
+
+    def test_identical_uploads_share_one_blob(self):
+        first = uploads.attach_to_request(self.upload(self.content), self.design_request, self.user)
+        second = uploads.attach_to_request(
+            self.upload(self.content, chunk_size=512), self.design_request, self.user
+        )
+
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(ContentBlob.objects.count(), 1)
+
+    def test_finalizing_twice_returns_the_same_blob(self):
+        session = self.upload(self.content)
+        with self.captureOnCommitCallbacks(execute=True):
+            blob = uploads.finalize_session(session)
+        self.assertFalse(uploads.part_path(session).exists())
+
+        stale = UploadSession.objects.get(pk=session.pk)
+        stale.status = 'uploading'
+        self.assertEqual(uploads.finalize_session(stale), blob)
+        self.assertEqual(stale.status, 'complete')
+
+    def test_expired_session_cannot_be_completed(self):
+        session = self.upload(self.content)
+        UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(uploads.cleanup_expired_sessions(), 1)
+
+        api = APIClient()
+        api.force_authenticate(self.user)
+        response = api.post(
+            reverse('designs:upload-complete', args=[session.pk]), {'request_id': str(self.design_request.pk)}
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(ContentBlob.objects.exists())
+
+    def test_malformed_ids_are_rejected(self):
+        session = self.upload(self.content)
+        conversation = Conversation.objects.create()
+        conversation.participants.add(self.user)
+        api = APIClient()
+        api.force_authenticate(self.user)
+
+        response = api.post(
+            reverse('designs:upload-complete', args=[session.pk]), {'request_id': 'not-a-uuid'}
+        )
+        self.assertEqual(response.status_code, 400)
+        response = api.post(
+            reverse('chat:message-attachment', args=[conversation.pk]), {'upload_id': '42'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageDerivativeTests(TestCase):
+
+    def save_image(self, name, size=(2000, 1200)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, '#0EA5E9').save(buffer, 'JPEG')
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def test_variants_are_resized_and_cached(self):
+        name = self.save_image('finals/poster.jpg')
+        url = get_derivative_url(name, 'thumb')
+
+        derivative = ImageDerivative.objects.get(source_name=name, variant='thumb')
+        self.assertEqual(url, derivative.file.url)
+        self.assertLessEqual(max(derivative.width, derivative.height), 320)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_derivative_url(name, 'thumb'), url)
+
+    @mock.patch('designs.views.generate_image_derivatives.delay')
+    def test_view_checks_access_and_queues_missing_variants(self, delay):
+        cache.clear()
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', name='Owner')
+        other = User.objects.create_user(username='other', email='other@example.com', password='x', name='Other')
+        category = DesignCategory.objects.create(name='Cards', slug='cards')
+        design_request = DesignRequest.objects.create(
+            client=owner, title='Card', description='...', category=category,
+            final_designs=[self.save_image('finals/card.jpg')],
+        )
+        url = reverse('designs:image-derivative', args=['request', design_request.pk, 'thumb'])
+        api = APIClient()
+
+        self.assertIn(api.get(url).status_code, (401, 403))
+        api.force_authenticate(other)
+        self.assertEqual(api.get(url).status_code, 404)
+        api.force_authenticate(owner)
+        self.assertEqual(api.get(url).status_code, 202)
+        self.assertEqual(api.get(url).status_code, 202)
+        delay.assert_called_once_with(design_request.final_designs[0])
+
+        generate_derivatives(design_request.final_designs[0])
+        response = api.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(api.get(url, {'index': 1}).status_code, 404)
+
+    def test_template_tag_links_through_the_owning_object(self):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='x', name='Owner')
+        category = DesignCategory.objects.create(name='Cards', slug='cards')
+        design_request = DesignRequest.objects.create(
+            client=owner, title='Card', description='...', category=category,
+        )
+        rendered = Template(
+            "{% load design_images %}{% derivative design_request 'thumb' %}|{% derivative design_request 'web' 1 %}"
+        ).render(Context({'design_request': design_request}))
+
+        self.assertEqual(rendered.split('|'), [
+            reverse('designs:image-derivative', args=['request', design_request.pk, 'thumb']),
+            reverse('designs:image-derivative', args=['request', design_request.pk, 'web']) + '?index=1',
+        ])
+
+    def test_identical_sources_share_rendered_files(self):
+        first = generate_derivatives(self.save_image('finals/a.jpg'))
+        second = generate_derivatives(self.save_image('finals/b.jpg'))
+
+        self.assertEqual(
+            sorted(d.file.name for d in first),
+            sorted(d.file.name for d in second)
+        )
+
+
+class CategoryTreeTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.print_category = DesignCategory.objects.create(name='Print', slug='print')
+        self.cards = DesignCategory.objects.create(
+            name='Cards', slug='cards', parent=self.print_category
+        )
+        self.business = DesignCategory.objects.create(
+            name='Business', slug='business', parent=self.cards
+        )
+        DesignSize.objects.create(name='A4', width=2480, height=3508, category=self.cards)
+        PriceSetting.objects.create(category=self.cards, base_price=75000)
+
+    def test_paths_follow_reparenting(self):
+        social = DesignCategory.objects.create(name='Social', slug='social')
+        self.cards.parent = social
+        self.cards.save()
+
+        self.business.refresh_from_db()
+        self.assertTrue(self.business.path.startswith(social.path))
+        self.assertEqual(self.business.depth, 2)
+        self.assertEqual(list(social.get_descendants()), [self.cards, self.business])
+
+    def test_category_cannot_become_its_own_descendant(self):
+        self.print_category.parent = self.business
+        with self.assertRaises(ValidationError):
+            self.print_category.full_clean()
+        with self.assertRaises(ValidationError) as ctx:
+            self.print_category.save()
+        self.assertIn('parent', ctx.exception.message_dict)
+
+    def test_home_page_lists_the_catalog(self):
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Print')
+        self.assertContains(response, 'Cards')
+
+    def test_warm_catalog_needs_no_queries(self):
+        tree = catalog.get_catalog()
+        self.assertEqual(tree[0]['children'][0]['sizes'][0]['name'], 'A4')
+        self.assertEqual(tree[0]['children'][0]['pricing']['base_price'], '75000.00')
+
+        with self.assertNumQueries(0):
+            catalog.get_catalog()
+
+    def test_changes_invalidate_catalog(self):
+        catalog.get_catalog()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cards.is_active = False
+            self.cards.save()
+
+        self.assertEqual(catalog.get_catalog()[0]['children'], [])
+
+
+class DesignRequestSearchTests(TestCase):
+
+    def setUp(self):
+        self.client_user = User.objects.create_user(
+            username='teacher', email='teacher@example.com', password='x', name='Teacher'
+        )
+        self.designer = User.objects.create_user(
+            username='designer', email='designer@example.com', password='x',
+            name='Designer', role='DESIGNER'
+        )
+        self.logos = DesignCategory.objects.create(name='Logos', slug='logos')
+        self.posters = DesignCategory.objects.create(name='Posters', slug='posters')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.school_logo = DesignRequest.objects.create(
+                client=self.client_user, category=self.logos,
+                title='شِعار مدرسة النور', description='تصميم بالأزرق',
+                assigned_designer=self.designer, status='IN_PROGRESS',
+            )
+            self.poster = DesignRequest.objects.create(
+                client=self.client_user, category=self.posters,
+                title='إعلان مطعم', description='بوستر المدرسة للفنون',
+            )
+
+    def test_normalization_unifies_spelling_variants(self):
+        self.assertEqual(search.normalize_arabic('إِعْلانٌ'), search.normalize_arabic('اعلان'))
+        self.assertEqual(search.normalize_arabic('مدرســـة'), 'مدرسه')
+        self.assertEqual(search.normalize_arabic('مستشفى'), 'مستشفي')
+
+    def test_search_matches_variants_and_ranks_titles_first(self):
+        results = search.search_requests('مدرسه')
+        self.assertEqual(results, [self.school_logo, self.poster])
+        self.assertEqual(search.search_requests('اعلان'), [self.poster])
+
+    def test_filters_and_index_updates(self):
+        self.assertEqual(
+            search.search_requests('مدرسة', category_id=self.posters.pk), [self.poster]
+        )
+        self.assertEqual(
+            search.search_requests('مدرسة', designer_id=self.designer.pk), [self.school_logo]
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.poster.title = 'غلاف كتاب'
+            self.poster.description = ''
+            self.poster.save()
+            self.school_logo.delete()
+
+        self.assertEqual(search.search_requests('مدرسة'), [])
+        self.assertEqual(search.search_requests('غلاف'), [self.poster])
+
+    def test_view_rejects_malformed_filters(self):
+        manager = User.objects.create(
+            username='manager', email='manager@example.com', name='Manager', role='MANAGER'
+        )
+        api = APIClient()
+        api.force_authenticate(manager)
+        url = reverse('designs:search')
+        for params in ({'designer': 'nobody'}, {'category': 'posters'}):
+            self.assertEqual(api.get(url, {'q': 'مدرسة', **params}).status_code, 400)
+        response = api.get(url, {'q': 'مدرسة', 'category': self.posters.pk})
+        self.assertEqual([row['id'] for row in response.data['results']], [str(self.poster.pk)])
+
+
+class WorkQueueTests(TestCase):
+
+    def setUp(self):
+        self.api = APIClient()
+        self.designer = User.objects.create_user(
+            username='designer', email='designer@example.com', password='x',
+            name='Designer', role='DESIGNER'
+        )
+        category = DesignCategory.objects.create(name='Posters', slug='posters')
+        size = DesignSize.objects.create(name='A4', width=2480, height=3508, category=category)
+        statuses = ['IN_PROGRESS', 'REVIEWING', 'DELIVERED']
+        for i in range(30):
+            client = User.objects.create(
+                username=f'client{i}', email=f'client{i}@example.com', name=f'Client {i}'
+            )
+            design_request = DesignRequest.objects.create(
+                client=client, title=f'Poster {i}', description='...', category=category,
+                size=size, assigned_designer=self.designer, status=statuses[i % 3],
+            )
+            if i % 3 == 2:
+                Review.objects.create(
+                    request=design_request, designer=self.designer, client=client, rating=5
+                )
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        self.api.force_authenticate(self.designer)
+        url = reverse('designs:assigned-work')
+
+        for page_size in (5, 25):
+            with self.assertNumQueries(2):
+                response = self.api.get(url, {'page_size': page_size})
+            self.assertEqual(len(response.data['results']), page_size)
+
+        self.assertEqual(response.data['counts']['DELIVERED'], 10)
+        self.assertEqual(response.data['counts']['RECEIVED'], 0)
+
+    def test_cursor_walks_every_row_once(self):
+        self.api.force_authenticate(self.designer)
+        url = reverse('designs:assigned-work')
+
+        seen, cursor = [], None
+        while True:
+            params = {'page_size': 7}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.api.get(url, params).data
+            seen.extend(row['id'] for row in data['results'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(len(seen), 30)
+        self.assertEqual(len(set(seen)), 30)
+
+    def test_malformed_cursor_is_rejected(self):
+        self.api.force_authenticate(self.designer)
+        url = reverse('designs:assigned-work')
+        cursor = base64.urlsafe_b64encode(f"{timezone.now().isoformat()}|1 OR 1=1".encode()).decode()
+        for value in (cursor, 'not-base64!'):
+            self.assertEqual(self.api.get(url, {'cursor': value}).status_code, 400)
+
+    def test_clients_cannot_open_the_work_queue(self):
+        client = User.objects.get(username='client0')
+        self.api.force_authenticate(client)
+        self.assertEqual(self.api.get(reverse('designs:assigned-work')).status_code, 403)
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        self.api = APIClient()
+        self.client_user = User.objects.create(
+            username='client', email='client@example.com', name='Client'
+        )
+        self.designer = User.objects.create(
+            username='designer', email='designer@example.com', name='Designer', role='DESIGNER'
+        )
+        self.old = DesignRequest.objects.create(
+            client=self.client_user, assigned_designer=self.designer,
+            title='Old poster', description='...', status='DELIVERED',
+        )
+        self.recent = DesignRequest.objects.create(
+            client=self.client_user, title='Recent poster', description='...', status='DELIVERED',
+        )
+        self.open = DesignRequest.objects.create(
+            client=self.client_user, title='Open poster', description='...', status='IN_PROGRESS',
+        )
+        DesignRequest.objects.filter(pk__in=[self.old.pk, self.open.pk]).update(
+            updated_at=timezone.now() - timedelta(days=400)
+        )
+
+        Attachment.objects.create(
+            request=self.old, type='final', file='designs/final.png',
+            original_name='final.png', file_size=10, uploaded_by=self.designer,
+        )
+        Review.objects.create(
+            request=self.old, designer=self.designer, client=self.client_user, rating=4
+        )
+        conversation = Conversation.objects.create(design_request=self.old)
+        conversation.participants.add(self.client_user, self.designer)
+        Message.objects.create(conversation=conversation, sender=self.client_user, content='شكراً')
+
+    def test_moves_only_old_finished_requests(self):
+        self.assertEqual(archive.archive_requests(older_than_days=180, batch_size=1), 1)
+
+        self.assertFalse(DesignRequest.objects.filter(pk=self.old.pk).exists())
+        self.assertTrue(DesignRequest.objects.filter(pk=self.recent.pk).exists())
+        self.assertTrue(DesignRequest.objects.filter(pk=self.open.pk).exists())
+        self.assertFalse(Conversation.objects.exists())
+        self.assertFalse(Message.objects.exists())
+
+        archived = ArchivedDesignRequest.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.request_number, self.old.request_number)
+        document = archive.decode_payload(archived.payload)
+        self.assertEqual(document['request']['title'], 'Old poster')
+        self.assertEqual(document['attachments'][0]['original_name'], 'final.png')
+        self.assertEqual(document['review']['rating'], 4)
+        self.assertEqual(document['conversations'][0]['messages'][0]['content'], 'شكراً')
+
+    def test_batch_skips_requests_reopened_since_selection(self):
+        ids = list(archive.archive_candidates(older_than_days=180).values_list('pk', flat=True))
+        DesignRequest.objects.filter(pk=self.old.pk).update(status='IN_PROGRESS')
+
+        self.assertEqual(archive.archive_batch(ids), 0)
+        self.assertTrue(DesignRequest.objects.filter(pk=self.old.pk).exists())
+        self.assertFalse(ArchivedDesignRequest.objects.exists())
+
+    def test_archiving_keeps_reviews_and_ratings(self):
+        profile = DesignerProfile.objects.create(user=self.designer)
+        profile.calculate_rating()
+        self.assertEqual(profile.rating, 4)
+
+        archive.archive_requests(older_than_days=180)
+
+        review = Review.objects.get(designer=self.designer)
+        self.assertIsNone(review.request_id)
+        self.assertIn('مؤرشف', str(review))
+        profile.calculate_rating()
+        profile.refresh_from_db()
+        self.assertEqual(profile.rating, 4)
+
+    def test_detail_reads_through_to_the_archive(self):
+        url = reverse('designs:request-detail', args=[self.old.pk])
+        self.api.force_authenticate(self.client_user)
+        live = self.api.get(url).data
+        self.assertFalse(live['is_archived'])
+
+        archive.archive_requests(older_than_days=180)
+
+        response = self.api.get(url, {'conversations': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_archived'])
+        self.assertEqual(response.data['request'], live['request'])
+        self.assertEqual(len(response.data['conversations']), 1)
+
+        stranger = User.objects.create(username='x', email='x@example.com', name='X')
+        self.api.force_authenticate(stranger)
+        self.assertEqual(self.api.get(url).status_code, 404)
@@ -0,0 +1,277 @@
+"""
+Chunked, resumable uploads with content-addressed storage
+الرفع المجزأ القابل للاستكمال مع التخزين حسب بصمة المحتوى
+
+Chunks are appended to a part file on local disk, so a request never holds
+more than one read buffer in memory. The SHA-256 of the content is computed
+while the chunks stream in; once the upload is complete the file is moved
+into storage under its hash, and identical files share a single copy.
+"""
+
+import fcntl
+import hashlib
+import mimetypes
+import os
+from collections import OrderedDict
+from datetime import timedelta
+from pathlib import Path
+from threading import Lock
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from designs.models import Attachment, ContentBlob, UploadSession
+
+
+READ_BUFFER_SIZE = 64 * 1024
+
+# Magic numbers for the file types clients actually send us
+MAGIC_NUMBERS = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'%PDF', 'application/pdf'),
+    (b'8BPS', 'image/vnd.adobe.photoshop'),
+    (b'PK\x03\x04', 'application/zip'),
+]
+
+# Hashers for in-flight uploads, keyed by session id. A hasher is only reused
+# when its offset matches the part file, so a session resumed on another
+# worker simply falls back to hashing the assembled file once.
+_MAX_TRACKED_HASHERS = 256
+_hashers = OrderedDict()
+_hashers_lock = Lock()
+
+
+class UploadError(Exception):
+    """خطأ في عملية الرفع"""
+
+    def __init__(self, message, expected_offset=None):
+        super().__init__(message)
+        self.expected_offset = expected_offset
+
+
+def _upload_dir():
+    path = Path(settings.CHUNKED_UPLOAD_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def part_path(session):
+    """مسار الملف المؤقت للجلسة"""
+    return _upload_dir() / f"{session.id}.part"
+
+
+def sniff_mime_type(header, filename=''):
+    """تحديد نوع الملف من أول البايتات ثم من الامتداد"""
+    for magic, mime_type in MAGIC_NUMBERS:
+        if header.startswith(magic):
+            return mime_type
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'image/webp'
+    guessed, _ = mimetypes.guess_type(filename)
+    return guessed or 'application/octet-stream'
+
+
+def blob_name(sha256, mime_type):
+    """اسم الملف في التخزين بناءً على البصمة"""
+    extension = mimetypes.guess_extension(mime_type) or ''
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+
+
+def create_session(user, filename, total_size):
+    """إنشاء جلسة رفع جديدة"""
+    if total_size <= 0:
+        raise UploadError("حجم الملف غير صالح")
+    if total_size > settings.CHUNKED_UPLOAD_MAX_FILE_SIZE:
+        raise UploadError("حجم الملف يتجاوز الحد المسموح")
+
+    return UploadSession.objects.create(
+        user=user,
+        filename=os.path.basename(filename)[:255],
+        total_size=total_size,
+    )
+
+
+def _take_hasher(session_id, offset):
+    with _hashers_lock:
+        entry = _hashers.pop(session_id, None)
+    if entry and entry[0] == offset:
+        return entry[1]
+    return None
+
+
+def _keep_hasher(session_id, offset, hasher):
+    with _hashers_lock:
+        _hashers[session_id] = (offset, hasher)
+        while len(_hashers) > _MAX_TRACKED_HASHERS:
+            _hashers.popitem(last=False)
+
+
+def append_chunk(session, stream, offset, length):
+    """
+    إلحاق جزء بالملف المؤقت.
+
+    The part file on disk is the source of truth for the resume offset; it is
+    locked while the chunk is written so two retries of the same chunk cannot
+    interleave.
+    """
+    if session.status != 'uploading':
+        raise UploadError("جلسة الرفع غير نشطة")
+    if length <= 0 or length > settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError("حجم الجزء غير صالح")
+    if offset + length > session.total_size:
+        raise UploadError("الجزء يتجاوز حجم الملف", expected_offset=session.received_size)
+
+    with open(part_path(session), 'a+b') as part:
+        fcntl.flock(part, fcntl.LOCK_EX)
+        try:
+            current_size = part.seek(0, os.SEEK_END)
+            if offset != current_size:
+                raise UploadError("موضع الجزء غير متوقع", expected_offset=current_size)
+
+            hasher = _take_hasher(session.id, offset)
+            if hasher is None and offset == 0:
+                hasher = hashlib.sha256()
+
+            remaining = length
+            while remaining:
+                buffer = stream.read(min(READ_BUFFER_SIZE, remaining))
+                if not buffer:
+                    break
+                part.write(buffer)
+                if hasher is not None:
+                    hasher.update(buffer)
+                remaining -= len(buffer)
+
+            if remaining:
+                # The client disconnected mid-chunk: drop the partial write
+                part.truncate(offset)
+                raise UploadError("الجزء غير مكتمل", expected_offset=offset)
+
+            part.flush()
+            received = offset + length
+        finally:
+            fcntl.flock(part, fcntl.LOCK_UN)
+
+    if hasher is not None:
+        _keep_hasher(session.id, received, hasher)
+
+    UploadSession.objects.filter(pk=session.pk).update(
+        received_size=received,
+        updated_at=timezone.now(),
+    )
+    session.received_size = received
+    return session
+
+
+def _hash_file(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for buffer in iter(lambda: source.read(READ_BUFFER_SIZE), b''):
+            hasher.update(buffer)
+    return hasher
+
+
+def finalize_session(session):
+    """
+    إنهاء الرفع ونقل الملف إلى التخزين.
+
+    Returns the ContentBlob for the uploaded content, reusing an existing one
+    when the same bytes were uploaded before. The session row is locked, so
+    of two concurrent calls the second waits and returns the first's blob.
+    """
+    with transaction.atomic():
+        locked = UploadSession.objects.select_for_update().select_related('blob').get(pk=session.pk)
+        if locked.status == 'complete' and locked.blob_id:
+            session.status, session.blob = locked.status, locked.blob
+            return locked.blob
+        if locked.status != 'uploading':
+            # Expired: the cleanup task has already removed the part file
+            raise UploadError("جلسة الرفع غير نشطة")
+        if not locked.is_complete:
+            raise UploadError("الرفع غير مكتمل", expected_offset=locked.received_size)
+
+        path = part_path(locked)
+        hasher = _take_hasher(locked.id, locked.total_size) or _hash_file(path)
+        sha256 = hasher.hexdigest()
+
+        blob = ContentBlob.objects.filter(sha256=sha256).first()
+        if blob is None:
+            with open(path, 'rb') as source:
+                mime_type = sniff_mime_type(source.read(16), locked.filename)
+                source.seek(0)
+                name = blob_name(sha256, mime_type)
+                if not default_storage.exists(name):
+                    name = default_storage.save(name, File(source))
+
+            try:
+                with transaction.atomic():
+                    blob = ContentBlob.objects.create(
+                        sha256=sha256,
+                        file=name,
+                        size=locked.total_size,
+                        mime_type=mime_type,
+                    )
+            except IntegrityError:
+                # Another worker stored the same content first
+                blob = ContentBlob.objects.get(sha256=sha256)
+
+        locked.status = 'complete'
+        locked.blob = blob
+        locked.save(update_fields=['status', 'blob', 'updated_at'])
+        # Only once the session is committed as complete
+        transaction.on_commit(lambda: path.unlink(missing_ok=True))
+    session.status, session.blob = locked.status, blob
+    return blob
+
+
+def attach_to_request(session, design_request, user, type='reference', description=''):
+    """إنشاء مرفق لطلب تصميم من جلسة رفع مكتملة"""
+    blob = finalize_session(session)
+    return Attachment.objects.create(
+        request=design_request,
+        type=type,
+        file=blob.file.name,
+        original_name=session.filename,
+        file_size=blob.size,
+        mime_type=blob.mime_type,
+        content_hash=blob.sha256,
+        uploaded_by=user,
+        description=description,
+    )
+
+
+def attach_to_message(session, conversation, sender, content=''):
+    """إنشاء رسالة مع مرفق من جلسة رفع مكتملة"""
+    from chat.models import Message
+
+    blob = finalize_session(session)
+    return Message.objects.create(
+        conversation=conversation,
+        sender=sender,
+        message_type='image' if blob.mime_type.startswith('image/') else 'file',
+        content=content or session.filename,
+        attachment=blob.file.name,
+        attachment_name=session.filename,
+        attachment_size=blob.size,
+        attachment_hash=blob.sha256,
+    )
+
+
+def cleanup_expired_sessions():
+    """حذف جلسات الرفع المتروكة وملفاتها المؤقتة"""
+    cutoff = timezone.now() - timedelta(hours=settings.CHUNKED_UPLOAD_EXPIRY_HOURS)
+    expired = UploadSession.objects.filter(status='uploading', updated_at__lt=cutoff)
+    count = 0
+    for session in expired.iterator():
+        part_path(session).unlink(missing_ok=True)
+        with _hashers_lock:
+            _hashers.pop(session.id, None)
+        count += 1
+    expired.update(status='expired')
+    return count
@@ -4,5 +4,16 @@ from . import views
 app_name = 'designs'
 
 urlpatterns = [
-    # API endpoints will be added here
-]
\ No newline at end of file
+    path('catalog/', views.CatalogView.as_view(), name='catalog'),
+    path('my-work/', views.AssignedWorkView.as_view(), name='assigned-work'),
+    path('requests/<uuid:request_id>/', views.DesignRequestDetailView.as_view(), name='request-detail'),
+    path('search/', views.DesignRequestSearchView.as_view(), name='search'),
+    path('uploads/', views.UploadSessionCreateView.as_view(), name='upload-create'),
+    path('uploads/<uuid:session_id>/', views.UploadSessionDetailView.as_view(), name='upload-detail'),
+    path('uploads/<uuid:session_id>/complete/', views.UploadCompleteView.as_view(), name='upload-complete'),
+    path(
+        'images/<slug:kind>/<uuid:object_id>/<slug:variant>/',
+        views.ImageDerivativeView.as_view(),
+        name='image-derivative',
+    ),
+]
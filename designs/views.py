@@ -1,3 +1,299 @@
-from django.shortcuts import render
+"""
+Design request API views
+واجهات برمجة طلبات التصميم
+"""
 
-# Create your views here.
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.views.generic import TemplateView
+from rest_framework import status
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.permissions import IsDesigner, IsDesignerOrManager
+from designs import archive, catalog, derivatives, search, uploads
+from designs.models import Attachment, DesignRequest, UploadSession
+from designs.pagination import InvalidCursor, keyset_page
+from designs.serializers import DesignRequestListSerializer
+from designs.tasks import generate_image_derivatives
+
+
+def serialize_upload_session(session):
+    return {
+        'id': str(session.id),
+        'filename': session.filename,
+        'total_size': session.total_size,
+        'offset': session.received_size,
+        'status': session.status,
+    }
+
+
+class UploadSessionCreateView(APIView):
+    """Start a chunked upload"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            total_size = int(request.data.get('total_size', 0))
+        except (TypeError, ValueError):
+            total_size = 0
+
+        try:
+            session = uploads.create_session(
+                request.user,
+                request.data.get('filename', ''),
+                total_size,
+            )
+        except uploads.UploadError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serialize_upload_session(session)
+        data['chunk_size'] = settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailView(APIView):
+    """
+    GET returns the resume offset; PUT appends one raw chunk.
+
+    Chunks are sent as the raw request body with an ``Upload-Offset`` header
+    and are streamed straight to disk.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_session(self, request, session_id):
+        return get_object_or_404(UploadSession, id=session_id, user=request.user)
+
+    def get(self, request, session_id):
+        session = self.get_session(request, session_id)
+        return Response(serialize_upload_session(session))
+
+    def put(self, request, session_id):
+        session = self.get_session(request, session_id)
+        try:
+            offset = int(request.META.get('HTTP_UPLOAD_OFFSET', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response(
+                {'detail': 'Upload-Offset header is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            uploads.append_chunk(session, request.stream, offset, length)
+        except uploads.UploadError as exc:
+            return Response(
+                {'detail': str(exc), 'offset': exc.expected_offset},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(serialize_upload_session(session))
+
+
+class UploadCompleteView(APIView):
+    """Finish an upload and attach it to a design request"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, session_id):
+        session = get_object_or_404(UploadSession, id=session_id, user=request.user)
+        try:
+            request_id = uuid.UUID(str(request.data.get('request_id')))
+        except ValueError:
+            return Response({'detail': 'request_id must be a UUID'}, status=status.HTTP_400_BAD_REQUEST)
+        design_request = get_object_or_404(DesignRequest, id=request_id)
+        if not design_request.is_accessible_by(request.user):
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        attachment_type = request.data.get('type', 'reference')
+        if attachment_type not in dict(Attachment.ATTACHMENT_TYPE_CHOICES):
+            return Response({'detail': 'Invalid attachment type'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            attachment = uploads.attach_to_request(
+                session,
+                design_request,
+                request.user,
+                type=attachment_type,
+                description=request.data.get('description', ''),
+            )
+        except uploads.UploadError as exc:
+            return Response(
+                {'detail': str(exc), 'offset': exc.expected_offset},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response({
+            'id': str(attachment.id),
+            'url': attachment.file.url,
+            'original_name': attachment.original_name,
+            'file_size': attachment.file_size,
+            'mime_type': attachment.mime_type,
+            'content_hash': attachment.content_hash,
+        }, status=status.HTTP_201_CREATED)
+
+
+class ImageDerivativeView(APIView):
+    """
+    Redirect to a resized copy of an object's image.
+
+    ?index picks one image of objects that have several. A missing variant
+    is queued for rendering and answered with 202; retry shortly.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, kind, object_id, variant):
+        try:
+            index = int(request.query_params.get('index', 0))
+        except ValueError:
+            return Response({'detail': 'معاملات غير صالحة'}, status=status.HTTP_400_BAD_REQUEST)
+        if variant not in settings.IMAGE_DERIVATIVE_VARIANTS:
+            raise Http404
+        source = derivatives.resolve_source(kind, object_id, index, request.user)
+        if source is None:
+            raise Http404
+
+        url = derivatives.get_derivative_url(source, variant, generate=False)
+        if url is None:
+            if not default_storage.exists(source):
+                raise Http404
+            # Polling clients would otherwise queue the job on every retry
+            if cache.add(derivatives.queue_key(kind, object_id, index, variant), 1, derivatives.QUEUED_TIMEOUT):
+                generate_image_derivatives.delay(source)
+            response = Response({'detail': 'جاري تجهيز الصورة'}, status=status.HTTP_202_ACCEPTED)
+            response['Retry-After'] = '5'
+            return response
+        response = redirect(url)
+        # Not public: the image may be private to the request's parties
+        response['Cache-Control'] = 'private, max-age=86400'
+        return response
+
+
+class HomeView(TemplateView):
+    """Home page with the design catalog"""
+    template_name = 'home.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['catalog'] = catalog.get_catalog()
+        return context
+
+
+class CatalogView(APIView):
+    """Full active category tree with sizes and pricing"""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        # Served as the cached JSON bytes, skipping re-serialization
+        return HttpResponse(catalog.get_catalog_json(), content_type='application/json')
+
+
+class DesignRequestDetailView(APIView):
+    """
+    Request detail with attachments and review.
+
+    Reads through to the cold archive, so archived requests keep working
+    links; ?conversations=1 also returns the linked chat history.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, request_id):
+        document, record = archive.get_request_detail(
+            request_id,
+            include_conversations=request.query_params.get('conversations') == '1',
+        )
+        if record is None or not record.is_accessible_by(request.user):
+            raise Http404
+        return Response(document)
+
+
+class DesignRequestSearchView(APIView):
+    """
+    Ranked full-text search over design requests.
+
+    Designers only search the requests assigned to them.
+    """
+    permission_classes = [IsDesignerOrManager]
+    page_size = 20
+
+    def get(self, request):
+        params = request.query_params
+        statuses = [s for s in params.get('status', '').split(',') if s]
+        try:
+            designer_id = uuid.UUID(params['designer']) if params.get('designer') else None
+            category_id = int(params['category']) if params.get('category') else None
+        except ValueError:
+            return Response({'detail': 'معاملات غير صالحة'}, status=status.HTTP_400_BAD_REQUEST)
+        if not request.user.is_manager:
+            designer_id = request.user.pk
+
+        try:
+            page = max(int(params.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+
+        results = search.search_requests(
+            params.get('q', ''),
+            statuses=statuses,
+            category_id=category_id,
+            designer_id=designer_id,
+            limit=self.page_size,
+            offset=(page - 1) * self.page_size,
+        )
+
+        return Response({
+            'page': page,
+            'results': DesignRequestListSerializer(results, many=True).data,
+        })
+
+
+class DesignRequestListView(APIView):
+    """
+    Base for "my requests" style lists.
+
+    Returns one keyset page plus per-status counts, in two queries whatever
+    the page size.
+    """
+    permission_classes = [IsAuthenticated]
+    default_page_size = 20
+    max_page_size = 100
+
+    def get_queryset(self, request):
+        raise NotImplementedError
+
+    def get(self, request):
+        base = self.get_queryset(request)
+        rows = base.for_listing()
+
+        status_filter = request.query_params.get('status')
+        if status_filter:
+            rows = rows.filter(status__in=status_filter.split(','))
+
+        try:
+            page_size = int(request.query_params.get('page_size', self.default_page_size))
+        except ValueError:
+            page_size = self.default_page_size
+        page_size = min(max(page_size, 1), self.max_page_size)
+
+        try:
+            page, next_cursor = keyset_page(rows, request.query_params.get('cursor'), page_size)
+        except InvalidCursor:
+            return Response({'detail': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'results': DesignRequestListSerializer(page, many=True).data,
+            'next_cursor': next_cursor,
+            'counts': base.status_counts(),
+        })
+
+
+class AssignedWorkView(DesignRequestListView):
+    """Designer work queue"""
+    permission_classes = [IsDesigner]
+
+    def get_queryset(self, request):
+        return DesignRequest.objects.assigned_to(request.user)
@@ -0,0 +1,289 @@
+"""
+Wheel prize analytics
+تحليلات جوائز عجلة الحظ
+
+Every spin adds one to its (wheel, local day, segment) counter in
+WheelPrizeRollup, and every claim adds to the claim count and claimed value
+of the day the spin happened, in the same transaction as the spin or claim.
+Reports and the drift check read only these rollups. rebuild_rollups()
+recomputes them from WheelSpin for backfills and repairs.
+
+Drift is tested with Pearson's chi-square against the wheel's current
+segment weights; the p-value comes from the regularized incomplete gamma
+function, so no statistics package is needed.
+"""
+
+import logging
+import math
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from games.models import WheelOfFortune, WheelPrizeRollup, WheelSpin
+from skydesign.db import upsert_counter
+
+logger = logging.getLogger(__name__)
+
+UNIQUE_FIELDS = ['wheel', 'date', 'segment_id', 'prize_type']
+
+# Pearson's test is unreliable when a segment expects fewer spins than this
+MIN_EXPECTED = 5
+
+
+def segment_key(result):
+    """معرف القطاع من نتيجة الدورة (أو نصه إن لم يكن له معرف)"""
+    if not isinstance(result, dict):
+        return ''
+    key = result.get('id')
+    return str(result.get('text', '') if key is None else key)[:50]
+
+
+def prize_amount(value):
+    """قيمة الجائزة كرقم (صفر إن لم تكن رقمية)"""
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return Decimal('0')
+    return amount if amount.is_finite() else Decimal('0')
+
+
+def _row(spin, spins=0, claims=0, claimed_value=Decimal('0')):
+    return {
+        'wheel': spin.wheel_id,
+        'date': timezone.localtime(spin.spin_date).date(),
+        'segment_id': segment_key(spin.result),
+        'prize_type': spin.prize_type,
+        'spins': spins,
+        'claims': claims,
+        'claimed_value': claimed_value,
+    }
+
+
+def record_spin(spin):
+    """إضافة دورة إلى مجاميع يومها"""
+    upsert_counter(
+        WheelPrizeRollup, [_row(spin, spins=1)],
+        unique_fields=UNIQUE_FIELDS, increment_fields=['spins'],
+    )
+
+
+def record_claim(spin):
+    """إضافة استلام جائزة إلى مجاميع يوم الدورة"""
+    upsert_counter(
+        WheelPrizeRollup, [_row(spin, claims=1, claimed_value=prize_amount(spin.prize_value))],
+        unique_fields=UNIQUE_FIELDS, increment_fields=['claims', 'claimed_value'],
+    )
+
+
+def rebuild_rollups(wheel_ids=None, batch_size=2000):
+    """
+    إعادة بناء المجاميع من سجل الدورات.
+
+    Streams the spins once and aggregates in memory by rollup key (a few
+    rows per wheel and day). Returns the number of rollup rows written.
+    """
+    spins = WheelSpin.objects.order_by()
+    rollups = WheelPrizeRollup.objects.all()
+    if wheel_ids is not None:
+        spins = spins.filter(wheel_id__in=wheel_ids)
+        rollups = rollups.filter(wheel_id__in=wheel_ids)
+
+    totals = defaultdict(lambda: [0, 0, Decimal('0')])
+    columns = ('wheel_id', 'spin_date', 'result', 'prize_type', 'prize_value', 'prize_claimed')
+    for wheel_id, spin_date, result, prize_type, prize_value, claimed in (
+        spins.values_list(*columns).iterator(chunk_size=batch_size)
+    ):
+        key = (wheel_id, timezone.localtime(spin_date).date(), segment_key(result), prize_type)
+        counters = totals[key]
+        counters[0] += 1
+        if claimed:
+            counters[1] += 1
+            counters[2] += prize_amount(prize_value)
+
+    with transaction.atomic():
+        rollups.delete()
+        WheelPrizeRollup.objects.bulk_create(
+            [
+                WheelPrizeRollup(
+                    wheel_id=wheel_id, date=day, segment_id=segment_id, prize_type=prize_type,
+                    spins=spins_count, claims=claims, claimed_value=value,
+                )
+                for (wheel_id, day, segment_id, prize_type), (spins_count, claims, value) in totals.items()
+            ],
+            batch_size=1000,
+        )
+    return len(totals)
+
+
+def chi_square_sf(statistic, df):
+    """
+    احتمال تجاوز قيمة كاي تربيع (القيمة الاحتمالية).
+
+    Q(df/2, x/2), by series below a + 1 and by continued fraction above
+    (Numerical Recipes, gammq).
+    """
+    if statistic <= 0:
+        return 1.0
+    a, x = df / 2, statistic / 2
+    log_prefix = -x + a * math.log(x) - math.lgamma(a)
+
+    if x < a + 1:
+        term = total = 1 / a
+        n = a
+        for _ in range(1000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1 - total * math.exp(log_prefix))
+
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = 1 / (d if abs(d) > tiny else tiny)
+        c = b + an / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, math.exp(log_prefix) * h)
+
+
+def chi_square(observed, weights):
+    """
+    اختبار مطابقة التوزيع للأوزان.
+
+    Returns (statistic, df, p_value); p_value is None when there are too few
+    spins for the test to mean anything.
+    """
+    total = sum(observed)
+    weight_sum = sum(weights)
+    if len(observed) < 2 or not total or weight_sum <= 0:
+        return None, 0, None
+    expected = [total * w / weight_sum for w in weights]
+    # Zero-weight segments can never come up and carry no degrees of freedom
+    cells = [(o, e) for o, e in zip(observed, expected) if e > 0]
+    statistic = sum((o - e) ** 2 / e for o, e in cells)
+    df = len(cells) - 1
+    if df < 1 or min(e for _, e in cells) < MIN_EXPECTED:
+        return statistic, df, None
+    return statistic, df, chi_square_sf(statistic, df)
+
+
+def distribution(wheel, date_from, date_to):
+    """
+    توزيع الجوائز الفعلي مقابل المتوقع لفترة.
+
+    Segment counts are compared with the wheel's current weights, so a
+    window that spans an edit of the segments should be read with care.
+    """
+    rows = (
+        WheelPrizeRollup.objects.filter(wheel=wheel, date__gte=date_from, date__lte=date_to)
+        .values('segment_id', 'prize_type')
+        .annotate(spins=Sum('spins'), claims=Sum('claims'), claimed_value=Sum('claimed_value'))
+    )
+    observed = defaultdict(int)
+    by_prize = defaultdict(lambda: {'spins': 0, 'claims': 0, 'claimed_value': Decimal('0')})
+    for row in rows:
+        observed[row['segment_id']] += row['spins']
+        prize = by_prize[row['prize_type']]
+        prize['spins'] += row['spins']
+        prize['claims'] += row['claims']
+        prize['claimed_value'] += Decimal(row['claimed_value'] or 0)
+
+    total = sum(observed.values())
+    weights = [segment.get('weight', 1) for segment in wheel.segments]
+    weight_sum = sum(weights) or 1
+    segments = []
+    for segment, weight in zip(wheel.segments, weights):
+        key = segment_key(segment)
+        segments.append({
+            'segment_id': key,
+            'text': segment.get('text', ''),
+            'prize_type': segment.get('prize_type', 'nothing'),
+            'weight': weight,
+            'observed': observed.get(key, 0),
+            'expected': round(total * weight / weight_sum, 2),
+        })
+
+    statistic, df, p_value = chi_square([s['observed'] for s in segments], weights)
+    return {
+        'wheel': str(wheel.pk),
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'total_spins': total,
+        # Spins on segments that are no longer on the wheel
+        'unmatched_spins': total - sum(s['observed'] for s in segments),
+        'segments': segments,
+        'prizes': {
+            prize_type: {**values, 'claimed_value': f"{values['claimed_value']:.2f}"}
+            for prize_type, values in sorted(by_prize.items())
+        },
+        'chi_square': {
+            'statistic': statistic,
+            'df': df,
+            'p_value': p_value,
+            'drift': p_value is not None and p_value < settings.WHEEL_DRIFT_ALPHA,
+        },
+    }
+
+
+def check_drift(now=None):
+    """
+    فحص انحراف توزيع الجوائز للعجلات النشطة.
+
+    Looks at the last WHEEL_DRIFT_WINDOW_DAYS days, logs every wheel whose
+    p-value falls below WHEEL_DRIFT_ALPHA and notifies the managers, except
+    those who still have an unread alert for the wheel from the same
+    window. Returns the drifting wheels' reports.
+    """
+    from accounts.models import User
+    from chat.models import Notification
+
+    now = now or timezone.now()
+    today = timezone.localtime(now).date()
+    date_from = today - timedelta(days=settings.WHEEL_DRIFT_WINDOW_DAYS - 1)
+    managers = User.objects.filter(role__in=['MANAGER', 'ADMIN'], is_active=True)
+    drifting = []
+    for wheel in WheelOfFortune.objects.filter(is_active=True).exclude(segments=[]):
+        report = distribution(wheel, date_from, today)
+        if not report['chi_square']['drift']:
+            continue
+        drifting.append(report)
+        logger.warning(
+            "Prize distribution of wheel %s drifted from its weights (chi2=%.1f, df=%s, p=%.2g)",
+            wheel.pk, report['chi_square']['statistic'], report['chi_square']['df'],
+            report['chi_square']['p_value'],
+        )
+        alerted = Notification.objects.filter(
+            type='system',
+            is_read=False,
+            related_object_type='WheelOfFortune',
+            related_object_id=str(wheel.pk),
+            created_at__gte=now - timedelta(days=settings.WHEEL_DRIFT_WINDOW_DAYS),
+        ).values('user')
+        for manager in managers.exclude(pk__in=alerted):
+            Notification.create_notification(
+                user=manager,
+                type='system',
+                title=f'انحراف جوائز العجلة: {wheel.title}',
+                message='توزيع الجوائز الفعلي لا يطابق أوزان القطاعات',
+                priority='high',
+                related_object_type='WheelOfFortune',
+                related_object_id=str(wheel.pk),
+                payload={'chi_square': report['chi_square']},
+            )
+    return drifting
@@ -0,0 +1,164 @@
+"""
+Compact sliding-puzzle boards
+تمثيل مضغوط للوحة البازل المنزلقة
+
+A board is a permutation of the tiles packed one byte per cell in a
+bytearray, with the blank's position kept alongside it. The last tile
+(grid_size² - 1) is the blank, and the solved board has every tile at its
+own index. A move names the cell whose tile slides into the blank; checking
+and applying it is a table lookup and a two-byte swap, so the server can
+replay every move of every attempt. New boards are shuffled uniformly among
+the solvable half of the permutations.
+"""
+
+import random
+
+
+MIN_GRID_SIZE = 2
+MAX_GRID_SIZE = 15
+
+# Faster than this per move is not a person playing
+MIN_SECONDS_PER_MOVE = 0.05
+
+_solved = {}
+_neighbours = {}
+
+
+def solved_cells(grid_size):
+    """الترتيب المحلول للشبكة"""
+    cells = _solved.get(grid_size)
+    if cells is None:
+        cells = _solved[grid_size] = bytes(range(grid_size * grid_size))
+    return cells
+
+
+def neighbours(grid_size):
+    """
+    الخلايا المجاورة لكل خلية.
+
+    neighbours(g)[blank] is the set of cells that may slide into the blank.
+    """
+    table = _neighbours.get(grid_size)
+    if table is None:
+        table = []
+        for cell in range(grid_size * grid_size):
+            row, col = divmod(cell, grid_size)
+            adjacent = set()
+            if row > 0:
+                adjacent.add(cell - grid_size)
+            if row < grid_size - 1:
+                adjacent.add(cell + grid_size)
+            if col > 0:
+                adjacent.add(cell - 1)
+            if col < grid_size - 1:
+                adjacent.add(cell + 1)
+            table.append(frozenset(adjacent))
+        table = _neighbours[grid_size] = tuple(table)
+    return table
+
+
+def permutation_parity(cells):
+    """زوجية التبديل (0 أو 1) بعدّ الدورات في O(n)"""
+    seen = bytearray(len(cells))
+    cycles = 0
+    for start in range(len(cells)):
+        if not seen[start]:
+            cycles += 1
+            cell = start
+            while not seen[cell]:
+                seen[cell] = 1
+                cell = cells[cell]
+    return (len(cells) - cycles) % 2
+
+
+class Board:
+    """لوحة بازل منزلقة"""
+
+    __slots__ = ('grid_size', 'cells', 'blank', '_neighbours')
+
+    def __init__(self, grid_size, cells):
+        if not MIN_GRID_SIZE <= grid_size <= MAX_GRID_SIZE:
+            raise ValueError("Unsupported grid size")
+        cells = bytearray(cells)
+        if sorted(cells) != list(solved_cells(grid_size)):
+            raise ValueError("Cells are not a permutation of the tiles")
+        self.grid_size = grid_size
+        self.cells = cells
+        self.blank = cells.index(grid_size * grid_size - 1)
+        self._neighbours = neighbours(grid_size)
+
+    @classmethod
+    def solved(cls, grid_size):
+        return cls(grid_size, solved_cells(grid_size))
+
+    @classmethod
+    def shuffled(cls, grid_size, rng=None):
+        """
+        لوحة عشوائية قابلة للحل وغير محلولة.
+
+        A uniform shuffle is solvable half of the time; otherwise swapping
+        two tiles away from the blank flips the parity. O(n).
+        """
+        rng = rng or random.SystemRandom()
+        cells = bytearray(solved_cells(grid_size))
+        while True:
+            rng.shuffle(cells)
+            board = cls(grid_size, cells)
+            if not board.is_solvable():
+                a, b = [i for i in range(3) if i != board.blank][:2]
+                cells[a], cells[b] = cells[b], cells[a]
+                board = cls(grid_size, cells)
+            if not board.is_solved():
+                return board
+
+    @classmethod
+    def from_hex(cls, grid_size, value):
+        return cls(grid_size, bytes.fromhex(value))
+
+    def hex(self):
+        return self.cells.hex()
+
+    def is_solved(self):
+        return self.cells == solved_cells(self.grid_size)
+
+    def is_solvable(self):
+        """
+        قابلية الحل من هذا الترتيب.
+
+        A slide is one transposition that moves the blank one cell, so the
+        permutation parity (blank included) must equal the parity of the
+        blank's Manhattan distance from its home corner.
+        """
+        g = self.grid_size
+        row, col = divmod(self.blank, g)
+        distance = (g - 1 - row) + (g - 1 - col)
+        return permutation_parity(self.cells) == distance % 2
+
+    def move(self, cell):
+        """
+        تحريك القطعة في الخلية cell إلى الفراغ.
+
+        Returns False, leaving the board unchanged, when the move is illegal.
+        """
+        if cell not in self._neighbours[self.blank]:
+            return False
+        cells = self.cells
+        cells[self.blank] = cells[cell]
+        cells[cell] = len(cells) - 1
+        self.blank = cell
+        return True
+
+    def apply(self, moves):
+        """
+        تطبيق عدة حركات دفعة واحدة.
+
+        All or nothing: returns False and restores the board if any move is
+        illegal.
+        """
+        cells, blank = self.cells[:], self.blank
+        move = self.move
+        for cell in moves:
+            if not move(cell):
+                self.cells, self.blank = cells, blank
+                return False
+        return True
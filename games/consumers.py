@@ -0,0 +1,196 @@
+"""
+WebSocket consumers for live leaderboards and puzzle sessions
+"""
+
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+
+from accounts import presence
+from games import live, sessions
+
+
+class LeaderboardConsumer(AsyncWebsocketConsumer):
+    """Streams rank changes for one board (game type and period)"""
+    
+    top_size = 10
+    
+    async def connect(self):
+        kwargs = self.scope['url_route']['kwargs']
+        self.game_type = kwargs['game_type']
+        self.period = kwargs['period']
+        if self.game_type not in live.GAME_TYPES or self.period not in live.LIVE_PERIODS:
+            await self.close()
+            return
+        
+        self.user = self.scope.get('user')
+        self.group_name = live.group_name(self.game_type, self.period)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        
+        # Send the current standings straight away
+        await self.send_standings()
+    
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+    
+    async def receive(self, text_data):
+        """Handle incoming WebSocket messages"""
+        await presence.atouch(self.user)
+        try:
+            data = json.loads(text_data)
+        except (TypeError, ValueError):
+            await self.send_error('invalid JSON')
+            return
+        if not isinstance(data, dict):
+            await self.send_error('frame must be an object')
+            return
+        action = data.get('action')
+        
+        if action == 'refresh':
+            await self.send_standings()
+        elif action == 'around_me':
+            await self.send(text_data=json.dumps({
+                'type': 'around_me',
+                'entries': await self.around_me(data.get('radius', 5)),
+            }))
+    
+    async def send_standings(self):
+        top = await sync_to_async(live.top)(self.game_type, self.period, self.top_size)
+        me = None
+        if self.user and self.user.is_authenticated:
+            me = await sync_to_async(live.rank_of)(self.game_type, self.period, self.user.pk)
+        await self.send(text_data=json.dumps({
+            'type': 'standings',
+            'top': top,
+            'me': me,
+        }))
+    
+    async def around_me(self, radius):
+        if not (self.user and self.user.is_authenticated):
+            return []
+        try:
+            radius = min(max(int(radius), 1), 50)
+        except (TypeError, ValueError):
+            radius = 5
+        return await sync_to_async(live.around)(self.game_type, self.period, self.user.pk, radius)
+    
+    async def send_error(self, message):
+        await self.send(text_data=json.dumps({'type': 'error', 'message': message}))
+    
+    # Receive message handlers
+    async def leaderboard_update(self, event):
+        """Send a player's new standing to WebSocket"""
+        await self.send(text_data=json.dumps({
+            'type': 'update',
+            'rank': event['rank'],
+            'user_id': event['user_id'],
+            'score': event['score'],
+        }))
+
+
+class PuzzleSessionConsumer(AsyncWebsocketConsumer):
+    """Keeps a puzzle attempt in memory and autosaves coalesced snapshots"""
+    
+    async def connect(self):
+        self.user = self.scope.get('user')
+        self.session = None
+        self.autosave_task = None
+        if not (self.user and self.user.is_authenticated):
+            await self.close()
+            return
+        
+        attempt_id = self.scope['url_route']['kwargs']['attempt_id']
+        self.session = await database_sync_to_async(sessions.load_session)(attempt_id, self.user)
+        if self.session is None:
+            await self.close()
+            return
+        
+        await self.accept()
+        
+        # Resume from the last snapshot
+        await self.send(text_data=json.dumps({
+            'type': 'state',
+            'grid_size': self.session.grid_size,
+            'moves_count': self.session.moves_count,
+            **self.session.state(),
+        }))
+    
+    async def disconnect(self, close_code):
+        if self.autosave_task:
+            self.autosave_task.cancel()
+        if self.session is not None:
+            await self.save()
+    
+    async def receive(self, text_data):
+        """Handle incoming WebSocket messages"""
+        await presence.atouch(self.user)
+        try:
+            data = json.loads(text_data)
+        except (TypeError, ValueError):
+            await self.send_error('invalid JSON')
+            return
+        if not isinstance(data, dict):
+            await self.send_error('frame must be an object')
+            return
+        if self.session is None:
+            # The attempt was completed; the socket is closing
+            await self.send_error('session is closed')
+            return
+        message_type = data.get('type')
+        
+        if message_type == 'move':
+            await self.handle_move(data)
+        elif message_type == 'complete':
+            await self.handle_complete()
+    
+    async def handle_move(self, data):
+        """Apply a delta of moves; the database is written later"""
+        seq = data.get('seq')
+        if not isinstance(seq, int):
+            await self.send_error('seq must be an integer')
+            return
+        try:
+            self.session.apply(seq, data.get('moves'))
+        except sessions.SessionError as exc:
+            await self.send_error(str(exc))
+            return
+        
+        if self.autosave_task is None:
+            self.autosave_task = asyncio.ensure_future(self.autosave_later())
+        await self.send(text_data=json.dumps({'type': 'ack', 'seq': self.session.seq}))
+    
+    async def handle_complete(self):
+        if self.autosave_task:
+            self.autosave_task.cancel()
+            self.autosave_task = None
+        completed, attempt = await database_sync_to_async(sessions.complete_session)(self.session)
+        await self.send(text_data=json.dumps({
+            'type': 'completed',
+            'completed': completed,
+            'completion_time': attempt.completion_time,
+            'points_earned': attempt.points_earned,
+        }))
+        if completed:
+            self.session = None
+            await self.close()
+    
+    async def autosave_later(self):
+        # One write per interval however many moves arrive in between
+        await asyncio.sleep(settings.PUZZLE_AUTOSAVE_SECONDS)
+        self.autosave_task = None
+        await self.save()
+    
+    async def save(self):
+        # Taken on the event loop, so moves cannot change the board mid-write
+        snapshot = self.session.snapshot()
+        if snapshot:
+            await database_sync_to_async(sessions.save_snapshot)(self.session, snapshot)
+    
+    async def send_error(self, message):
+        await self.send(text_data=json.dumps({'type': 'error', 'message': message}))
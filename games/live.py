@@ -0,0 +1,378 @@
+"""
+Live leaderboards on sorted sets
+لوحات المتصدرين المباشرة باستخدام المجموعات المرتبة
+
+Every completed puzzle and wheel spin adds its points to the boards it
+counts towards (the game's board and the overall board, for each period),
+so top-N, rank-of-user and around-me queries are answered straight from a
+sorted set in O(log n). Redis ZSETs are used in production; an in-process
+skip list stands in locally. Score changes are pushed to WebSocket
+subscribers, and boards are periodically snapshotted into Leaderboard.
+
+A store only holds points recorded since it started (a Redis flush, a new
+deploy of the memory store, or another process). Before a board is read
+for a snapshot, seed() therefore loads the stored totals from ScoreRollup,
+keeping the larger of the stored and live score for each player, and marks
+the board as seeded.
+
+Live ranks are unique positions (ties are ordered by member, as in Redis);
+snapshots use shared ranks like update_leaderboard().
+"""
+
+import logging
+from threading import Lock
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from games.models import Leaderboard, ScoreRollup, period_bounds
+from games.skiplist import SortedScoreSet
+
+logger = logging.getLogger(__name__)
+
+LIVE_PERIODS = ['daily', 'weekly', 'monthly', 'yearly', 'alltime']
+GAME_TYPES = [choice for choice, _ in Leaderboard.GAME_TYPE_CHOICES]
+
+# Boards are kept this long after their period ends
+EXPIRY_GRACE_SECONDS = 2 * 24 * 60 * 60
+
+
+def board_key(game_type, period, period_start):
+    return f"leaderboard:{game_type}:{period}:{period_start:%Y%m%d}"
+
+
+def group_name(game_type, period):
+    """مجموعة قناة WebSocket للوحة"""
+    return f"leaderboard_{game_type}_{period}"
+
+
+class MemoryStore:
+    """مخزن محلي داخل العملية (للتطوير والاختبارات)"""
+
+    def __init__(self):
+        self.boards = {}
+        self.games = {}
+        self.seeded = set()
+        self.lock = Lock()
+
+    def _board(self, key):
+        board = self.boards.get(key)
+        if board is None:
+            board = self.boards[key] = SortedScoreSet()
+        return board
+
+    def incr(self, keys, member, points, expire_at):
+        # Expiry is not needed in process: old keys are simply never read again
+        with self.lock:
+            for key in keys:
+                self._board(key).incr(member, points)
+                games = self.games.setdefault(key, {})
+                games[member] = games.get(member, 0) + 1
+
+    def rank(self, key, member):
+        with self.lock:
+            board = self.boards.get(key)
+            if board is None or member not in board:
+                return None
+            return board.rev_rank(member), board.score(member)
+
+    def rev_range(self, key, start, stop):
+        with self.lock:
+            board = self.boards.get(key)
+            return board.rev_range(start, stop) if board else []
+
+    def size(self, key):
+        with self.lock:
+            board = self.boards.get(key)
+            return len(board) if board else 0
+
+    def games_played(self, key):
+        with self.lock:
+            return dict(self.games.get(key, {}))
+
+    def is_seeded(self, key):
+        with self.lock:
+            return key in self.seeded
+
+    def load(self, key, rows, expire_at):
+        with self.lock:
+            board = self._board(key)
+            games = self.games.setdefault(key, {})
+            for member, score, played in rows:
+                current = board.score(member) if member in board else None
+                if current is None or current < score:
+                    board.add(member, score)
+                games[member] = max(games.get(member, 0), played)
+
+    def mark_seeded(self, key, expire_at):
+        with self.lock:
+            self.seeded.add(key)
+
+    def clear(self):
+        with self.lock:
+            self.boards.clear()
+            self.games.clear()
+            self.seeded.clear()
+
+
+class RedisStore:
+    """مخزن Redis باستخدام ZSET"""
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    def incr(self, keys, member, points, expire_at):
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.zincrby(key, points, member)
+            pipe.hincrby(f"{key}:games", member, 1)
+            pipe.expireat(key, expire_at[key])
+            pipe.expireat(f"{key}:games", expire_at[key])
+        pipe.execute()
+
+    def rank(self, key, member):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrevrank(key, member)
+        pipe.zscore(key, member)
+        rank, score = pipe.execute()
+        if rank is None:
+            return None
+        return rank, int(score)
+
+    def rev_range(self, key, start, stop):
+        if start > stop:
+            return []
+        return [
+            (member, int(score))
+            for member, score in self.client.zrevrange(key, max(start, 0), stop, withscores=True)
+        ]
+
+    def size(self, key):
+        return self.client.zcard(key)
+
+    def games_played(self, key):
+        return {member: int(count) for member, count in self.client.hgetall(f"{key}:games").items()}
+
+    def is_seeded(self, key):
+        return bool(self.client.exists(f"{key}:seeded"))
+
+    def load(self, key, rows, expire_at):
+        played = self.games_played(key)
+        pipe = self.client.pipeline(transaction=False)
+        # GT keeps scores that live updates already raised above the rollup
+        pipe.zadd(key, {member: score for member, score, _ in rows}, gt=True)
+        pipe.hset(f"{key}:games", mapping={
+            member: max(played.get(member, 0), games) for member, _, games in rows
+        })
+        pipe.expireat(key, expire_at)
+        pipe.expireat(f"{key}:games", expire_at)
+        pipe.execute()
+
+    def mark_seeded(self, key, expire_at):
+        self.client.set(f"{key}:seeded", 1, exat=expire_at)
+
+    def clear(self):
+        keys = list(self.client.scan_iter('leaderboard:*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+_store = None
+_store_lock = Lock()
+
+
+def get_store():
+    """المخزن المحدد في الإعدادات"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if settings.LIVE_LEADERBOARD_BACKEND == 'redis':
+                    _store = RedisStore(settings.LIVE_LEADERBOARD_REDIS_URL)
+                else:
+                    _store = MemoryStore()
+    return _store
+
+
+def _current_key(game_type, period, now=None):
+    start, end = period_bounds(period, now)
+    return board_key(game_type, period, start), end
+
+
+def _entry(rank, member, score):
+    return {'rank': rank + 1, 'user_id': member, 'score': score}
+
+
+def record_score(user_id, game_type, points, now=None):
+    """
+    إضافة نقاط لعبة منتهية إلى اللوحات المباشرة.
+
+    Updates the game's boards and the overall boards for every period, then
+    pushes the player's new standing to subscribers.
+    """
+    now = now or timezone.now()
+    member = str(user_id)
+    keys = []
+    expire_at = {}
+    for board_type in (game_type, 'overall'):
+        for period in LIVE_PERIODS:
+            key, end = _current_key(board_type, period, now)
+            keys.append(key)
+            expire_at[key] = int(end.timestamp()) + EXPIRY_GRACE_SECONDS
+
+    store = get_store()
+    store.incr(keys, member, points, expire_at)
+
+    if settings.LIVE_LEADERBOARD_PUSH:
+        _push_update(store, member, game_type, now)
+
+
+def _push_update(store, member, game_type, now):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    for board_type in (game_type, 'overall'):
+        for period in LIVE_PERIODS:
+            key, _ = _current_key(board_type, period, now)
+            standing = store.rank(key, member)
+            if standing is None:
+                continue
+            try:
+                async_to_sync(channel_layer.group_send)(group_name(board_type, period), {
+                    'type': 'leaderboard_update',
+                    **_entry(standing[0], member, standing[1]),
+                })
+            except Exception:
+                # Scores are already stored; a missed push only delays the UI
+                logger.warning("Could not push leaderboard update", exc_info=True)
+                return
+
+
+def record_score_on_commit(user_id, game_type, points):
+    """تسجيل النقاط بعد نجاح المعاملة الحالية"""
+    transaction.on_commit(lambda: record_score(user_id, game_type, points))
+
+
+def top(game_type, period, limit=10, now=None):
+    """أعلى اللاعبين نقاطاً"""
+    key, _ = _current_key(game_type, period, now)
+    return [
+        _entry(rank, member, score)
+        for rank, (member, score) in enumerate(get_store().rev_range(key, 0, limit - 1))
+    ]
+
+
+def rank_of(game_type, period, user_id, now=None):
+    """ترتيب لاعب ونقاطه أو None"""
+    key, _ = _current_key(game_type, period, now)
+    member = str(user_id)
+    standing = get_store().rank(key, member)
+    if standing is None:
+        return None
+    return _entry(standing[0], member, standing[1])
+
+
+def around(game_type, period, user_id, radius=5, now=None):
+    """اللاعبون حول لاعب معين"""
+    key, _ = _current_key(game_type, period, now)
+    store = get_store()
+    standing = store.rank(key, str(user_id))
+    if standing is None:
+        return []
+    start = max(standing[0] - radius, 0)
+    return [
+        _entry(rank, member, score)
+        for rank, (member, score) in enumerate(
+            store.rev_range(key, start, standing[0] + radius), start
+        )
+    ]
+
+
+def seed(game_type, period, now=None, batch_size=1000):
+    """
+    تحميل مجاميع النقاط المخزنة في اللوحة المباشرة.
+
+    Runs once per board and store. Returns the number of players loaded.
+    """
+    period_start, period_end = period_bounds(period, now)
+    key = board_key(game_type, period, period_start)
+    store = get_store()
+    if store.is_seeded(key):
+        return 0
+    expire_at = int(period_end.timestamp()) + EXPIRY_GRACE_SECONDS
+    rows = (
+        ScoreRollup.objects.filter(game_type=game_type, period=period, period_start=period_start)
+        .order_by()
+        .values_list('user_id', 'score', 'games')
+    )
+    loaded = 0
+    batch = []
+    for user_id, score, games in rows.iterator(chunk_size=batch_size):
+        batch.append((str(user_id), score, games))
+        if len(batch) >= batch_size:
+            store.load(key, batch, expire_at)
+            loaded += len(batch)
+            batch = []
+    if batch:
+        store.load(key, batch, expire_at)
+    store.mark_seeded(key, expire_at)
+    return loaded + len(batch)
+
+
+def snapshot(game_type, period, now=None, batch_size=1000):
+    """
+    حفظ اللوحة المباشرة في جدول Leaderboard.
+
+    The board is seeded from ScoreRollup first, so it never publishes less
+    than the stored totals. Only the board's players are written: best_time
+    is left as update_leaderboard() computed it, and rows of players who are
+    not on the board are left for update_leaderboard() to manage.
+    """
+    seed(game_type, period, now, batch_size)
+    period_start, period_end = period_bounds(period, now)
+    key = board_key(game_type, period, period_start)
+    store = get_store()
+    games = store.games_played(key)
+    size = store.size(key)
+
+    with transaction.atomic():
+        rank = 0
+        previous = None
+        for start in range(0, size, batch_size):
+            entries = []
+            for position, (member, score) in enumerate(
+                store.rev_range(key, start, start + batch_size - 1), start + 1
+            ):
+                if score != previous:
+                    rank, previous = position, score
+                entries.append(Leaderboard(
+                    user_id=member,
+                    game_type=game_type,
+                    period=period,
+                    period_start=period_start,
+                    period_end=period_end,
+                    score=score,
+                    rank=rank,
+                    games_played=games.get(member, 0),
+                ))
+            Leaderboard.objects.bulk_create(
+                entries,
+                update_conflicts=True,
+                unique_fields=['user', 'game_type', 'period', 'period_start'],
+                update_fields=['score', 'rank', 'games_played', 'period_end', 'last_updated'],
+            )
+    return size
+
+
+def snapshot_all(now=None):
+    """حفظ كل اللوحات المباشرة للفترات الحالية"""
+    return sum(
+        snapshot(game_type, period, now)
+        for game_type in GAME_TYPES
+        for period in LIVE_PERIODS
+    )
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark for server-side puzzle move validation
+قياس أداء التحقق من حركات البازل
+"""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from games.board import Board, neighbours
+
+
+class Command(BaseCommand):
+    help = 'Measure move validation, solvability and solved checks on packed boards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--moves', type=int, default=2_000_000)
+        parser.add_argument('--grid-size', type=int, default=6)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        grid_size = options['grid_size']
+        count = options['moves']
+
+        # A random walk of legal slides; for validation every eighth move
+        # is also tried illegally (the blank itself), which must be refused
+        start = Board.shuffled(grid_size, rng)
+        table = neighbours(grid_size)
+        walk = Board(grid_size, start.cells)
+        legal, mixed = [], []
+        for i in range(100_000):
+            if i % 8 == 7:
+                mixed.append(walk.blank)
+            cell = rng.choice(sorted(table[walk.blank]))
+            walk.move(cell)
+            legal.append(cell)
+            mixed.append(cell)
+        rounds = max(count // len(mixed), 1)
+        frames = [legal[i:i + 50] for i in range(0, len(legal), 50)]
+
+        def validate():
+            for _ in range(rounds):
+                move = Board(grid_size, start.cells).move
+                for cell in mixed:
+                    move(cell)
+
+        def apply_frames():
+            for _ in range(rounds):
+                board = Board(grid_size, start.cells)
+                for frame in frames:
+                    if not board.apply(frame):
+                        raise AssertionError("legal frame refused")
+
+        self.report('move validation', validate, rounds * len(mixed), 'moves')
+        self.report('50-move frames (all or nothing)', apply_frames, rounds * len(legal), 'moves')
+
+        board = walk
+        checks = count // 20
+        self.report('is_solvable (O(n) parity)', lambda: [board.is_solvable() for _ in range(checks)], checks, 'checks')
+        self.report('is_solved', lambda: [board.is_solved() for _ in range(checks)], checks, 'checks')
+        self.report('shuffled (solvable deal)', lambda: [Board.shuffled(grid_size, rng) for _ in range(checks // 10)],
+                    checks // 10, 'boards')
+
+    def report(self, label, call, count, unit):
+        started = time.perf_counter()
+        call()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label:<34} {elapsed * 1e9 / count:8.1f} ns each  ({count / elapsed:,.0f} {unit}/s)"
+        )
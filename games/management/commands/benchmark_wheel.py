@@ -0,0 +1,51 @@
+"""
+Micro-benchmark for wheel prize sampling
+قياس أداء اختيار جوائز العجلة
+"""
+
+import random
+import secrets
+import time
+
+from django.core.management.base import BaseCommand
+
+from games.sampling import AliasSampler
+
+
+class Command(BaseCommand):
+    help = 'Compare random.choices per spin with the precompiled alias sampler'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spins', type=int, default=1_000_000)
+        parser.add_argument('--segments', type=int, default=8)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        segments = [
+            {'id': i, 'weight': rng.randint(1, 50), 'prize_type': 'points', 'prize_value': i}
+            for i in range(options['segments'])
+        ]
+        spins = options['spins']
+
+        def choices_per_spin():
+            # What WheelOfFortune.spin used to do on every call
+            weights = [segment.get('weight', 1) for segment in segments]
+            return random.choices(segments, weights=weights, k=1)[0]
+
+        secure = AliasSampler([s['weight'] for s in segments])
+        fast = AliasSampler([s['weight'] for s in segments], rng=random.Random(options['seed']))
+
+        self.report('random.choices per spin', choices_per_spin, spins)
+        self.report('alias table, SystemRandom', lambda: segments[secure.sample()], spins)
+        self.report('alias table, Mersenne', lambda: segments[fast.sample()], spins)
+        self.report('secrets.SystemRandom().random', secrets.SystemRandom().random, spins)
+
+    def report(self, label, call, spins):
+        started = time.perf_counter()
+        for _ in range(spins):
+            call()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label:<32} {elapsed * 1e9 / spins:8.1f} ns/spin  ({spins / elapsed:,.0f} spins/s)"
+        )
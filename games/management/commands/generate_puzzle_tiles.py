@@ -0,0 +1,32 @@
+"""
+Management command to backfill puzzle tile sheets
+تجهيز قطع البازل للألعاب الموجودة
+"""
+
+from django.core.management.base import BaseCommand
+
+from games.models import PuzzleGame
+from games.tasks import generate_puzzle_tiles
+from games.tiles import generate_tiles
+
+
+class Command(BaseCommand):
+    help = 'Generate sprite sheets, tile manifests and thumbnails for existing puzzles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--inline',
+            action='store_true',
+            help='Render in this process instead of queueing Celery tasks'
+        )
+
+    def handle(self, *args, **options):
+        count = 0
+        for puzzle in PuzzleGame.objects.exclude(original_image='').iterator(chunk_size=500):
+            if options['inline']:
+                generate_tiles(puzzle)
+            else:
+                generate_puzzle_tiles.delay(puzzle.pk)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Processed {count} puzzles"))
@@ -0,0 +1,19 @@
+"""
+Management command to resolve and warm the upcoming daily content
+تجهيز محتوى الأيام القادمة
+"""
+
+from django.core.management.base import BaseCommand
+
+from games.schedule import prepare_upcoming
+
+
+class Command(BaseCommand):
+    help = 'Resolve the wheel and daily puzzle for the coming days and warm their caches'
+
+    def handle(self, *args, **kwargs):
+        for entry in prepare_upcoming():
+            self.stdout.write(
+                f"{entry.date}: wheel={entry.wheel or '-'} puzzle={entry.puzzle or '-'}"
+            )
+        self.stdout.write(self.style.SUCCESS("✅ Daily content prepared"))
@@ -0,0 +1,19 @@
+"""
+Management command to rebuild wheel prize rollups from the spin history
+إعادة بناء مجاميع جوائز العجلة من سجل الدورات
+"""
+
+from django.core.management.base import BaseCommand
+
+from games.analytics import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild WheelPrizeRollup rows from WheelSpin'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wheel', action='append', dest='wheels', help='Only rebuild this wheel (repeatable)')
+
+    def handle(self, *args, **kwargs):
+        count = rebuild_rollups(kwargs['wheels'])
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {count} prize rollups"))
@@ -0,0 +1,16 @@
+"""
+Management command to rebuild leaderboard rollups from the score ledger
+إعادة بناء مجاميع النقاط من سجل الأحداث
+"""
+
+from django.core.management.base import BaseCommand
+
+from games.scoring import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild ScoreRollup rows from the ScoreEvent ledger'
+
+    def handle(self, *args, **kwargs):
+        count = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {count} score rollups"))
@@ -0,0 +1,221 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:50
+
+from datetime import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum, Value
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek, TruncYear
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+WHEEL_POINTS_PER_SPIN = 10
+BATCH_SIZE = 1000
+
+# Start of the all-time board, as games.models.ALLTIME_START when written
+ALLTIME_START = datetime(2000, 1, 1)
+
+PERIOD_TRUNCS = {
+    "daily": TruncDay,
+    "weekly": TruncWeek,
+    "monthly": TruncMonth,
+    "yearly": TruncYear,
+}
+
+
+def build_rollups(ScoreEvent, ScoreRollup):
+    """One aggregate query per period and board kind, as games.scoring did"""
+    tzinfo = django.utils.timezone.get_current_timezone()
+    for period in ["daily", "weekly", "monthly", "yearly", "alltime"]:
+        if period == "alltime":
+            bucket = Value(
+                django.utils.timezone.make_aware(ALLTIME_START),
+                output_field=models.DateTimeField(),
+            )
+        else:
+            bucket = PERIOD_TRUNCS[period]("occurred_at", tzinfo=tzinfo)
+
+        for overall in (False, True):
+            group = ["user"] if overall else ["user", "game_type"]
+            rows = (
+                ScoreEvent.objects.order_by()
+                .annotate(bucket=bucket)
+                .values(*group, "bucket")
+                .annotate(
+                    score=Sum("points"),
+                    games=Count("id"),
+                    best_time=Min("completion_time"),
+                )
+            )
+            batch = []
+            for row in rows.iterator(chunk_size=BATCH_SIZE):
+                batch.append(
+                    ScoreRollup(
+                        user_id=row["user"],
+                        game_type="overall" if overall else row["game_type"],
+                        period=period,
+                        period_start=row["bucket"],
+                        score=row["score"],
+                        games=row["games"],
+                        best_time=row["best_time"],
+                    )
+                )
+                if len(batch) >= BATCH_SIZE:
+                    ScoreRollup.objects.bulk_create(batch)
+                    batch = []
+            ScoreRollup.objects.bulk_create(batch)
+
+
+def backfill_score_ledger(apps, schema_editor):
+    PuzzleAttempt = apps.get_model("games", "PuzzleAttempt")
+    WheelSpin = apps.get_model("games", "WheelSpin")
+    ScoreEvent = apps.get_model("games", "ScoreEvent")
+    ScoreRollup = apps.get_model("games", "ScoreRollup")
+
+    def events():
+        for attempt in PuzzleAttempt.objects.filter(is_completed=True).iterator(
+            chunk_size=BATCH_SIZE
+        ):
+            yield ScoreEvent(
+                user_id=attempt.user_id,
+                game_type="puzzle",
+                source_id=str(attempt.pk),
+                points=attempt.points_earned,
+                completion_time=attempt.completion_time,
+                occurred_at=attempt.completed_at or attempt.started_at,
+            )
+        for spin in WheelSpin.objects.iterator(chunk_size=BATCH_SIZE):
+            yield ScoreEvent(
+                user_id=spin.user_id,
+                game_type="wheel",
+                source_id=str(spin.pk),
+                points=WHEEL_POINTS_PER_SPIN,
+                occurred_at=spin.spin_date,
+            )
+
+    batch = []
+    for event in events():
+        batch.append(event)
+        if len(batch) >= BATCH_SIZE:
+            ScoreEvent.objects.bulk_create(batch)
+            batch = []
+    ScoreEvent.objects.bulk_create(batch)
+    build_rollups(ScoreEvent, ScoreRollup)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("games", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScoreRollup",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "game_type",
+                    models.CharField(max_length=20, verbose_name="نوع اللعبة"),
+                ),
+                ("period", models.CharField(max_length=20, verbose_name="الفترة")),
+                ("period_start", models.DateTimeField(verbose_name="بداية الفترة")),
+                ("score", models.IntegerField(default=0, verbose_name="النقاط")),
+                ("games", models.IntegerField(default=0, verbose_name="عدد الألعاب")),
+                (
+                    "best_time",
+                    models.FloatField(blank=True, null=True, verbose_name="أفضل وقت"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="score_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="المستخدم",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "مجموع نقاط",
+                "verbose_name_plural": "مجاميع النقاط",
+                "indexes": [
+                    models.Index(
+                        fields=["game_type", "period", "period_start", "-score"],
+                        name="games_score_game_ty_19a6b4_idx",
+                    )
+                ],
+                "unique_together": {("user", "game_type", "period", "period_start")},
+            },
+        ),
+        migrations.CreateModel(
+            name="ScoreEvent",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "game_type",
+                    models.CharField(max_length=20, verbose_name="نوع اللعبة"),
+                ),
+                (
+                    "source_id",
+                    models.CharField(max_length=64, verbose_name="معرف المصدر"),
+                ),
+                ("points", models.IntegerField(default=0, verbose_name="النقاط")),
+                (
+                    "completion_time",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="وقت الإكمال"
+                    ),
+                ),
+                (
+                    "occurred_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="وقت الحدث"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="score_events",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="المستخدم",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "حدث نقاط",
+                "verbose_name_plural": "أحداث النقاط",
+                "ordering": ["-occurred_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["user", "occurred_at"],
+                        name="games_score_user_id_8f80a9_idx",
+                    ),
+                    models.Index(
+                        fields=["occurred_at"], name="games_score_occurre_2480a4_idx"
+                    ),
+                ],
+                "unique_together": {("game_type", "source_id")},
+            },
+        ),
+        migrations.RunPython(backfill_score_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:54
+
+from bisect import bisect_right
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+import django.db.models.deletion
+import uuid
+
+
+# Frozen copy of the games.stats histogram buckets as of this migration
+BUCKET_EDGES = (
+    list(range(5, 60, 5))
+    + list(range(60, 300, 15))
+    + list(range(300, 900, 60))
+    + list(range(900, 3601, 300))
+)
+
+
+def bucket_for(seconds):
+    return bisect_right(BUCKET_EDGES, seconds)
+
+
+def backfill_puzzle_stats(apps, schema_editor):
+    PuzzleGame = apps.get_model("games", "PuzzleGame")
+    PuzzleAttempt = apps.get_model("games", "PuzzleAttempt")
+    PuzzleTimeBucket = apps.get_model("games", "PuzzleTimeBucket")
+
+    completed = PuzzleAttempt.objects.filter(
+        is_completed=True, completion_time__isnull=False
+    ).order_by()
+    totals = completed.values("puzzle").annotate(
+        completions=Count("id"), total=Sum("completion_time"), best=Min("completion_time")
+    )
+    for row in totals.iterator():
+        PuzzleGame.objects.filter(pk=row["puzzle"]).update(
+            total_completions=row["completions"],
+            total_time=row["total"],
+            average_time=row["total"] / row["completions"],
+            best_time=row["best"],
+        )
+
+    counts = Counter(
+        (puzzle_id, bucket_for(seconds))
+        for puzzle_id, seconds in completed.values_list(
+            "puzzle", "completion_time"
+        ).iterator(chunk_size=2000)
+    )
+    PuzzleTimeBucket.objects.bulk_create(
+        [
+            PuzzleTimeBucket(puzzle_id=puzzle_id, bucket=bucket, count=count)
+            for (puzzle_id, bucket), count in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("games", "0002_score_ledger"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="puzzlegame",
+            name="total_time",
+            field=models.FloatField(default=0, verbose_name="مجموع أوقات الإكمال"),
+        ),
+        migrations.CreateModel(
+            name="PuzzleTimeBucket",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("bucket", models.PositiveSmallIntegerField(verbose_name="الخانة")),
+                ("count", models.IntegerField(default=0, verbose_name="العدد")),
+                (
+                    "puzzle",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="time_buckets",
+                        to="games.puzzlegame",
+                        verbose_name="اللعبة",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "خانة أوقات الإكمال",
+                "verbose_name_plural": "توزيع أوقات الإكمال",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="puzzletimebucket",
+            constraint=models.UniqueConstraint(
+                fields=("puzzle", "bucket"), name="unique_puzzle_time_bucket"
+            ),
+        ),
+        migrations.RunPython(backfill_puzzle_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("games", "0003_puzzle_time_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="puzzlegame",
+            name="image_hash",
+            field=models.CharField(
+                blank=True,
+                help_text="تُحسب عند تجهيز القطع",
+                max_length=64,
+                verbose_name="بصمة الصورة",
+            ),
+        ),
+        migrations.CreateModel(
+            name="PuzzleTileSet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "source_hash",
+                    models.CharField(max_length=64, verbose_name="بصمة المصدر"),
+                ),
+                (
+                    "grid_size",
+                    models.PositiveSmallIntegerField(verbose_name="حجم الشبكة"),
+                ),
+                (
+                    "sprite",
+                    models.ImageField(
+                        max_length=255,
+                        upload_to="puzzles/tiles/",
+                        verbose_name="ورقة القطع",
+                    ),
+                ),
+                (
+                    "manifest",
+                    models.JSONField(default=dict, verbose_name="خريطة القطع"),
+                ),
+                (
+                    "size",
+                    models.IntegerField(help_text="بالبايت", verbose_name="الحجم"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="تاريخ الإنشاء"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "مجموعة قطع",
+                "verbose_name_plural": "مجموعات القطع",
+                "unique_together": {("source_hash", "grid_size")},
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.8 on 2026-10-19 09:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("games", "0004_puzzle_tiles"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyContentSchedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True, verbose_name="التاريخ")),
+                (
+                    "generated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="وقت الإنشاء"),
+                ),
+                (
+                    "puzzle",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="games.puzzlegame",
+                        verbose_name="لعبة اليوم",
+                    ),
+                ),
+                (
+                    "wheel",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="games.wheeloffortune",
+                        verbose_name="العجلة",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "محتوى يومي",
+                "verbose_name_plural": "جدول المحتوى اليومي",
+                "ordering": ["date"],
+            },
+        ),
+    ]
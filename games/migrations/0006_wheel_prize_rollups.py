@@ -0,0 +1,136 @@
+# Generated by Django 4.2.8 on 2026-10-19 09:05
+
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+import uuid
+
+
+# Frozen copies of games.analytics helpers as of this migration
+def segment_key(result):
+    if not isinstance(result, dict):
+        return ""
+    key = result.get("id")
+    return str(result.get("text", "") if key is None else key)[:50]
+
+
+def prize_amount(value):
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return Decimal("0")
+    return amount if amount.is_finite() else Decimal("0")
+
+
+def backfill_prize_rollups(apps, schema_editor):
+    WheelSpin = apps.get_model("games", "WheelSpin")
+    WheelPrizeRollup = apps.get_model("games", "WheelPrizeRollup")
+
+    totals = defaultdict(lambda: [0, 0, Decimal("0")])
+    spins = WheelSpin.objects.order_by().values_list(
+        "wheel_id", "spin_date", "result", "prize_type", "prize_value", "prize_claimed"
+    )
+    for wheel_id, spin_date, result, prize_type, prize_value, claimed in spins.iterator(
+        chunk_size=2000
+    ):
+        counters = totals[
+            (wheel_id, timezone.localtime(spin_date).date(), segment_key(result), prize_type)
+        ]
+        counters[0] += 1
+        if claimed:
+            counters[1] += 1
+            counters[2] += prize_amount(prize_value)
+
+    WheelPrizeRollup.objects.bulk_create(
+        [
+            WheelPrizeRollup(
+                wheel_id=wheel_id,
+                date=day,
+                segment_id=segment_id,
+                prize_type=prize_type,
+                spins=spins_count,
+                claims=claims,
+                claimed_value=value,
+            )
+            for (wheel_id, day, segment_id, prize_type), (
+                spins_count,
+                claims,
+                value,
+            ) in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("games", "0005_daily_content_schedule"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WheelPrizeRollup",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="التاريخ")),
+                (
+                    "segment_id",
+                    models.CharField(
+                        blank=True, max_length=50, verbose_name="معرف القطاع"
+                    ),
+                ),
+                (
+                    "prize_type",
+                    models.CharField(
+                        blank=True, max_length=50, verbose_name="نوع الجائزة"
+                    ),
+                ),
+                ("spins", models.IntegerField(default=0, verbose_name="عدد الدورات")),
+                (
+                    "claims",
+                    models.IntegerField(default=0, verbose_name="عدد الاستلامات"),
+                ),
+                (
+                    "claimed_value",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=14,
+                        verbose_name="قيمة الجوائز المستلمة",
+                    ),
+                ),
+                (
+                    "wheel",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="prize_rollups",
+                        to="games.wheeloffortune",
+                        verbose_name="العجلة",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "مجموع جوائز يومي",
+                "verbose_name_plural": "مجاميع جوائز العجلة",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="wheelprizerollup",
+            constraint=models.UniqueConstraint(
+                fields=("wheel", "date", "segment_id", "prize_type"),
+                name="unique_wheel_prize_rollup",
+            ),
+        ),
+        migrations.RunPython(backfill_prize_rollups, migrations.RunPython.noop),
+    ]
@@ -3,13 +3,17 @@ Games Models
 نماذج الألعاب التفاعلية
 """
 
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from django.utils import timezone
 import uuid
-import random
 import json
+from datetime import datetime, timedelta
+
+from games.board import MIN_SECONDS_PER_MOVE, Board
+from games.sampling import get_sampler, validate_segments
 
 
 class WheelOfFortune(models.Model):
@@ -70,21 +74,49 @@ class WheelOfFortune(models.Model):
     def __str__(self):
         return self.title
     
+    def clean(self):
+        super().clean()
+        try:
+            validate_segments(self.segments)
+        except ValidationError as exc:
+            raise ValidationError({'segments': exc.messages})
+    
+    def save(self, *args, **kwargs):
+        # The sampler cannot be built from invalid weights
+        self.clean()
+        super().save(*args, **kwargs)
+    
+    def is_available(self, now=None):
+        """التحقق من أن العجلة متاحة للتدوير الآن"""
+        now = now or timezone.now()
+        if not self.is_active or not self.segments:
+            return False
+        if self.start_date and now < self.start_date:
+            return False
+        if self.end_date and now > self.end_date:
+            return False
+        return True
+    
+    def choose_segment(self):
+        """اختيار قطاع عشوائي حسب الأوزان"""
+        if not self.segments:
+            return None
+        return self.segments[get_sampler(self).sample()]
+    
+    def record_spin(self, won_prize):
+        """تحديث الإحصائيات ذرياً في قاعدة البيانات"""
+        # F() expressions so concurrent spins never overwrite each other
+        WheelOfFortune.objects.filter(pk=self.pk).update(
+            total_spins=models.F('total_spins') + 1,
+            total_prizes_given=models.F('total_prizes_given') + (1 if won_prize else 0),
+        )
+    
     def spin(self):
         """تدوير العجلة واختيار جائزة"""
-        if not self.segments:
+        selected = self.choose_segment()
+        if selected is None:
             return None
-        
-        # Calculate weighted random selection
-        weights = [segment.get('weight', 1) for segment in self.segments]
-        selected = random.choices(self.segments, weights=weights, k=1)[0]
-        
-        # Update statistics
-        self.total_spins += 1
-        if selected.get('prize_type') != 'nothing':
-            self.total_prizes_given += 1
-        self.save(update_fields=['total_spins', 'total_prizes_given'])
-        
+        self.record_spin(selected.get('prize_type') != 'nothing')
         return selected
 
 
@@ -129,16 +161,30 @@ class WheelSpin(models.Model):
     
     def claim_prize(self):
         """استلام الجائزة"""
-        if not self.prize_claimed and self.prize_type != 'nothing':
-            self.prize_claimed = True
-            self.claimed_at = timezone.now()
-            self.save(update_fields=['prize_claimed', 'claimed_at'])
+        from accounts import ledger
+        from games import analytics
+        
+        if self.prize_claimed or self.prize_type == 'nothing':
+            return False
+        
+        claimed_at = timezone.now()
+        with transaction.atomic():
+            # Only one concurrent claim can flip the flag
+            claimed = WheelSpin.objects.filter(pk=self.pk, prize_claimed=False).update(
+                prize_claimed=True, claimed_at=claimed_at
+            )
+            if not claimed:
+                return False
             
             # Apply prize to user account
-            user = self.user
             if self.prize_type == 'points':
-                user.points += int(self.prize_value)
-                user.save(update_fields=['points'])
+                ledger.credit_points(
+                    self.user_id,
+                    int(self.prize_value),
+                    idempotency_key=f"wheel-prize:{self.pk}",
+                    kind='WHEEL_PRIZE',
+                    reference=str(self.pk),
+                )
             elif self.prize_type == 'discount':
                 # Create discount code or apply to account
                 pass
@@ -146,8 +192,51 @@ class WheelSpin(models.Model):
                 # Add free design credit
                 pass
             
-            return True
-        return False
+            analytics.record_claim(self)
+        
+        self.prize_claimed = True
+        self.claimed_at = claimed_at
+        return True
+
+
+class WheelPrizeRollup(models.Model):
+    """
+    مجاميع جوائز العجلة اليومية
+    
+    Spins and claims per wheel, local day and segment, kept up to date as
+    spins happen so analytics never scan WheelSpin.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    wheel = models.ForeignKey(
+        WheelOfFortune,
+        on_delete=models.CASCADE,
+        related_name='prize_rollups',
+        verbose_name=_("العجلة")
+    )
+    date = models.DateField(_("التاريخ"))
+    segment_id = models.CharField(_("معرف القطاع"), max_length=50, blank=True)
+    prize_type = models.CharField(_("نوع الجائزة"), max_length=50, blank=True)
+    spins = models.IntegerField(_("عدد الدورات"), default=0)
+    claims = models.IntegerField(_("عدد الاستلامات"), default=0)
+    claimed_value = models.DecimalField(
+        _("قيمة الجوائز المستلمة"),
+        max_digits=14,
+        decimal_places=2,
+        default=0
+    )
+    
+    class Meta:
+        verbose_name = _("مجموع جوائز يومي")
+        verbose_name_plural = _("مجاميع جوائز العجلة")
+        constraints = [
+            models.UniqueConstraint(
+                fields=['wheel', 'date', 'segment_id', 'prize_type'],
+                name='unique_wheel_prize_rollup',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.wheel_id} - {self.date} - {self.segment_id}"
 
 
 class PuzzleGame(models.Model):
@@ -167,6 +256,12 @@ class PuzzleGame(models.Model):
         null=True,
         blank=True
     )
+    image_hash = models.CharField(
+        _("بصمة الصورة"),
+        max_length=64,
+        blank=True,
+        help_text="تُحسب عند تجهيز القطع"
+    )
     
     # إعدادات اللعبة
     difficulty = models.CharField(
@@ -204,6 +299,7 @@ class PuzzleGame(models.Model):
     # الإحصائيات
     total_plays = models.IntegerField(_("إجمالي مرات اللعب"), default=0)
     total_completions = models.IntegerField(_("إجمالي الإكمالات"), default=0)
+    total_time = models.FloatField(_("مجموع أوقات الإكمال"), default=0)
     average_time = models.FloatField(_("متوسط الوقت"), default=0)
     best_time = models.FloatField(_("أفضل وقت"), null=True, blank=True)
     
@@ -234,31 +330,69 @@ class PuzzleGame(models.Model):
         return difficulty_map.get(self.difficulty, 4)
     
     def update_statistics(self, completion_time=None):
-        """تحديث إحصائيات اللعبة"""
-        self.total_plays += 1
+        """
+        تحديث إحصائيات اللعبة.
         
-        if completion_time is not None:
-            self.total_completions += 1
-            
-            # Update average time
-            if self.average_time == 0:
-                self.average_time = completion_time
-            else:
-                self.average_time = (
-                    (self.average_time * (self.total_completions - 1) + completion_time)
-                    / self.total_completions
-                )
-            
-            # Update best time
-            if self.best_time is None or completion_time < self.best_time:
-                self.best_time = completion_time
+        Applied with atomic UPDATEs (see games.stats), so concurrent calls
+        are all counted; the in-memory fields are not refreshed.
+        """
+        from games import stats
         
-        self.save(update_fields=[
-            'total_plays',
-            'total_completions',
-            'average_time',
-            'best_time'
-        ])
+        with transaction.atomic():
+            if completion_time is None:
+                stats.record_play(self.pk)
+            else:
+                stats.record_completion(self.pk, completion_time)
+
+
+class PuzzleTileSet(models.Model):
+    """
+    قطع البازل المجهزة مسبقاً
+    
+    One sprite sheet per source image hash and grid size, with a manifest of
+    tile offsets, shared by every puzzle that uses the same picture.
+    """
+    source_hash = models.CharField(_("بصمة المصدر"), max_length=64)
+    grid_size = models.PositiveSmallIntegerField(_("حجم الشبكة"))
+    sprite = models.ImageField(_("ورقة القطع"), upload_to='puzzles/tiles/', max_length=255)
+    manifest = models.JSONField(_("خريطة القطع"), default=dict)
+    size = models.IntegerField(_("الحجم"), help_text="بالبايت")
+    created_at = models.DateTimeField(_("تاريخ الإنشاء"), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _("مجموعة قطع")
+        verbose_name_plural = _("مجموعات القطع")
+        unique_together = [['source_hash', 'grid_size']]
+    
+    def __str__(self):
+        return f"{self.source_hash[:12]} ({self.grid_size}×{self.grid_size})"
+
+
+class PuzzleTimeBucket(models.Model):
+    """
+    توزيع أوقات إكمال البازل
+    
+    One counter per puzzle and fixed time bucket (see games.stats).
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    puzzle = models.ForeignKey(
+        PuzzleGame,
+        on_delete=models.CASCADE,
+        related_name='time_buckets',
+        verbose_name=_("اللعبة")
+    )
+    bucket = models.PositiveSmallIntegerField(_("الخانة"))
+    count = models.IntegerField(_("العدد"), default=0)
+    
+    class Meta:
+        verbose_name = _("خانة أوقات الإكمال")
+        verbose_name_plural = _("توزيع أوقات الإكمال")
+        constraints = [
+            models.UniqueConstraint(fields=['puzzle', 'bucket'], name='unique_puzzle_time_bucket'),
+        ]
+    
+    def __str__(self):
+        return f"{self.puzzle_id} - {self.bucket}: {self.count}"
 
 
 class PuzzleAttempt(models.Model):
@@ -310,37 +444,173 @@ class PuzzleAttempt(models.Model):
     
     def complete(self):
         """إكمال المحاولة"""
-        if not self.is_completed:
-            self.completed_at = timezone.now()
-            self.completion_time = (self.completed_at - self.started_at).total_seconds()
-            self.is_completed = True
-            
-            # Calculate points
-            self.points_earned = self.puzzle.points_reward
-            
-            # Check for bonus
-            if (self.puzzle.bonus_time_threshold > 0 and 
-                self.completion_time <= self.puzzle.bonus_time_threshold):
-                self.points_earned += self.puzzle.bonus_points
-                self.bonus_earned = True
+        if self.is_completed:
+            return False
+        
+        completed_at = timezone.now()
+        completion_time = (completed_at - self.started_at).total_seconds()
+        
+        # The board is replayed on the server; only a solved one counts
+        try:
+            board = Board.from_hex(self.puzzle.get_grid_size(), (self.game_state or {}).get('board'))
+        except (TypeError, ValueError):
+            return False
+        if not board.is_solved() or completion_time < self.moves_count * MIN_SECONDS_PER_MOVE:
+            return False
+        
+        # Calculate points
+        points_earned = self.puzzle.points_reward
+        bonus_earned = False
+        
+        # Check for bonus
+        if (self.puzzle.bonus_time_threshold > 0 and 
+            completion_time <= self.puzzle.bonus_time_threshold):
+            points_earned += self.puzzle.bonus_points
+            bonus_earned = True
+        
+        with transaction.atomic():
+            # Only one concurrent call can complete the attempt
+            completed = PuzzleAttempt.objects.filter(pk=self.pk, is_completed=False).update(
+                completed_at=completed_at,
+                completion_time=completion_time,
+                is_completed=True,
+                points_earned=points_earned,
+                bonus_earned=bonus_earned,
+            )
+            if not completed:
+                return False
             
-            # Update user points
-            self.user.points += self.points_earned
-            self.user.save(update_fields=['points'])
+            # Credit the user's points through the ledger
+            from accounts.ledger import credit_points
+            credit_points(
+                self.user_id,
+                points_earned,
+                idempotency_key=f"puzzle:{self.pk}",
+                kind='PUZZLE_REWARD',
+                reference=str(self.pk),
+            )
             
             # Update puzzle statistics
-            self.puzzle.update_statistics(self.completion_time)
+            self.puzzle.update_statistics(completion_time)
             
-            self.save(update_fields=[
-                'completed_at',
-                'completion_time',
-                'is_completed',
-                'points_earned',
-                'bonus_earned'
-            ])
-            
-            return True
-        return False
+            # Record the score in the ledger and leaderboard rollups
+            from games.scoring import record_event
+            record_event(
+                self.user_id,
+                'puzzle',
+                points_earned,
+                source_id=self.pk,
+                completion_time=completion_time,
+                occurred_at=completed_at,
+            )
+        
+        self.completed_at = completed_at
+        self.completion_time = completion_time
+        self.is_completed = True
+        self.points_earned = points_earned
+        self.bonus_earned = bonus_earned
+        return True
+
+
+class DailyContentSchedule(models.Model):
+    """
+    جدول المحتوى اليومي
+    
+    The wheel and daily puzzle resolved ahead of time for one local day.
+    """
+    date = models.DateField(_("التاريخ"), unique=True)
+    wheel = models.ForeignKey(
+        WheelOfFortune,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_("العجلة")
+    )
+    puzzle = models.ForeignKey(
+        PuzzleGame,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_("لعبة اليوم")
+    )
+    generated_at = models.DateTimeField(_("وقت الإنشاء"), auto_now=True)
+    
+    class Meta:
+        verbose_name = _("محتوى يومي")
+        verbose_name_plural = _("جدول المحتوى اليومي")
+        ordering = ['date']
+    
+    def __str__(self):
+        return f"{self.date}"
+
+
+class ScoreEvent(models.Model):
+    """
+    سجل النقاط الموحد لكل الألعاب
+    
+    One row per scoring action (a completed puzzle, a wheel spin, ...). The
+    (game_type, source_id) pair makes recording idempotent.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='score_events',
+        verbose_name=_("المستخدم")
+    )
+    game_type = models.CharField(_("نوع اللعبة"), max_length=20)
+    source_id = models.CharField(_("معرف المصدر"), max_length=64)
+    points = models.IntegerField(_("النقاط"), default=0)
+    completion_time = models.FloatField(_("وقت الإكمال"), null=True, blank=True)
+    occurred_at = models.DateTimeField(_("وقت الحدث"), default=timezone.now)
+    
+    class Meta:
+        verbose_name = _("حدث نقاط")
+        verbose_name_plural = _("أحداث النقاط")
+        ordering = ['-occurred_at']
+        unique_together = [['game_type', 'source_id']]
+        indexes = [
+            models.Index(fields=['user', 'occurred_at']),
+            models.Index(fields=['occurred_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.game_type} - {self.points}"
+
+
+class ScoreRollup(models.Model):
+    """
+    مجاميع النقاط لكل مستخدم ولعبة وفترة
+    
+    Maintained incrementally as events are recorded; 'overall' rows sum all
+    games. Leaderboards are ranked straight from these rows.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='score_rollups',
+        verbose_name=_("المستخدم")
+    )
+    game_type = models.CharField(_("نوع اللعبة"), max_length=20)
+    period = models.CharField(_("الفترة"), max_length=20)
+    period_start = models.DateTimeField(_("بداية الفترة"))
+    score = models.IntegerField(_("النقاط"), default=0)
+    games = models.IntegerField(_("عدد الألعاب"), default=0)
+    best_time = models.FloatField(_("أفضل وقت"), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _("مجموع نقاط")
+        verbose_name_plural = _("مجاميع النقاط")
+        unique_together = [['user', 'game_type', 'period', 'period_start']]
+        indexes = [
+            models.Index(fields=['game_type', 'period', 'period_start', '-score']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.game_type} - {self.period} - {self.score}"
 
 
 class Leaderboard(models.Model):
@@ -406,79 +676,87 @@ class Leaderboard(models.Model):
         return f"{self.user.name} - {self.get_game_type_display()} - الترتيب {self.rank}"
     
     @classmethod
-    def update_leaderboard(cls, game_type='overall', period='daily'):
-        """تحديث لوحة المتصدرين"""
-        from django.db.models import Sum, Count, Min
-        from datetime import timedelta
+    def update_leaderboard(cls, game_type='overall', period='daily', now=None):
+        """
+        تحديث لوحة المتصدرين
         
-        now = timezone.now()
+        The whole board is rebuilt by the database in one INSERT ... SELECT
+        over the pre-aggregated ScoreRollup rows: players are ranked with
+        RANK() (ties share a rank) and upserted on the (user, game_type,
+        period, period_start) key. Players who dropped out of the period are
+        deleted in the same transaction. Returns the number of ranked players.
+        """
+        from django.db import connection
         
-        # Determine period boundaries
-        if period == 'daily':
-            period_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            period_end = period_start + timedelta(days=1)
-        elif period == 'weekly':
-            period_start = now - timedelta(days=now.weekday())
-            period_start = period_start.replace(hour=0, minute=0, second=0, microsecond=0)
-            period_end = period_start + timedelta(days=7)
-        elif period == 'monthly':
-            period_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            if now.month == 12:
-                period_end = period_start.replace(year=now.year + 1, month=1)
-            else:
-                period_end = period_start.replace(month=now.month + 1)
-        elif period == 'yearly':
-            period_start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-            period_end = period_start.replace(year=now.year + 1)
-        else:  # alltime
-            period_start = timezone.datetime(2000, 1, 1, tzinfo=timezone.utc)
-            period_end = now + timedelta(days=365 * 100)
+        period_start, period_end = period_bounds(period, now)
+        refreshed_at = timezone.now()
         
-        # Get user scores based on game type
-        if game_type == 'puzzle':
-            user_scores = PuzzleAttempt.objects.filter(
-                started_at__gte=period_start,
-                started_at__lt=period_end,
-                is_completed=True
-            ).values('user').annotate(
-                total_score=Sum('points_earned'),
-                games_count=Count('id'),
-                min_time=Min('completion_time')
-            )
-        elif game_type == 'wheel':
-            user_scores = WheelSpin.objects.filter(
-                spin_date__gte=period_start,
-                spin_date__lt=period_end
-            ).values('user').annotate(
-                total_score=Count('id') * 10,  # 10 points per spin for example
-                games_count=Count('id')
-            )
-        else:  # overall
-            # Combine all game scores
-            puzzle_scores = PuzzleAttempt.objects.filter(
-                started_at__gte=period_start,
-                started_at__lt=period_end,
-                is_completed=True
-            ).values('user').annotate(
-                score=Sum('points_earned')
-            )
-            
-            # Calculate combined scores
-            user_scores = []
-            # This would need more complex logic to combine different game types
+        ops = connection.ops
+        new_id = 'gen_random_uuid()' if connection.vendor == 'postgresql' else 'lower(hex(randomblob(16)))'
+        sql = (
+            f"INSERT INTO {cls._meta.db_table} (id, user_id, game_type, period, score, rank, "
+            "games_played, best_time, period_start, period_end, last_updated) "
+            f"SELECT {new_id}, user_id, game_type, period, score, RANK() OVER (ORDER BY score DESC), "
+            "games, best_time, period_start, %s, %s "
+            f"FROM {ScoreRollup._meta.db_table} "
+            "WHERE game_type = %s AND period = %s AND period_start = %s "
+            "ON CONFLICT (user_id, game_type, period, period_start) DO UPDATE SET "
+            "score = excluded.score, rank = excluded.rank, games_played = excluded.games_played, "
+            "best_time = excluded.best_time, period_end = excluded.period_end, "
+            "last_updated = excluded.last_updated"
+        )
+        params = [
+            ops.adapt_datetimefield_value(period_end),
+            ops.adapt_datetimefield_value(refreshed_at),
+            game_type,
+            period,
+            ops.adapt_datetimefield_value(period_start),
+        ]
         
-        # Update leaderboard entries
-        for idx, user_data in enumerate(user_scores, 1):
-            cls.objects.update_or_create(
-                user_id=user_data['user'],
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                ranked = cursor.rowcount
+            # Every row written above carries refreshed_at
+            cls.objects.filter(
                 game_type=game_type,
                 period=period,
                 period_start=period_start,
-                defaults={
-                    'score': user_data.get('total_score', 0),
-                    'rank': idx,
-                    'games_played': user_data.get('games_count', 0),
-                    'best_time': user_data.get('min_time'),
-                    'period_end': period_end,
-                }
-            )
\ No newline at end of file
+                last_updated__lt=refreshed_at,
+            ).delete()
+        return ranked
+
+
+# Points credited per wheel spin on the leaderboards
+WHEEL_POINTS_PER_SPIN = 10
+
+# Start of the all-time board, and an end far enough in the future
+ALLTIME_START = datetime(2000, 1, 1)
+ALLTIME_END = datetime(2100, 1, 1)
+
+
+def period_bounds(period, now=None):
+    """بداية ونهاية الفترة بالتوقيت المحلي"""
+    now = timezone.localtime(now or timezone.now())
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    if period == 'daily':
+        start = today
+        end = start + timedelta(days=1)
+    elif period == 'weekly':
+        start = today - timedelta(days=today.weekday())
+        end = start + timedelta(days=7)
+    elif period == 'monthly':
+        start = today.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+    elif period == 'yearly':
+        start = today.replace(month=1, day=1)
+        end = start.replace(year=start.year + 1)
+    else:  # alltime
+        return timezone.make_aware(ALLTIME_START), timezone.make_aware(ALLTIME_END)
+    
+    # Rebuild from naive dates so DST changes inside the period are respected
+    return (
+        timezone.make_aware(start.replace(tzinfo=None)),
+        timezone.make_aware(end.replace(tzinfo=None)),
+    )
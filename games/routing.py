@@ -0,0 +1,11 @@
+"""
+WebSocket URL routing for games app
+"""
+
+from django.urls import re_path
+from games import consumers
+
+websocket_urlpatterns = [
+    re_path(r'ws/puzzle/(?P<attempt_id>[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})/$', consumers.PuzzleSessionConsumer.as_asgi()),
+    re_path(r'ws/leaderboard/(?P<game_type>\w+)/(?P<period>\w+)/$', consumers.LeaderboardConsumer.as_asgi()),
+]
@@ -0,0 +1,186 @@
+"""
+Daily content schedule
+جدولة المحتوى اليومي
+
+The wheel and daily puzzle for each local day (TIME_ZONE) are resolved
+ahead of time into DailyContentSchedule, and each day's summary is cached in
+Django's cache until that day ends. Every process also keeps the summary in
+memory, so a games-page request normally reads neither the database nor the
+shared cache. Before midnight a Celery task resolves the coming days, warms
+the shared cache and renders the next puzzle's tiles, so the rollover hits
+warm caches. Editing a wheel or puzzle queues the same task; other
+processes pick the change up within DAILY_SCHEDULE_LOCAL_SECONDS. A day
+missing from the schedule is resolved for reading only; the task stores it.
+"""
+
+from datetime import datetime, time, timedelta
+from threading import Lock
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from games import tiles
+from games.models import DailyContentSchedule, PuzzleGame, WheelOfFortune
+from skydesign.cache import Namespace
+
+
+DAILY = Namespace('games:daily')
+
+_local = {}
+_local_lock = Lock()
+
+
+def local_today(now=None):
+    """تاريخ اليوم بالتوقيت المحلي"""
+    return timezone.localtime(now or timezone.now()).date()
+
+
+def day_bounds(day):
+    """بداية اليوم ونهايته بالتوقيت المحلي"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def _cache_key(day):
+    return f"{day:%Y%m%d}"
+
+
+def resolve_wheel(day):
+    """العجلة المفعلة في يوم معين"""
+    start, end = day_bounds(day)
+    return (
+        WheelOfFortune.objects.filter(is_active=True)
+        .exclude(segments=[])
+        .filter(Q(start_date__isnull=True) | Q(start_date__lt=end))
+        .filter(Q(end_date__isnull=True) | Q(end_date__gt=start))
+        # The most recently started campaign wins over open-ended wheels
+        .order_by(F('start_date').desc(nulls_last=True), '-created_at')
+        .first()
+    )
+
+
+def resolve_puzzle(day):
+    """لعبة البازل اليومية في يوم معين"""
+    return (
+        PuzzleGame.objects.filter(is_active=True, is_daily=True, active_date=day)
+        .order_by('-created_at')
+        .first()
+    )
+
+
+def resolve_day(day):
+    """محتوى يوم معين دون حفظه"""
+    return DailyContentSchedule(date=day, wheel=resolve_wheel(day), puzzle=resolve_puzzle(day))
+
+
+def summary(entry):
+    """ملخص اليوم كما يُخزّن ويُعرض"""
+    wheel, puzzle = entry.wheel, entry.puzzle
+    return {
+        'date': entry.date.isoformat(),
+        'wheel': wheel and {
+            'id': str(wheel.pk),
+            'title': wheel.title,
+            'max_spins_per_day': wheel.max_spins_per_day,
+        },
+        'puzzle': puzzle and {
+            'id': str(puzzle.pk),
+            'title': puzzle.title,
+            'difficulty': puzzle.difficulty,
+            'grid_size': puzzle.get_grid_size(),
+            'time_limit': puzzle.time_limit,
+            'points_reward': puzzle.points_reward,
+            'thumbnail': puzzle.thumbnail.url if puzzle.thumbnail else None,
+        },
+    }
+
+
+def _cache_timeout(day, now):
+    # Kept a little past the day's end in case of clock skew between hosts
+    return max(int((day_bounds(day)[1] - now).total_seconds()), 0) + 60
+
+
+def build_schedule(start=None, days=None, now=None):
+    """
+    حساب محتوى الأيام القادمة وحفظه.
+
+    Writes one row per day and refreshes the shared cache. Returns the
+    entries in date order.
+    """
+    now = now or timezone.now()
+    start = start or local_today(now)
+    days = days or settings.DAILY_SCHEDULE_DAYS_AHEAD
+
+    entries = [resolve_day(start + timedelta(days=offset)) for offset in range(days)]
+    DailyContentSchedule.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=['wheel', 'puzzle', 'generated_at'],
+    )
+
+    with _local_lock:
+        for entry in entries:
+            _local.pop(entry.date, None)
+    version = DAILY.version()
+    for entry in entries:
+        DAILY.set(_cache_key(entry.date), summary(entry), _cache_timeout(entry.date, now), version=version)
+    return entries
+
+
+def get_day(day=None, now=None):
+    """
+    محتوى يوم (اليوم افتراضياً).
+
+    Memory first, then the shared cache, then the stored schedule; a day
+    that was never scheduled is resolved on the spot without being stored.
+    """
+    now = now or timezone.now()
+    day = day or local_today(now)
+
+    with _local_lock:
+        hit = _local.get(day)
+    if hit and hit[0] > now:
+        return hit[1]
+
+    def compute():
+        entry = DailyContentSchedule.objects.select_related('wheel', 'puzzle').filter(date=day).first()
+        if entry is None:
+            entry = resolve_day(day)
+        return summary(entry)
+
+    payload = DAILY.get_or_set(_cache_key(day), compute, _cache_timeout(day, now))
+
+    expires = min(
+        day_bounds(day)[1],
+        now + timedelta(seconds=settings.DAILY_SCHEDULE_LOCAL_SECONDS),
+    )
+    with _local_lock:
+        # Forget past days
+        for stale in [d for d in _local if d < local_today(now)]:
+            del _local[stale]
+        _local[day] = (expires, payload)
+    return payload
+
+
+def prepare_upcoming(now=None):
+    """
+    تجهيز الأيام القادمة قبل منتصف الليل.
+
+    Renders the tiles of every scheduled puzzle, then resolves the schedule
+    and warms the shared cache (so the cached summaries carry thumbnails).
+    Returns the entries.
+    """
+    now = now or timezone.now()
+    start = local_today(now)
+    for offset in range(settings.DAILY_SCHEDULE_DAYS_AHEAD):
+        puzzle = resolve_puzzle(start + timedelta(days=offset))
+        if puzzle is not None and puzzle.original_image:
+            tiles.get_tiles(puzzle, puzzle.get_grid_size())
+    return build_schedule(start, now=now)
+
+
+def clear_local():
+    with _local_lock:
+        _local.clear()
@@ -0,0 +1,125 @@
+"""
+Unified score ledger for all games
+سجل النقاط الموحد لكل الألعاب
+
+Every scoring action is written once to ScoreEvent, and in the same
+transaction added to the ScoreRollup counters of each period bucket (daily,
+weekly, monthly, yearly, all time) for its game and for 'overall'. Boards
+are then ranked from the rollups without rescanning attempts or spins. New
+games only need to call record_event() with their own game_type.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateTimeField, Min, Sum, Value
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek, TruncYear
+from django.utils import timezone
+
+from games import live
+from games.models import ScoreEvent, ScoreRollup, period_bounds
+from skydesign.db import upsert_counter
+
+
+PERIODS = ['daily', 'weekly', 'monthly', 'yearly', 'alltime']
+
+# Database truncation matching period_bounds() for each period
+PERIOD_TRUNCS = {
+    'daily': TruncDay,
+    'weekly': TruncWeek,
+    'monthly': TruncMonth,
+    'yearly': TruncYear,
+}
+
+
+def rollup_rows(user_id, game_type, points, completion_time, occurred_at):
+    """صفوف المجاميع التي يضيف إليها حدث واحد"""
+    return [
+        {
+            'user': user_id,
+            'game_type': board,
+            'period': period,
+            'period_start': period_bounds(period, occurred_at)[0],
+            'score': points,
+            'games': 1,
+            'best_time': completion_time,
+        }
+        for board in (game_type, 'overall')
+        for period in PERIODS
+    ]
+
+
+def record_event(user_id, game_type, points, source_id, completion_time=None, occurred_at=None):
+    """
+    تسجيل حدث نقاط وتحديث المجاميع.
+
+    Returns the ScoreEvent, or None when this source was already recorded.
+    """
+    occurred_at = occurred_at or timezone.now()
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                event = ScoreEvent.objects.create(
+                    user_id=user_id,
+                    game_type=game_type,
+                    source_id=str(source_id),
+                    points=points,
+                    completion_time=completion_time,
+                    occurred_at=occurred_at,
+                )
+        except IntegrityError:
+            return None
+
+        upsert_counter(
+            ScoreRollup,
+            rollup_rows(user_id, game_type, points, completion_time, occurred_at),
+            unique_fields=['user', 'game_type', 'period', 'period_start'],
+            increment_fields=['score', 'games'],
+            min_fields=['best_time'],
+        )
+
+    live.record_score_on_commit(user_id, game_type, points)
+    return event
+
+
+def rebuild_rollups(event_model=ScoreEvent, rollup_model=ScoreRollup, batch_size=1000):
+    """
+    إعادة بناء كل المجاميع من سجل الأحداث.
+
+    One aggregate query per period and board kind; used for backfills and to
+    repair the rollups. Returns the number of rollup rows written.
+    """
+    tzinfo = timezone.get_current_timezone()
+    written = 0
+    with transaction.atomic():
+        rollup_model.objects.all().delete()
+        for period in PERIODS:
+            if period == 'alltime':
+                bucket = Value(period_bounds('alltime')[0], output_field=DateTimeField())
+            else:
+                bucket = PERIOD_TRUNCS[period]('occurred_at', tzinfo=tzinfo)
+
+            for overall in (False, True):
+                group = ['user'] if overall else ['user', 'game_type']
+                rows = (
+                    event_model.objects.order_by()
+                    .annotate(bucket=bucket)
+                    .values(*group, 'bucket')
+                    .annotate(score=Sum('points'), games=Count('id'), best_time=Min('completion_time'))
+                )
+                batch = []
+                for row in rows.iterator(chunk_size=batch_size):
+                    batch.append(rollup_model(
+                        user_id=row['user'],
+                        game_type='overall' if overall else row['game_type'],
+                        period=period,
+                        period_start=row['bucket'],
+                        score=row['score'],
+                        games=row['games'],
+                        best_time=row['best_time'],
+                    ))
+                    if len(batch) >= batch_size:
+                        rollup_model.objects.bulk_create(batch)
+                        written += len(batch)
+                        batch = []
+                rollup_model.objects.bulk_create(batch)
+                written += len(batch)
+    return written
@@ -0,0 +1,124 @@
+"""
+Wheel of fortune spin service
+خدمة تدوير عجلة الحظ
+
+Daily limits are enforced with one atomic counter per wheel, user and day
+held in the cache. A missing counter (first spin of the day, eviction or a
+cache restart) is seeded from WheelSpin using the (user, spin_date) index,
+and cache.add() makes sure concurrent seeders agree on one value. The cache
+must be shared between processes (Redis or Memcached) for the limit to hold
+across workers.
+
+A spin then records the WheelSpin row, bumps the wheel statistics with F()
+expressions, adds the spin to the score ledger and to the prize rollups
+(games.analytics) in a single short transaction.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from games import analytics
+from games.models import WHEEL_POINTS_PER_SPIN, WheelSpin
+from games.scoring import record_event
+
+
+class SpinError(Exception):
+    """خطأ في تدوير العجلة"""
+
+
+class WheelUnavailable(SpinError):
+    """العجلة غير متاحة حالياً"""
+
+
+class SpinLimitReached(SpinError):
+    """تم استنفاد الدورات اليومية"""
+
+
+def _day_bounds(now):
+    day = timezone.localtime(now).date()
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return day, start, start + timedelta(days=1)
+
+
+def _counter_key(wheel, user, day):
+    return f"games:spins:{wheel.pk}:{user.pk}:{day:%Y%m%d}"
+
+
+def spins_used(wheel, user, now=None):
+    """عدد دورات المستخدم على العجلة اليوم"""
+    day, start, end = _day_bounds(now or timezone.now())
+    count = cache.get(_counter_key(wheel, user, day))
+    if count is None:
+        count = WheelSpin.objects.filter(
+            user=user, spin_date__gte=start, spin_date__lt=end, wheel=wheel
+        ).count()
+    return count
+
+
+def _release(key):
+    try:
+        cache.decr(key)
+    except ValueError:
+        # The counter expired meanwhile and will be reseeded from the database
+        pass
+
+
+def _reserve(wheel, user, now):
+    day, start, end = _day_bounds(now)
+    key = _counter_key(wheel, user, day)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        seeded = WheelSpin.objects.filter(
+            user=user, spin_date__gte=start, spin_date__lt=end, wheel=wheel
+        ).count()
+        # Keep the counter a little past midnight so late spins still see it
+        cache.add(key, seeded, int((end - now).total_seconds()) + 3600)
+        count = cache.incr(key)
+
+    if count > wheel.max_spins_per_day:
+        _release(key)
+        raise SpinLimitReached("لقد استنفدت دوراتك لهذا اليوم")
+    return key, count
+
+
+def spin_wheel(wheel, user, ip_address=None):
+    """
+    تدوير العجلة لمستخدم واحد.
+
+    Returns (spin, spins_left). Raises WheelUnavailable or SpinLimitReached.
+    """
+    now = timezone.now()
+    if not wheel.is_available(now):
+        raise WheelUnavailable("العجلة غير متاحة حالياً")
+
+    key, count = _reserve(wheel, user, now)
+    try:
+        selected = wheel.choose_segment()
+        with transaction.atomic():
+            spin = WheelSpin.objects.create(
+                wheel=wheel,
+                user=user,
+                result=selected,
+                prize_type=selected.get('prize_type', 'nothing'),
+                prize_value=str(selected.get('prize_value', '')),
+                ip_address=ip_address,
+            )
+            wheel.record_spin(spin.prize_type != 'nothing')
+            analytics.record_spin(spin)
+            record_event(
+                user.pk,
+                'wheel',
+                WHEEL_POINTS_PER_SPIN,
+                source_id=spin.pk,
+                occurred_at=spin.spin_date,
+            )
+    except Exception:
+        # The spin never happened, so give the reservation back
+        _release(key)
+        raise
+
+    return spin, wheel.max_spins_per_day - count
@@ -0,0 +1,149 @@
+"""
+Live puzzle sessions
+جلسات البازل المباشرة
+
+While a player is connected, the attempt's board lives in the consumer's
+memory and the client sends compact move deltas, each with a sequence
+number. The board is written back to PuzzleAttempt.game_state as a single
+snapshot when the autosave timer fires or the socket closes, so a game costs
+a handful of UPDATEs rather than one per move. A reconnecting client
+resumes from the last snapshot and resends any moves after its seq.
+
+Every move is replayed on a games.board.Board, so only legal slides are
+accepted and an attempt can only be completed from a solved board.
+"""
+
+from django.db import DatabaseError, transaction
+
+from games.board import Board
+from games.models import PuzzleAttempt
+
+
+# Largest number of moves accepted in one delta frame
+MAX_MOVES_PER_DELTA = 200
+
+
+class SessionError(Exception):
+    """خطأ في جلسة البازل"""
+
+
+class PuzzleSession:
+    """
+    حالة محاولة بازل قيد اللعب
+
+    A move is the cell whose tile slides into the blank.
+    """
+
+    def __init__(self, attempt_id, board, seq=0, moves_count=0):
+        self.attempt_id = attempt_id
+        self.board = board
+        self.seq = seq
+        self.moves_count = moves_count
+        self.dirty = False
+
+    @property
+    def grid_size(self):
+        return self.board.grid_size
+
+    @classmethod
+    def from_attempt(cls, attempt):
+        board = board_from_state(attempt.puzzle.get_grid_size(), attempt.game_state)
+        if board is None:
+            # First connection: deal a fresh solvable board and keep it, so
+            # reconnecting cannot be used to redeal
+            session = cls(attempt.pk, Board.shuffled(attempt.puzzle.get_grid_size()), 0, attempt.moves_count)
+            session.dirty = True
+            return session
+        return cls(attempt.pk, board, attempt.game_state.get('seq', 0), attempt.moves_count)
+
+    def apply(self, seq, moves):
+        """
+        تطبيق دفعة حركات.
+
+        Frames at or below the current seq were already applied (a resend
+        after reconnecting) and are ignored. Returns True when applied.
+        """
+        if seq <= self.seq:
+            return False
+        if (not isinstance(moves, list) or len(moves) > MAX_MOVES_PER_DELTA
+                or not all(type(cell) is int for cell in moves)):
+            raise SessionError("Invalid move frame")
+        if not self.board.apply(moves):
+            raise SessionError("Illegal move")
+
+        self.seq = seq
+        self.moves_count += len(moves)
+        self.dirty = True
+        return True
+
+    def state(self):
+        return {'board': self.board.hex(), 'seq': self.seq}
+
+    def snapshot(self):
+        """
+        لقطة الحالة للحفظ أو None إن لم يتغير شيء.
+
+        Clears the dirty flag, so moves applied while the snapshot is being
+        written mark the session dirty again instead of being lost.
+        """
+        if not self.dirty:
+            return None
+        self.dirty = False
+        return {'game_state': self.state(), 'moves_count': self.moves_count}
+
+
+def board_from_state(grid_size, state):
+    """
+    اللوحة المحفوظة في game_state أو None.
+
+    Boards that are malformed or cannot be solved are discarded.
+    """
+    try:
+        board = Board.from_hex(grid_size, (state or {}).get('board'))
+    except (TypeError, ValueError):
+        return None
+    return board if board.is_solvable() else None
+
+
+def load_session(attempt_id, user):
+    """تحميل جلسة محاولة غير مكتملة للمستخدم أو None"""
+    attempt = (
+        PuzzleAttempt.objects.select_related('puzzle')
+        .filter(pk=attempt_id, user=user, is_completed=False)
+        .first()
+    )
+    return PuzzleSession.from_attempt(attempt) if attempt else None
+
+
+def save_snapshot(session, snapshot):
+    """
+    كتابة لقطة مأخوذة من الجلسة.
+
+    One UPDATE; a completed attempt is left untouched. Returns True when
+    something was written. If the write fails the session is marked dirty
+    again so the next save retries it.
+    """
+    try:
+        written = PuzzleAttempt.objects.filter(pk=session.attempt_id, is_completed=False).update(**snapshot)
+    except DatabaseError:
+        session.dirty = True
+        raise
+    return bool(written)
+
+
+def save_session(session):
+    """حفظ لقطة الجلسة في قاعدة البيانات إن تغيرت"""
+    snapshot = session.snapshot()
+    return save_snapshot(session, snapshot) if snapshot else False
+
+
+def complete_session(session):
+    """
+    حفظ آخر لقطة ثم إكمال المحاولة.
+
+    PuzzleAttempt.complete() refuses boards that are not solved.
+    """
+    with transaction.atomic():
+        save_session(session)
+        attempt = PuzzleAttempt.objects.select_related('puzzle').get(pk=session.attempt_id)
+        return attempt.complete(), attempt
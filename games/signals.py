@@ -0,0 +1,39 @@
+"""
+Signal handlers for the games app
+معالجات الإشارات لتطبيق الألعاب
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from games import schedule
+from games.models import PuzzleGame, WheelOfFortune
+
+
+@receiver(post_save, sender=PuzzleGame)
+def queue_puzzle_tiles(sender, instance, update_fields=None, **kwargs):
+    """جدولة تجهيز قطع البازل بعد حفظ اللعبة"""
+    if update_fields and 'original_image' not in update_fields:
+        return
+    if not instance.original_image:
+        return
+
+    from games.tasks import generate_puzzle_tiles
+
+    transaction.on_commit(lambda: generate_puzzle_tiles.delay(instance.pk))
+
+
+# Drop every cached day before the schedule below is rebuilt
+schedule.DAILY.invalidate_on(WheelOfFortune, PuzzleGame)
+
+
+@receiver(post_save, sender=WheelOfFortune)
+@receiver(post_delete, sender=WheelOfFortune)
+@receiver(post_save, sender=PuzzleGame)
+@receiver(post_delete, sender=PuzzleGame)
+def refresh_daily_schedule(sender, **kwargs):
+    """جدولة إعادة حساب جدول المحتوى بعد تعديل عجلة أو لعبة"""
+    from games.tasks import prepare_daily_content
+
+    transaction.on_commit(prepare_daily_content.delay)
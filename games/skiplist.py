@@ -0,0 +1,190 @@
+"""
+Indexable skip list for in-process leaderboards
+قائمة تخطي مرتبة مع الترتيب لاستخدام لوحات المتصدرين محلياً
+
+The same structure Redis uses for sorted sets: members are kept ordered by
+(score, member), and every forward link records how many nodes it skips, so
+the rank of a member and the member at a rank are both found in O(log n).
+"""
+
+import random
+
+
+MAX_LEVEL = 32
+P = 0.25
+
+
+class _Node:
+    __slots__ = ('score', 'member', 'forward', 'span', 'backward')
+
+    def __init__(self, level, score=None, member=None):
+        self.score = score
+        self.member = member
+        self.forward = [None] * level
+        self.span = [0] * level
+        self.backward = None
+
+
+class SortedScoreSet:
+    """
+    مجموعة مرتبة حسب النقاط
+
+    Ordered ascending by (score, member), like a Redis ZSET. Ranks are
+    0-based; use the rev_* methods for highest-score-first order.
+    """
+
+    def __init__(self):
+        self.head = _Node(MAX_LEVEL)
+        self.tail = None
+        self.level = 1
+        self.scores = {}
+        self._random = random.Random()
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __contains__(self, member):
+        return member in self.scores
+
+    def _random_level(self):
+        level = 1
+        while level < MAX_LEVEL and self._random.random() < P:
+            level += 1
+        return level
+
+    @staticmethod
+    def _before(node, score, member):
+        return node.score < score or (node.score == score and node.member < member)
+
+    def _insert(self, score, member):
+        update = [None] * MAX_LEVEL
+        rank = [0] * MAX_LEVEL
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            rank[i] = 0 if i == self.level - 1 else rank[i + 1]
+            while node.forward[i] and self._before(node.forward[i], score, member):
+                rank[i] += node.span[i]
+                node = node.forward[i]
+            update[i] = node
+
+        level = self._random_level()
+        if level > self.level:
+            for i in range(self.level, level):
+                rank[i] = 0
+                update[i] = self.head
+                update[i].span[i] = len(self.scores)
+            self.level = level
+
+        new = _Node(level, score, member)
+        for i in range(level):
+            new.forward[i] = update[i].forward[i]
+            update[i].forward[i] = new
+            new.span[i] = update[i].span[i] - (rank[0] - rank[i])
+            update[i].span[i] = (rank[0] - rank[i]) + 1
+        for i in range(level, self.level):
+            update[i].span[i] += 1
+
+        new.backward = None if update[0] is self.head else update[0]
+        if new.forward[0]:
+            new.forward[0].backward = new
+        else:
+            self.tail = new
+
+    def _delete(self, score, member):
+        update = [None] * MAX_LEVEL
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            while node.forward[i] and self._before(node.forward[i], score, member):
+                node = node.forward[i]
+            update[i] = node
+
+        node = node.forward[0]
+        for i in range(self.level):
+            if update[i].forward[i] is node:
+                update[i].span[i] += node.span[i] - 1
+                update[i].forward[i] = node.forward[i]
+            else:
+                update[i].span[i] -= 1
+        if node.forward[0]:
+            node.forward[0].backward = node.backward
+        else:
+            self.tail = node.backward
+        while self.level > 1 and self.head.forward[self.level - 1] is None:
+            self.level -= 1
+
+    def add(self, member, score):
+        """تعيين نقاط عضو"""
+        current = self.scores.get(member)
+        if current == score:
+            return
+        if current is not None:
+            self._delete(current, member)
+        self._insert(score, member)
+        self.scores[member] = score
+
+    def incr(self, member, amount):
+        """زيادة نقاط عضو وإرجاع المجموع الجديد"""
+        score = self.scores.get(member, 0) + amount
+        self.add(member, score)
+        return score
+
+    def remove(self, member):
+        score = self.scores.pop(member, None)
+        if score is not None:
+            self._delete(score, member)
+
+    def score(self, member):
+        return self.scores.get(member)
+
+    def rank(self, member):
+        """الترتيب التصاعدي (يبدأ من 0) أو None"""
+        score = self.scores.get(member)
+        if score is None:
+            return None
+        rank = 0
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            while node.forward[i] and (
+                self._before(node.forward[i], score, member)
+                or node.forward[i].member == member
+            ):
+                rank += node.span[i]
+                node = node.forward[i]
+            if node.member == member:
+                return rank - 1
+        return None
+
+    def rev_rank(self, member):
+        """الترتيب من الأعلى نقاطاً (يبدأ من 0) أو None"""
+        rank = self.rank(member)
+        return None if rank is None else len(self.scores) - 1 - rank
+
+    def _node_at(self, rank):
+        traversed = 0
+        node = self.head
+        target = rank + 1
+        for i in range(self.level - 1, -1, -1):
+            while node.forward[i] and traversed + node.span[i] <= target:
+                traversed += node.span[i]
+                node = node.forward[i]
+            if traversed == target:
+                return node
+        return None
+
+    def rev_range(self, start, stop):
+        """
+        الأعضاء من الترتيب start حتى stop (شاملاً) من الأعلى نقاطاً.
+
+        Returns (member, score) pairs; one O(log n) seek, then a walk.
+        """
+        size = len(self.scores)
+        start = max(start, 0)
+        stop = min(stop, size - 1)
+        if start > stop:
+            return []
+        node = self._node_at(size - 1 - start)
+        result = []
+        for _ in range(stop - start + 1):
+            result.append((node.member, node.score))
+            node = node.backward
+        return result
@@ -0,0 +1,131 @@
+"""
+Puzzle completion-time statistics
+إحصائيات أوقات إكمال البازل
+
+Each puzzle keeps its completion count, total time and best time as plain
+counters on PuzzleGame, and a fixed-bucket histogram of completion times in
+PuzzleTimeBucket. Every completion adds to both with single UPDATE/UPSERT
+statements, so concurrent finishes never overwrite each other. Percentiles
+and "you beat X% of players" are read from the few dozen histogram rows
+instead of scanning PuzzleAttempt.
+"""
+
+from bisect import bisect_right
+
+from django.db.models import Case, F, Q, Value, When
+
+from games.models import PuzzleGame, PuzzleTimeBucket
+from skydesign.db import upsert_counter
+
+
+# Upper bounds (seconds, exclusive) of the histogram buckets: 5 s steps for
+# the first minute, then progressively wider; the last bucket is open-ended
+BUCKET_EDGES = (
+    list(range(5, 60, 5))
+    + list(range(60, 300, 15))
+    + list(range(300, 900, 60))
+    + list(range(900, 3601, 300))
+)
+OVERFLOW_BUCKET = len(BUCKET_EDGES)
+
+
+def bucket_for(seconds):
+    """رقم الخانة لوقت إكمال"""
+    return bisect_right(BUCKET_EDGES, seconds)
+
+
+def bucket_bounds(bucket):
+    """حدود الخانة (البداية، النهاية)؛ النهاية None للخانة الأخيرة"""
+    lower = BUCKET_EDGES[bucket - 1] if bucket else 0
+    upper = BUCKET_EDGES[bucket] if bucket < OVERFLOW_BUCKET else None
+    return lower, upper
+
+
+def record_completion(puzzle_id, completion_time):
+    """
+    إضافة إكمال إلى إحصائيات اللعبة.
+
+    Must run inside the caller's transaction so the counters and the
+    histogram move together.
+    """
+    completion_time = float(completion_time)
+    PuzzleGame.objects.filter(pk=puzzle_id).update(
+        total_plays=F('total_plays') + 1,
+        total_completions=F('total_completions') + 1,
+        total_time=F('total_time') + completion_time,
+        # Both sides of SET read the row as it was before this UPDATE
+        average_time=(F('total_time') + completion_time) / (F('total_completions') + 1),
+        best_time=Case(
+            When(Q(best_time__isnull=True) | Q(best_time__gt=completion_time), then=Value(completion_time)),
+            default=F('best_time'),
+        ),
+    )
+    upsert_counter(
+        PuzzleTimeBucket,
+        [{'puzzle': puzzle_id, 'bucket': bucket_for(completion_time), 'count': 1}],
+        unique_fields=['puzzle', 'bucket'],
+        increment_fields=['count'],
+    )
+
+
+def record_play(puzzle_id):
+    """إضافة مرة لعب دون إكمال"""
+    PuzzleGame.objects.filter(pk=puzzle_id).update(total_plays=F('total_plays') + 1)
+
+
+def histogram(puzzle_id):
+    """قائمة (الخانة، العدد) مرتبة"""
+    return list(
+        PuzzleTimeBucket.objects.filter(puzzle_id=puzzle_id, count__gt=0)
+        .order_by('bucket')
+        .values_list('bucket', 'count')
+    )
+
+
+def _interpolate(bucket, fraction):
+    lower, upper = bucket_bounds(bucket)
+    if upper is None:
+        return float(lower)
+    return lower + (upper - lower) * fraction
+
+
+def percentile(puzzle_id, p, buckets=None):
+    """
+    تقدير وقت الإكمال عند النسبة المئوية p (0-100).
+
+    Linear within the bucket; None when the puzzle has no completions.
+    """
+    buckets = histogram(puzzle_id) if buckets is None else buckets
+    total = sum(count for _, count in buckets)
+    if not total:
+        return None
+    target = total * min(max(p, 0), 100) / 100
+    seen = 0
+    for bucket, count in buckets:
+        if seen + count >= target:
+            return _interpolate(bucket, (target - seen) / count)
+        seen += count
+    return _interpolate(buckets[-1][0], 1)
+
+
+def beaten_fraction(puzzle_id, seconds, buckets=None):
+    """
+    نسبة اللاعبين الذين كان وقتهم أبطأ من seconds.
+
+    Players in the same bucket are split linearly; None when the puzzle has
+    no completions.
+    """
+    buckets = histogram(puzzle_id) if buckets is None else buckets
+    total = sum(count for _, count in buckets)
+    if not total:
+        return None
+    own = bucket_for(seconds)
+    slower = 0.0
+    for bucket, count in buckets:
+        if bucket > own:
+            slower += count
+        elif bucket == own:
+            lower, upper = bucket_bounds(bucket)
+            if upper is not None:
+                slower += count * (upper - seconds) / (upper - lower)
+    return slower / total
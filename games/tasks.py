@@ -0,0 +1,38 @@
+"""
+Background tasks for the games app
+المهام الخلفية لتطبيق الألعاب
+"""
+
+from celery import shared_task
+from django.core.files.storage import default_storage
+
+from games import analytics, live, schedule, tiles
+from games.models import PuzzleGame
+
+
+@shared_task(ignore_result=True)
+def snapshot_live_leaderboards():
+    """حفظ اللوحات المباشرة في قاعدة البيانات"""
+    live.snapshot_all()
+
+
+@shared_task(ignore_result=True)
+def generate_puzzle_tiles(puzzle_id):
+    """تجهيز قطع البازل والصورة المصغرة"""
+    puzzle = PuzzleGame.objects.filter(pk=puzzle_id).first()
+    if puzzle is None or not puzzle.original_image:
+        return
+    if default_storage.exists(puzzle.original_image.name):
+        tiles.generate_tiles(puzzle)
+
+
+@shared_task(ignore_result=True)
+def prepare_daily_content():
+    """تجهيز محتوى الأيام القادمة قبل منتصف الليل"""
+    schedule.prepare_upcoming()
+
+
+@shared_task(ignore_result=True)
+def check_prize_drift():
+    """فحص انحراف توزيع جوائز العجلات"""
+    analytics.check_drift()
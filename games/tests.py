@@ -1,3 +1,769 @@
-from django.test import TestCase
+import io
+import itertools
+import random
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from games import analytics, live, routing, sampling, schedule, scoring, services, sessions, stats, tiles
+from games.board import Board, neighbours as board_neighbours
+from games.models import (
+    WHEEL_POINTS_PER_SPIN,
+    DailyContentSchedule,
+    Leaderboard,
+    PuzzleAttempt,
+    PuzzleGame,
+    PuzzleTileSet,
+    PuzzleTimeBucket,
+    ScoreEvent,
+    ScoreRollup,
+    WheelOfFortune,
+    WheelPrizeRollup,
+    WheelSpin,
+)
+from skydesign.testing import ConcurrentTestCase
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+SEGMENTS = [
+    {'id': 1, 'text': '50 نقطة', 'weight': 50, 'prize_type': 'points', 'prize_value': 50},
+    {'id': 2, 'text': 'حظ أوفر', 'weight': 50, 'prize_type': 'nothing', 'prize_value': 0},
+]
+
+
+class WheelSpinTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        self.user = User.objects.create(username='player', email='player@example.com', name='Player')
+        self.wheel = WheelOfFortune.objects.create(segments=SEGMENTS, max_spins_per_day=2)
+
+    def test_daily_limit(self):
+        url = reverse('games:wheel-spin', args=[self.wheel.pk])
+        self.api.force_authenticate(self.user)
+
+        self.assertEqual(self.api.post(url).data['spins_left'], 1)
+        self.assertEqual(self.api.post(url).data['spins_left'], 0)
+        self.assertEqual(self.api.post(url).status_code, 429)
+
+        self.wheel.refresh_from_db()
+        self.assertEqual(self.wheel.total_spins, 2)
+        self.assertEqual(WheelSpin.objects.count(), 2)
+
+    def test_counter_is_reseeded_from_the_database(self):
+        services.spin_wheel(self.wheel, self.user)
+        cache.clear()
+        services.spin_wheel(self.wheel, self.user)
+        with self.assertRaises(services.SpinLimitReached):
+            services.spin_wheel(self.wheel, self.user)
+
+    def test_inactive_wheel(self):
+        self.wheel.is_active = False
+        with self.assertRaises(services.WheelUnavailable):
+            services.spin_wheel(self.wheel, self.user)
+
+
+class AliasSamplerTests(TestCase):
+
+    def test_matches_weights(self):
+        weights = [30, 5, 20, 45, 0]
+        sampler = sampling.AliasSampler(weights, rng=random.Random(7))
+        draws = 100_000
+        counts = [0] * len(weights)
+        for _ in range(draws):
+            counts[sampler.sample()] += 1
+
+        self.assertEqual(counts[4], 0)
+        expected = [draws * w / sum(weights) for w in weights[:4]]
+        chi_square = sum((c - e) ** 2 / e for c, e in zip(counts, expected))
+        # Critical value for 3 degrees of freedom at p = 0.001
+        self.assertLess(chi_square, 16.27)
+
+    def test_weights_are_validated_on_save(self):
+        for segments in (
+            [{'weight': -1}],
+            [{'weight': 'heavy'}],
+            [{'weight': 0}, {'weight': 0}],
+            [{'weight': float('nan')}],
+        ):
+            with self.assertRaises(ValidationError) as ctx:
+                WheelOfFortune.objects.create(segments=segments)
+            self.assertIn('segments', ctx.exception.message_dict)
+
+    def test_sampler_is_rebuilt_when_segments_change(self):
+        wheel = WheelOfFortune.objects.create(segments=SEGMENTS)
+        self.assertIs(sampling.get_sampler(wheel), sampling.get_sampler(wheel))
+
+        wheel.segments = [{'id': 3, 'weight': 1, 'prize_type': 'nothing', 'prize_value': 0}]
+        wheel.save()
+        self.assertEqual(wheel.choose_segment()['id'], 3)
+
+
+@override_settings(LIVE_LEADERBOARD_PUSH=False)
+class LeaderboardTests(TestCase):
+
+    def setUp(self):
+        live._store = live.MemoryStore()
+        self.users = [
+            User.objects.create(username=f'player{i}', email=f'player{i}@example.com', name=f'P{i}')
+            for i in range(4)
+        ]
+        self.puzzle = PuzzleGame.objects.create(title='Puzzle', original_image='puzzles/p.png')
+        self.wheel = WheelOfFortune.objects.create(segments=SEGMENTS)
+        for user, points in zip(self.users, [30, 50, 30, 10]):
+            attempt = PuzzleAttempt.objects.create(
+                puzzle=self.puzzle, user=user, is_completed=True,
+                points_earned=points, completion_time=points * 2,
+            )
+            scoring.record_event(
+                user.pk, 'puzzle', points, source_id=attempt.pk, completion_time=points * 2
+            )
+
+    def board(self, game_type, period='daily'):
+        return list(
+            Leaderboard.objects.filter(game_type=game_type, period=period)
+            .order_by('rank', 'user__username')
+            .values_list('user__username', 'rank', 'score')
+        )
+
+    def test_ranks_with_ties(self):
+        # One upsert and one delete, plus the savepoint pair
+        with self.assertNumQueries(4):
+            self.assertEqual(Leaderboard.update_leaderboard('puzzle', 'daily'), 4)
+        self.assertEqual(self.board('puzzle'), [
+            ('player1', 1, 50), ('player0', 2, 30), ('player2', 2, 30), ('player3', 4, 10),
+        ])
+
+    def test_refresh_updates_and_drops_players(self):
+        Leaderboard.update_leaderboard('puzzle', 'daily')
+        scoring.record_event(self.users[3].pk, 'puzzle', 90, source_id='bonus')
+        ScoreEvent.objects.filter(user=self.users[1]).delete()
+        scoring.rebuild_rollups()
+
+        Leaderboard.update_leaderboard('puzzle', 'daily')
+        self.assertEqual(self.board('puzzle'), [
+            ('player3', 1, 100), ('player0', 2, 30), ('player2', 2, 30),
+        ])
+
+    def test_overall_combines_games(self):
+        for _ in range(3):
+            spin = WheelSpin.objects.create(wheel=self.wheel, user=self.users[3], prize_type='nothing')
+            scoring.record_event(self.users[3].pk, 'wheel', WHEEL_POINTS_PER_SPIN, source_id=spin.pk)
+        Leaderboard.update_leaderboard('overall', 'weekly')
+        entry = Leaderboard.objects.get(game_type='overall', user=self.users[3])
+        self.assertEqual((entry.score, entry.games_played, entry.rank), (40, 4, 2))
+        self.assertEqual(entry.best_time, 20)
+
+    def test_events_are_recorded_once(self):
+        attempt = PuzzleAttempt.objects.get(user=self.users[0])
+        self.assertIsNone(scoring.record_event(self.users[0].pk, 'puzzle', 30, source_id=attempt.pk))
+        rollup = ScoreRollup.objects.get(user=self.users[0], game_type='puzzle', period='alltime')
+        self.assertEqual((rollup.score, rollup.games), (30, 1))
+
+    def test_snapshot_seeds_an_empty_store_from_rollups(self):
+        Leaderboard.update_leaderboard('puzzle', 'alltime')
+        # A restarted store that has only seen one score since
+        live._store = live.MemoryStore()
+        live.record_score(self.users[3].pk, 'puzzle', 5)
+
+        self.assertEqual(live.snapshot('puzzle', 'alltime'), 4)
+        self.assertEqual(self.board('puzzle', 'alltime'), [
+            ('player1', 1, 50), ('player0', 2, 30), ('player2', 2, 30), ('player3', 4, 10),
+        ])
+        self.assertEqual(live.seed('puzzle', 'alltime'), 0)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        scoring.record_event(self.users[2].pk, 'wheel', 10, source_id='spin-1')
+        fields = ('user_id', 'game_type', 'period', 'period_start', 'score', 'games', 'best_time')
+        incremental = set(ScoreRollup.objects.values_list(*fields))
+        self.assertEqual(len(incremental), 4 * 10 + 5)
+        scoring.rebuild_rollups()
+        self.assertEqual(set(ScoreRollup.objects.values_list(*fields)), incremental)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class LiveLeaderboardTests(TestCase):
+
+    def setUp(self):
+        live._store = live.MemoryStore()
+        self.users = [
+            User.objects.create(username=f'player{i}', email=f'player{i}@example.com', name=f'P{i}')
+            for i in range(6)
+        ]
+        for user, points in zip(self.users, [10, 60, 30, 30, 50, 20]):
+            live.record_score(user.pk, 'puzzle', points)
+
+    def test_rank_queries(self):
+        self.assertEqual(
+            [entry['score'] for entry in live.top('puzzle', 'daily', 3)], [60, 50, 30]
+        )
+        self.assertEqual(live.rank_of('overall', 'weekly', self.users[4].pk)['rank'], 2)
+        self.assertIsNone(live.rank_of('wheel', 'daily', self.users[4].pk))
+
+        around = live.around('puzzle', 'daily', self.users[5].pk, radius=1)
+        self.assertEqual([entry['rank'] for entry in around], [4, 5, 6])
+        self.assertEqual(around[1]['user_id'], str(self.users[5].pk))
+
+    def test_completed_puzzle_updates_the_board(self):
+        puzzle = PuzzleGame.objects.create(title='Puzzle', original_image='puzzles/p.png', points_reward=100)
+        attempt = PuzzleAttempt.objects.create(
+            puzzle=puzzle, user=self.users[0], game_state={'board': Board.solved(4).hex()}
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            attempt.complete()
+
+        me = live.rank_of('puzzle', 'daily', self.users[0].pk)
+        self.assertEqual(me['rank'], 1)
+        self.assertEqual(me['score'], 10 + attempt.points_earned)
+
+    def test_snapshot(self):
+        Leaderboard.update_leaderboard('puzzle', 'daily')
+        self.assertEqual(live.snapshot('puzzle', 'daily'), 6)
+        ranks = dict(
+            Leaderboard.objects.filter(game_type='puzzle', period='daily')
+            .values_list('user__username', 'rank')
+        )
+        self.assertEqual(ranks, {
+            'player1': 1, 'player4': 2, 'player2': 3, 'player3': 3, 'player5': 5, 'player0': 6,
+        })
+
+    async def test_websocket_pushes_updates(self):
+        communicator = WebsocketCommunicator(
+            URLRouter(routing.websocket_urlpatterns), '/ws/leaderboard/puzzle/daily/'
+        )
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        standings = await communicator.receive_json_from()
+        self.assertEqual(standings['top'][0]['score'], 60)
+
+        await sync_to_async(live.record_score)(self.users[0].pk, 'puzzle', 100)
+        update = await communicator.receive_json_from()
+        self.assertEqual(
+            (update['type'], update['rank'], update['score']), ('update', 1, 110)
+        )
+        await communicator.disconnect()
+
+    async def test_websocket_survives_malformed_frames(self):
+        communicator = WebsocketCommunicator(
+            URLRouter(routing.websocket_urlpatterns), '/ws/leaderboard/puzzle/daily/'
+        )
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()
+
+        for frame in ('{not json', '[1, 2]', '42'):
+            await communicator.send_to(text_data=frame)
+            self.assertEqual((await communicator.receive_json_from())['type'], 'error')
+        await communicator.send_json_to({'action': 'refresh'})
+        self.assertEqual((await communicator.receive_json_from())['type'], 'standings')
+        await communicator.disconnect()
+
+
+@override_settings(LIVE_LEADERBOARD_PUSH=False)
+class ConcurrentSpinTests(ConcurrentTestCase):
+
+    def test_hundreds_of_simultaneous_spins(self):
+        cache.clear()
+        users = [
+            User.objects.create(username=f'player{i}', email=f'player{i}@example.com', name=f'P{i}')
+            for i in range(20)
+        ]
+        wheel = WheelOfFortune.objects.create(segments=SEGMENTS, max_spins_per_day=3)
+        attempts = 300
+        barrier = threading.Barrier(attempts)
+        outcomes = []
+        lock = threading.Lock()
+
+        def attempt(user):
+            outcome = 'error'
+            barrier.wait()
+            try:
+                services.spin_wheel(wheel, user)
+                outcome = 'spun'
+            except services.SpinLimitReached:
+                outcome = 'limited'
+            finally:
+                connection.close()
+                with lock:
+                    outcomes.append(outcome)
+
+        threads = [
+            threading.Thread(target=attempt, args=(users[i % len(users)],))
+            for i in range(attempts)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(outcomes.count('spun'), 60)
+        self.assertEqual(outcomes.count('limited'), attempts - 60)
+        self.assertEqual(WheelSpin.objects.count(), 60)
+        wheel.refresh_from_db()
+        self.assertEqual(wheel.total_spins, 60)
+        self.assertEqual(
+            wheel.total_prizes_given,
+            WheelSpin.objects.exclude(prize_type='nothing').count()
+        )
+
+
+class PuzzleStatsTests(TestCase):
+
+    def setUp(self):
+        self.puzzle = PuzzleGame.objects.create(title='Puzzle', original_image='puzzles/p.png')
+
+    def test_statistics_use_sum_count_and_min(self):
+        stale = PuzzleGame.objects.get(pk=self.puzzle.pk)
+        for seconds in (40, 20, 60):
+            # A stale instance must not overwrite the stored counters
+            stale.update_statistics(seconds)
+
+        self.puzzle.refresh_from_db()
+        self.assertEqual(self.puzzle.total_completions, 3)
+        self.assertEqual(self.puzzle.total_plays, 3)
+        self.assertEqual(self.puzzle.total_time, 120)
+        self.assertEqual(self.puzzle.average_time, 40)
+        self.assertEqual(self.puzzle.best_time, 20)
+
+    def test_histogram_percentiles(self):
+        for seconds in range(1, 101):
+            self.puzzle.update_statistics(seconds)
+
+        self.assertEqual(sum(count for _, count in stats.histogram(self.puzzle.pk)), 100)
+        self.assertLess(PuzzleTimeBucket.objects.filter(puzzle=self.puzzle).count(), 20)
+        self.assertAlmostEqual(stats.percentile(self.puzzle.pk, 50), 50, delta=5)
+        self.assertAlmostEqual(stats.percentile(self.puzzle.pk, 90), 90, delta=5)
+        self.assertAlmostEqual(stats.beaten_fraction(self.puzzle.pk, 25), 0.75, delta=0.03)
+        self.assertIsNone(stats.percentile(PuzzleGame.objects.create(title='Empty', original_image='p.png').pk, 50))
+
+    def test_attempt_completes_once(self):
+        user = User.objects.create(username='player', email='player@example.com', name='Player')
+        attempt = PuzzleAttempt.objects.create(
+            puzzle=self.puzzle, user=user, game_state={'board': Board.solved(4).hex()}
+        )
+        stale = PuzzleAttempt.objects.get(pk=attempt.pk)
+
+        self.assertTrue(attempt.complete())
+        self.assertFalse(stale.complete())
+
+        self.puzzle.refresh_from_db()
+        user.refresh_from_db()
+        self.assertEqual(self.puzzle.total_completions, 1)
+        self.assertEqual(user.points, attempt.points_earned)
+
+    def test_stats_endpoint(self):
+        for seconds in (30, 45, 120):
+            self.puzzle.update_statistics(seconds)
+
+        response = APIClient().get(
+            reverse('games:puzzle-stats', args=[self.puzzle.pk]), {'time': 40}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_completions'], 3)
+        self.assertEqual(response.data['best_time'], 30)
+        self.assertAlmostEqual(response.data['beaten_percent'], 66.7, delta=5)
+
+        for seconds in ('nan', 'inf', '-5', 'soon'):
+            response = APIClient().get(
+                reverse('games:puzzle-stats', args=[self.puzzle.pk]), {'time': seconds}
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+class ConcurrentPuzzleStatsTests(ConcurrentTestCase):
+
+    def test_simultaneous_completions_are_all_counted(self):
+        puzzle = PuzzleGame.objects.create(title='Puzzle', original_image='puzzles/p.png')
+        finishes = 40
+        barrier = threading.Barrier(finishes)
+
+        def finish(seconds):
+            barrier.wait()
+            try:
+                puzzle.update_statistics(seconds)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=finish, args=(10 + i,)) for i in range(finishes)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        puzzle.refresh_from_db()
+        self.assertEqual(puzzle.total_completions, finishes)
+        self.assertEqual(puzzle.total_time, sum(10 + i for i in range(finishes)))
+        self.assertEqual(puzzle.best_time, 10)
+        self.assertEqual(sum(count for _, count in stats.histogram(puzzle.pk)), finishes)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PuzzleTileTests(TestCase):
+
+    def save_image(self, name, size=(1200, 900)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, '#F97316').save(buffer, 'JPEG')
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def test_sheets_are_rendered_once_per_picture(self):
+        name = self.save_image('puzzles/originals/cat.jpg')
+        first = PuzzleGame.objects.create(title='Cat', original_image=name)
+        second = PuzzleGame.objects.create(title='Cat again', original_image=name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.save()
+        tiles.generate_tiles(second)
+
+        self.assertEqual(PuzzleTileSet.objects.count(), len(settings.PUZZLE_TILE_GRID_SIZES))
+        first.refresh_from_db()
+        self.assertTrue(first.thumbnail)
+        self.assertEqual(first.image_hash, second.image_hash)
+
+        manifest = PuzzleTileSet.objects.get(source_hash=first.image_hash, grid_size=4).manifest
+        self.assertEqual(len(manifest['tiles']), 16)
+        self.assertEqual(manifest['tiles'][5], [manifest['tile_size'] + 2, manifest['tile_size'] + 2])
+        with Image.open(default_storage.open(
+            PuzzleTileSet.objects.get(source_hash=first.image_hash, grid_size=4).sprite.name
+        )) as sheet:
+            self.assertEqual(sheet.size, (manifest['width'], manifest['height']))
+
+    def test_endpoint_queues_missing_tiles_then_serves_from_cache(self):
+        cache.clear()
+        puzzle = PuzzleGame.objects.create(title='Dog', original_image=self.save_image('puzzles/originals/dog.png'))
+        url = reverse('games:puzzle-tiles', args=[puzzle.pk, 3])
+
+        with mock.patch('games.views.generate_puzzle_tiles.delay') as delay:
+            response = APIClient().get(url)
+        self.assertEqual(response.status_code, 202)
+        delay.assert_called_once_with(puzzle.pk)
+        self.assertFalse(PuzzleTileSet.objects.exists())
+
+        tiles.generate_tiles(puzzle)
+        response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['grid_size'], 3)
+        self.assertEqual(len(response.data['tiles']), 9)
+        self.assertIsNotNone(response.data['thumbnail'])
+
+        puzzle.refresh_from_db()
+        with self.assertNumQueries(0):
+            self.assertEqual(tiles.get_tiles(puzzle, 3)['sprite'], response.data['sprite'])
+        self.assertEqual(APIClient().get(reverse('games:puzzle-tiles', args=[puzzle.pk, 9])).status_code, 404)
+
+
+@override_settings(
+    PUZZLE_AUTOSAVE_SECONDS=60,
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+)
+class PuzzleSessionTests(TransactionTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='player', email='player@example.com', name='Player')
+        self.puzzle = PuzzleGame.objects.create(title='Puzzle', original_image='puzzles/p.png', difficulty='easy')
+        self.attempt = PuzzleAttempt.objects.create(puzzle=self.puzzle, user=self.user)
+
+    async def connect(self):
+        communicator = WebsocketCommunicator(
+            URLRouter(routing.websocket_urlpatterns), f'/ws/puzzle/{self.attempt.pk}/'
+        )
+        communicator.scope['user'] = self.user
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator, await communicator.receive_json_from()
+
+    async def test_moves_are_coalesced_and_resumed(self):
+        communicator, state = await self.connect()
+        self.assertEqual((state['seq'], state['grid_size']), (0, 3))
+
+        board = Board.from_hex(3, state['board'])
+        previous = None
+        for seq in range(1, 31):
+            cell = min(c for c in board_neighbours(3)[board.blank] if c != previous)
+            previous = board.blank
+            board.move(cell)
+            await communicator.send_json_to({'type': 'move', 'seq': seq, 'moves': [cell]})
+            self.assertEqual((await communicator.receive_json_from())['seq'], seq)
+
+        # Nothing is written per move
+        attempt = await sync_to_async(PuzzleAttempt.objects.get)(pk=self.attempt.pk)
+        self.assertEqual((attempt.game_state, attempt.moves_count), ({}, 0))
+
+        await communicator.disconnect()
+        attempt = await sync_to_async(PuzzleAttempt.objects.get)(pk=self.attempt.pk)
+        self.assertEqual(attempt.game_state, {'board': board.hex(), 'seq': 30})
+        self.assertEqual(attempt.moves_count, 30)
+
+        communicator, state = await self.connect()
+        self.assertEqual((state['board'], state['seq'], state['moves_count']), (board.hex(), 30, 30))
+
+        # A frame resent after reconnecting is ignored
+        await communicator.send_json_to({'type': 'move', 'seq': 30, 'moves': [board.blank]})
+        self.assertEqual((await communicator.receive_json_from())['seq'], 30)
+        await communicator.disconnect()
+
+    async def test_illegal_moves_are_rejected(self):
+        communicator, state = await self.connect()
+        board = Board.from_hex(3, state['board'])
+        far = next(c for c in range(9) if c != board.blank and c not in board_neighbours(3)[board.blank])
+        await communicator.send_json_to({'type': 'move', 'seq': 1, 'moves': [far]})
+        self.assertEqual((await communicator.receive_json_from())['type'], 'error')
+        await communicator.disconnect()
+
+    async def test_only_a_solved_board_completes(self):
+        board = Board.solved(3)
+        board.move(5)
+        await sync_to_async(PuzzleAttempt.objects.filter(pk=self.attempt.pk).update)(
+            game_state={'board': board.hex(), 'seq': 0},
+            started_at=timezone.now() - timedelta(minutes=1),
+        )
+
+        communicator, _ = await self.connect()
+        await communicator.send_json_to({'type': 'complete'})
+        self.assertFalse((await communicator.receive_json_from())['completed'])
+
+        communicator, _ = await self.connect()
+        await communicator.send_json_to({'type': 'move', 'seq': 1, 'moves': [8]})
+        await communicator.receive_json_from()
+        await communicator.send_json_to({'type': 'complete'})
+        self.assertTrue((await communicator.receive_json_from())['completed'])
+
+    async def test_malformed_frames_get_an_error(self):
+        communicator, _ = await self.connect()
+        for frame in ('{not json', '[1, 2]'):
+            await communicator.send_to(text_data=frame)
+            self.assertEqual((await communicator.receive_json_from())['type'], 'error')
+        await communicator.disconnect()
+
+    def test_other_players_attempt_is_refused(self):
+        other = User.objects.create(username='other', email='other@example.com', name='Other')
+        self.assertIsNone(sessions.load_session(self.attempt.pk, other))
+
+    def test_moves_during_a_save_are_not_lost(self):
+        session = sessions.load_session(self.attempt.pk, self.user)
+        snapshot = session.snapshot()
+        self.assertIsNone(session.snapshot())
+
+        # A move lands while the snapshot is being written
+        session.apply(1, [min(board_neighbours(3)[session.board.blank])])
+        self.assertTrue(sessions.save_snapshot(session, snapshot))
+        self.assertTrue(session.dirty)
+
+        self.assertTrue(sessions.save_session(session))
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.game_state, session.state())
+        self.assertEqual(self.attempt.moves_count, 1)
+
+
+class BoardTests(TestCase):
+
+    def test_solvability_matches_reachability(self):
+        # Every 2x2 arrangement reachable from solved by sliding, by search
+        reachable = {Board.solved(2).hex()}
+        frontier = [Board.solved(2)]
+        while frontier:
+            board = frontier.pop()
+            for cell in board_neighbours(2)[board.blank]:
+                following = Board(2, board.cells)
+                following.move(cell)
+                if following.hex() not in reachable:
+                    reachable.add(following.hex())
+                    frontier.append(following)
+
+        for cells in itertools.permutations(range(4)):
+            board = Board(2, cells)
+            self.assertEqual(board.is_solvable(), board.hex() in reachable)
+        self.assertEqual(len(reachable), 12)
+
+    def test_shuffled_boards_are_solvable_and_moves_are_checked(self):
+        rng = random.Random(3)
+        for grid_size in (3, 4, 5, 6):
+            board = Board.shuffled(grid_size, rng)
+            self.assertTrue(board.is_solvable())
+            self.assertFalse(board.is_solved())
+
+        board = Board.solved(4)
+        self.assertFalse(board.move(0))
+        self.assertTrue(board.apply([14, 10, 11, 15]))
+        before = board.hex()
+        self.assertFalse(board.apply([11, 3]))
+        self.assertEqual(board.hex(), before)
+
+    def test_unsolved_attempt_cannot_complete(self):
+        user = User.objects.create(username='player', email='player@example.com', name='Player')
+        puzzle = PuzzleGame.objects.create(title='Puzzle', original_image='puzzles/p.png')
+        attempt = PuzzleAttempt.objects.create(
+            puzzle=puzzle, user=user, game_state={'board': Board.shuffled(4).hex()}
+        )
+        self.assertFalse(attempt.complete())
+        self.assertFalse(PuzzleAttempt.objects.create(puzzle=puzzle, user=user).complete())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class DailyScheduleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        schedule.clear_local()
+        self.today = date(2026, 10, 19)
+        self.evening = timezone.make_aware(datetime(2026, 10, 19, 23, 59))
+        self.always = WheelOfFortune.objects.create(title='Always', segments=SEGMENTS)
+        self.campaign = WheelOfFortune.objects.create(
+            title='Campaign', segments=SEGMENTS,
+            start_date=timezone.make_aware(datetime(2026, 10, 20, 12, 0)),
+        )
+        buffer = io.BytesIO()
+        Image.new('RGB', (600, 600), '#22C55E').save(buffer, 'JPEG')
+        name = default_storage.save('puzzles/originals/daily.jpg', ContentFile(buffer.getvalue()))
+        self.puzzles = [
+            PuzzleGame.objects.create(
+                title=f'Day {day}', original_image=name, is_daily=True, active_date=day
+            )
+            for day in (self.today, self.today + timedelta(days=1))
+        ]
+
+    def test_upcoming_days_are_resolved_and_warmed(self):
+        entries = schedule.prepare_upcoming(now=self.evening)
+
+        self.assertEqual([e.date for e in entries], [self.today, self.today + timedelta(days=1)])
+        self.assertEqual([e.wheel for e in entries], [self.always, self.campaign])
+        self.assertEqual([e.puzzle for e in entries], self.puzzles)
+        self.assertEqual(DailyContentSchedule.objects.count(), 2)
+        self.assertTrue(PuzzleTileSet.objects.filter(grid_size=4).exists())
+
+        tomorrow = schedule.get_day(self.today + timedelta(days=1), now=self.evening)
+        self.assertEqual(tomorrow['wheel']['title'], 'Campaign')
+        self.assertIsNotNone(tomorrow['puzzle']['thumbnail'])
+
+    def test_requests_are_served_from_memory_until_midnight(self):
+        schedule.prepare_upcoming(now=self.evening)
+        first = schedule.get_day(now=self.evening)
+        with self.assertNumQueries(0):
+            self.assertEqual(schedule.get_day(now=self.evening), first)
+            self.assertEqual(first['puzzle']['title'], 'Day 2026-10-19')
+
+            after_midnight = self.evening + timedelta(minutes=2)
+            self.assertEqual(schedule.get_day(now=after_midnight)['puzzle']['title'], 'Day 2026-10-20')
+
+    def test_unscheduled_day_is_resolved_without_writing(self):
+        with CaptureQueriesContext(connection) as queries:
+            day = schedule.get_day(now=self.evening)
+        self.assertEqual(day['puzzle']['title'], 'Day 2026-10-19')
+        self.assertEqual(day['wheel']['title'], 'Always')
+        self.assertFalse(DailyContentSchedule.objects.exists())
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries.captured_queries))
+
+    def test_edits_queue_the_schedule_task(self):
+        with mock.patch('games.tasks.prepare_daily_content.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.always.title = 'Renamed'
+                self.always.save()
+        delay.assert_called_once_with()
+        self.assertFalse(DailyContentSchedule.objects.exists())
+
+    def test_today_endpoint(self):
+        response = APIClient().get(reverse('games:today'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('wheel', response.data)
+
+
+class PrizeAnalyticsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='player', email='player@example.com', name='Player')
+        self.manager = User.objects.create(
+            username='manager', email='manager@example.com', name='Manager', role='MANAGER'
+        )
+        self.wheel = WheelOfFortune.objects.create(title='Wheel', segments=SEGMENTS, max_spins_per_day=100)
+        self.today = timezone.localdate()
+
+    def seed(self, points, nothing):
+        for segment_id, prize_type, spins in (('1', 'points', points), ('2', 'nothing', nothing)):
+            WheelPrizeRollup.objects.create(
+                wheel=self.wheel, date=self.today, segment_id=segment_id, prize_type=prize_type, spins=spins
+            )
+
+    def test_chi_square_survival_function(self):
+        self.assertAlmostEqual(analytics.chi_square_sf(3.841459, 1), 0.05, places=5)
+        self.assertAlmostEqual(analytics.chi_square_sf(11.0705, 5), 0.05, places=4)
+        self.assertAlmostEqual(analytics.chi_square_sf(2.0, 2), 0.367879, places=5)
+        self.assertAlmostEqual(analytics.chi_square_sf(50.0, 10), 2.67e-07, delta=1e-08)
+
+    def test_spins_and_claims_roll_up_as_they_happen(self):
+        spins = [services.spin_wheel(self.wheel, self.user)[0] for _ in range(20)]
+        for spin in spins:
+            spin.claim_prize()
+
+        points = sum(1 for spin in spins if spin.prize_type == 'points')
+        rollups = {r.prize_type: r for r in WheelPrizeRollup.objects.filter(wheel=self.wheel)}
+        self.assertEqual(sum(r.spins for r in rollups.values()), 20)
+        if points:
+            self.assertEqual(rollups['points'].claims, points)
+            self.assertEqual(rollups['points'].claimed_value, Decimal(50 * points))
+
+        before = sorted(WheelPrizeRollup.objects.values_list('segment_id', 'spins', 'claims', 'claimed_value'))
+        call_command('rebuild_prize_rollups', stdout=io.StringIO())
+        after = sorted(WheelPrizeRollup.objects.values_list('segment_id', 'spins', 'claims', 'claimed_value'))
+        self.assertEqual(before, after)
+
+    def test_distribution_reads_only_rollups(self):
+        self.seed(points=105, nothing=95)
+        with self.assertNumQueries(1):
+            report = analytics.distribution(self.wheel, self.today, self.today)
+
+        self.assertEqual(report['total_spins'], 200)
+        self.assertEqual([s['expected'] for s in report['segments']], [100, 100])
+        self.assertEqual(report['chi_square']['df'], 1)
+        self.assertFalse(report['chi_square']['drift'])
+
+    def test_too_few_spins_are_not_tested(self):
+        self.seed(points=3, nothing=0)
+        report = analytics.distribution(self.wheel, self.today, self.today)
+        self.assertIsNone(report['chi_square']['p_value'])
+        self.assertFalse(report['chi_square']['drift'])
+
+    @override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+    def test_drift_alerts_managers(self):
+        from django.core import mail
+
+        from chat.models import Notification
+
+        self.seed(points=160, nothing=40)
+        drifting = analytics.check_drift()
+
+        self.assertEqual([r['wheel'] for r in drifting], [str(self.wheel.pk)])
+        self.assertLess(drifting[0]['chi_square']['p_value'], 1e-10)
+        notification = Notification.objects.get(user=self.manager)
+        self.assertEqual(notification.priority, 'high')
+        self.assertFalse(Notification.objects.filter(user=self.user).exists())
+        self.assertEqual([m.to for m in mail.outbox], [['manager@example.com']])
+
+        # Still unread: the next runs do not alert again until it is read
+        self.assertEqual(len(analytics.check_drift()), 1)
+        self.assertEqual(Notification.objects.filter(user=self.manager).count(), 1)
+        notification.mark_as_read()
+        analytics.check_drift()
+        self.assertEqual(Notification.objects.filter(user=self.manager).count(), 2)
@@ -0,0 +1,177 @@
+"""
+Pre-sliced puzzle tiles
+تجهيز قطع البازل مسبقاً
+
+When a puzzle is saved, a Celery worker decodes its picture once, crops it
+square and renders, for every supported grid size, a WebP sprite sheet with
+the tiles laid out on a small gutter (so scaled tiles do not bleed into
+their neighbours), plus a manifest of tile offsets. Clients draw tile i from
+manifest['tiles'][i]; its solved position is i in row-major order. Sheets
+are keyed by the image's content hash and grid size, so puzzles sharing a
+picture share their sheets. The thumbnail is generated in the same pass.
+"""
+
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from PIL import Image, ImageOps
+
+from games.models import PuzzleGame, PuzzleTileSet
+from skydesign.cache import Namespace
+from skydesign.files import source_sha256
+
+
+# Keyed by content hash, so entries never need invalidating
+TILES = Namespace('games:tiles', timeout=60 * 60 * 24, versioned=False)
+
+
+def sprite_name(source_hash, grid_size):
+    return f"puzzles/tiles/{source_hash[:2]}/{source_hash}_{grid_size}.webp"
+
+
+def _cache_key(source_hash, grid_size):
+    return f"{source_hash}:{grid_size}"
+
+
+def _open_board(source):
+    """فتح الصورة وقصّها إلى مربع في المنتصف"""
+    image = Image.open(source)
+    # Let the JPEG decoder skip detail no sheet needs
+    image.draft('RGB', (settings.PUZZLE_BOARD_SIZE, settings.PUZZLE_BOARD_SIZE))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    side = min(image.size)
+    left = (image.width - side) // 2
+    top = (image.height - side) // 2
+    return image.crop((left, top, left + side, top + side))
+
+
+def render_sprite(board, grid_size):
+    """
+    رسم ورقة القطع لحجم شبكة واحد.
+
+    Returns (webp bytes, manifest).
+    """
+    tile = settings.PUZZLE_BOARD_SIZE // grid_size
+    gutter = settings.PUZZLE_TILE_GUTTER
+    scaled = board.resize((tile * grid_size, tile * grid_size), Image.LANCZOS)
+
+    side = tile * grid_size + gutter * (grid_size - 1)
+    sheet = Image.new('RGB', (side, side))
+    offsets = []
+    for index in range(grid_size * grid_size):
+        row, col = divmod(index, grid_size)
+        x, y = col * (tile + gutter), row * (tile + gutter)
+        sheet.paste(scaled.crop((col * tile, row * tile, (col + 1) * tile, (row + 1) * tile)), (x, y))
+        offsets.append([x, y])
+
+    buffer = io.BytesIO()
+    sheet.save(buffer, 'WEBP', quality=settings.PUZZLE_TILE_QUALITY, method=4)
+    manifest = {
+        'grid_size': grid_size,
+        'tile_size': tile,
+        'gutter': gutter,
+        'width': side,
+        'height': side,
+        'tiles': offsets,
+    }
+    return buffer.getvalue(), manifest
+
+
+def render_thumbnail(board):
+    thumb = board.copy()
+    thumb.thumbnail(settings.PUZZLE_THUMBNAIL_SIZE, Image.LANCZOS)
+    buffer = io.BytesIO()
+    thumb.save(buffer, 'WEBP', quality=settings.PUZZLE_TILE_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def _store(source_hash, grid_size, content, manifest):
+    name = sprite_name(source_hash, grid_size)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    try:
+        with transaction.atomic():
+            return PuzzleTileSet.objects.create(
+                source_hash=source_hash,
+                grid_size=grid_size,
+                sprite=name,
+                manifest=manifest,
+                size=len(content),
+            )
+    except IntegrityError:
+        return PuzzleTileSet.objects.get(source_hash=source_hash, grid_size=grid_size)
+
+
+def _payload(tile_set):
+    return {'sprite': tile_set.sprite.url, **tile_set.manifest}
+
+
+def generate_tiles(puzzle):
+    """
+    تجهيز أوراق القطع الناقصة والصورة المصغرة للعبة.
+
+    Returns the tile sets for every supported grid size.
+    """
+    name = puzzle.original_image.name
+    source_hash = source_sha256(name)
+    grid_sizes = settings.PUZZLE_TILE_GRID_SIZES
+
+    tile_sets = {
+        tile_set.grid_size: tile_set
+        for tile_set in PuzzleTileSet.objects.filter(source_hash=source_hash, grid_size__in=grid_sizes)
+    }
+    missing = [size for size in grid_sizes if size not in tile_sets]
+    # A new picture also needs a new thumbnail
+    needs_thumbnail = not puzzle.thumbnail or puzzle.image_hash != source_hash
+    updates = {'image_hash': source_hash}
+
+    if missing or needs_thumbnail:
+        with default_storage.open(name, 'rb') as source:
+            board = _open_board(source)
+        for grid_size in missing:
+            content, manifest = render_sprite(board, grid_size)
+            tile_sets[grid_size] = _store(source_hash, grid_size, content, manifest)
+        if needs_thumbnail:
+            puzzle.thumbnail.save(f"{source_hash}.webp", ContentFile(render_thumbnail(board)), save=False)
+            updates['thumbnail'] = puzzle.thumbnail.name
+
+    # update() rather than save(), so the post_save hook does not fire again
+    PuzzleGame.objects.filter(pk=puzzle.pk).update(**updates)
+    puzzle.image_hash = source_hash
+
+    for grid_size, tile_set in tile_sets.items():
+        TILES.set(_cache_key(source_hash, grid_size), _payload(tile_set))
+    return [tile_sets[size] for size in grid_sizes]
+
+
+def get_tiles(puzzle, grid_size, generate=True):
+    """
+    رابط ورقة القطع وخريطتها لحجم شبكة.
+
+    Looks in the cache, then the database, and renders inline on a miss
+    unless generate is False. Returns None for unsupported grid sizes, a
+    missing picture, or tiles not rendered yet when generate is False.
+    """
+    if grid_size not in settings.PUZZLE_TILE_GRID_SIZES or not puzzle.original_image:
+        return None
+
+    if puzzle.image_hash:
+        key = _cache_key(puzzle.image_hash, grid_size)
+        payload = TILES.get(key)
+        if payload:
+            return payload
+        tile_set = PuzzleTileSet.objects.filter(source_hash=puzzle.image_hash, grid_size=grid_size).first()
+        if tile_set is not None:
+            payload = _payload(tile_set)
+            TILES.set(key, payload)
+            return payload
+
+    if not generate or not default_storage.exists(puzzle.original_image.name):
+        return None
+    tile_sets = generate_tiles(puzzle)
+    return _payload(next(t for t in tile_sets if t.grid_size == grid_size))
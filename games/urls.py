@@ -4,5 +4,17 @@ from . import views
 app_name = 'games'
 
 urlpatterns = [
-    # API endpoints will be added here
-]
\ No newline at end of file
+    path('today/', views.TodayView.as_view(), name='today'),
+    path('wheels/<uuid:wheel_id>/spin/', views.WheelSpinView.as_view(), name='wheel-spin'),
+    path(
+        'puzzles/<uuid:puzzle_id>/tiles/<int:grid_size>/',
+        views.PuzzleTilesView.as_view(),
+        name='puzzle-tiles'
+    ),
+    path('puzzles/<uuid:puzzle_id>/stats/', views.PuzzleStatsView.as_view(), name='puzzle-stats'),
+    path(
+        'leaderboards/<slug:game_type>/<slug:period>/live/',
+        views.LiveLeaderboardView.as_view(),
+        name='live-leaderboard'
+    ),
+]
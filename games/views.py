@@ -1,3 +1,130 @@
-from django.shortcuts import render
+"""
+Games API views
+واجهات برمجة الألعاب
+"""
 
-# Create your views here.
+import math
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from games import live, schedule, services, stats, tiles
+from games.models import PuzzleGame, WheelOfFortune
+from games.tasks import generate_puzzle_tiles
+
+
+class TodayView(APIView):
+    """Today's wheel and daily puzzle, from the precomputed schedule"""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response(schedule.get_day())
+
+
+class WheelSpinView(APIView):
+    """Spin a wheel once, within the user's daily allowance"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, wheel_id):
+        wheel = get_object_or_404(WheelOfFortune, id=wheel_id)
+        try:
+            spin, spins_left = services.spin_wheel(
+                wheel,
+                request.user,
+                ip_address=request.META.get('REMOTE_ADDR'),
+            )
+        except services.SpinLimitReached as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        except services.WheelUnavailable as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_409_CONFLICT)
+
+        return Response({
+            'id': str(spin.id),
+            'result': spin.result,
+            'prize_type': spin.prize_type,
+            'prize_value': spin.prize_value,
+            'spins_left': spins_left,
+        }, status=status.HTTP_201_CREATED)
+
+
+class LiveLeaderboardView(APIView):
+    """Current standings from the live board, plus the caller's neighbourhood"""
+    permission_classes = [AllowAny]
+
+    def get(self, request, game_type, period):
+        if game_type not in live.GAME_TYPES or period not in live.LIVE_PERIODS:
+            return Response({'detail': 'Unknown leaderboard'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 100)
+        except ValueError:
+            limit = 10
+
+        data = {'top': live.top(game_type, period, limit), 'me': None, 'around': []}
+        if request.user.is_authenticated:
+            data['me'] = live.rank_of(game_type, period, request.user.pk)
+            data['around'] = live.around(game_type, period, request.user.pk)
+        return Response(data)
+
+
+class PuzzleStatsView(APIView):
+    """Puzzle statistics, completion-time percentiles and how a time ranks"""
+    permission_classes = [AllowAny]
+
+    def get(self, request, puzzle_id):
+        puzzle = get_object_or_404(PuzzleGame, id=puzzle_id)
+        buckets = stats.histogram(puzzle.pk)
+
+        data = {
+            'total_plays': puzzle.total_plays,
+            'total_completions': puzzle.total_completions,
+            'average_time': puzzle.average_time,
+            'best_time': puzzle.best_time,
+            'percentiles': {
+                f'p{p}': stats.percentile(puzzle.pk, p, buckets) for p in (25, 50, 75, 90)
+            },
+        }
+
+        seconds = request.query_params.get('time')
+        if seconds is not None:
+            try:
+                seconds = float(seconds)
+            except ValueError:
+                seconds = math.nan
+            if not math.isfinite(seconds) or seconds < 0:
+                return Response({'detail': 'time must be a number of seconds'}, status=status.HTTP_400_BAD_REQUEST)
+            beaten = stats.beaten_fraction(puzzle.pk, seconds, buckets)
+            data['beaten_percent'] = None if beaten is None else round(beaten * 100, 1)
+        return Response(data)
+
+
+class PuzzleTilesView(APIView):
+    """
+    Sprite sheet URL and tile manifest for one grid size.
+
+    Tiles not rendered yet are queued for rendering and answered with 202;
+    retry shortly.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, puzzle_id, grid_size):
+        puzzle = get_object_or_404(PuzzleGame, id=puzzle_id, is_active=True)
+        if grid_size not in settings.PUZZLE_TILE_GRID_SIZES or not puzzle.original_image:
+            return Response({'detail': 'No tiles for this grid size'}, status=status.HTTP_404_NOT_FOUND)
+        payload = tiles.get_tiles(puzzle, grid_size, generate=False)
+        if payload is None:
+            if not default_storage.exists(puzzle.original_image.name):
+                return Response({'detail': 'No tiles for this grid size'}, status=status.HTTP_404_NOT_FOUND)
+            generate_puzzle_tiles.delay(puzzle.pk)
+            response = Response({'detail': 'جاري تجهيز القطع'}, status=status.HTTP_202_ACCEPTED)
+            response['Retry-After'] = '5'
+            return response
+        return Response({
+            **payload,
+            'thumbnail': puzzle.thumbnail.url if puzzle.thumbnail else None,
+        })
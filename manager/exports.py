@@ -0,0 +1,209 @@
+"""
+Streaming exports for manager reports
+تصدير تقارير المدير بشكل متدفق
+
+Rows are read with QuerySet.iterator() as plain tuples and written out one
+at a time, so memory stays flat however many requests are exported and the
+first bytes of a CSV reach the client straight away. Requests moved to the
+cold archive are read from its report columns and merged in, so exports
+cover every request however old. XLSX is written with openpyxl in
+write-only mode.
+"""
+
+import csv
+import heapq
+import uuid
+from collections import defaultdict
+from datetime import datetime, time
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from designs.models import ArchivedDesignRequest, DesignRequest
+
+try:
+    import openpyxl
+except ImportError:  # listed in requirements.txt; CSV still works without it
+    openpyxl = None
+
+
+CHUNK_SIZE = 2000
+
+REQUEST_COLUMNS = [
+    ('رقم الطلب', 'request_number'),
+    ('تاريخ الإنشاء', 'created_at'),
+    ('الحالة', 'status'),
+    ('العميل', 'client__name'),
+    ('الفئة', 'category__name'),
+    ('المصمم', 'assigned_designer__name'),
+    ('مستوى الجودة', 'quality_level'),
+    ('الاستعجال', 'urgency'),
+    ('السعر الإجمالي', 'total_price'),
+    ('تاريخ التسليم', 'delivered_at'),
+]
+
+REVENUE_COLUMNS = ['الشهر', 'الفئة', 'عدد الطلبات', 'الإيرادات']
+
+# Requests that count towards revenue
+REVENUE_STATUSES = ['DELIVERED', 'ARCHIVED']
+
+STATUS_LABELS = dict(DesignRequest.STATUS_CHOICES)
+
+# Leading characters spreadsheet apps treat as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class ExportError(ValueError):
+    """خطأ في معاملات التصدير"""
+
+
+def _parse_date(value, end_of_day=False):
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ExportError(f"تاريخ غير صالح: {value}")
+    return timezone.make_aware(datetime.combine(day, time.max if end_of_day else time.min))
+
+
+def parse_filters(params):
+    """
+    تحويل معاملات الطلب إلى فلاتر.
+
+    Accepts date_from/date_to (YYYY-MM-DD), status (comma separated),
+    category and designer.
+    """
+    filters = {}
+    if params.get('date_from'):
+        filters['created_at__gte'] = _parse_date(params['date_from'])
+    if params.get('date_to'):
+        filters['created_at__lte'] = _parse_date(params['date_to'], end_of_day=True)
+
+    statuses = [s for s in (params.get('status') or '').split(',') if s]
+    unknown = set(statuses) - set(STATUS_LABELS)
+    if unknown:
+        raise ExportError(f"حالة غير معروفة: {', '.join(sorted(unknown))}")
+    if statuses:
+        filters['status__in'] = statuses
+
+    if params.get('category'):
+        try:
+            filters['category_id'] = int(params['category'])
+        except ValueError:
+            raise ExportError("الفئة غير صالحة")
+    if params.get('designer'):
+        try:
+            filters['assigned_designer_id'] = uuid.UUID(params['designer'])
+        except ValueError:
+            raise ExportError("المصمم غير صالح")
+    return filters
+
+
+def request_rows(filters, chunk_size=CHUNK_SIZE):
+    """
+    صفوف الطلبات الحية والمؤرشفة كقيم جاهزة للكتابة.
+
+    Both tables are read in created_at order and merged, so the output stays
+    sorted without loading either side into memory.
+    """
+    fields = [field for _, field in REQUEST_COLUMNS]
+    created_index = fields.index('created_at')
+    status_index = fields.index('status')
+    streams = [
+        model.objects.filter(**filters)
+        .order_by('created_at')
+        .values_list(*fields)
+        .iterator(chunk_size=chunk_size)
+        for model in (DesignRequest, ArchivedDesignRequest)
+    ]
+    for row in heapq.merge(*streams, key=lambda row: row[created_index]):
+        row = list(row)
+        row[status_index] = STATUS_LABELS.get(row[status_index], row[status_index])
+        yield row
+
+
+def revenue_rows(filters):
+    """
+    الإيرادات الشهرية لكل فئة حسب تاريخ التسليم.
+
+    Revenue is booked in the month a request was delivered, so the date
+    filters apply to delivered_at here. The live and archived tables are
+    aggregated separately and the two small result sets are added together.
+    """
+    filters = {
+        key.replace('created_at', 'delivered_at', 1): value for key, value in filters.items()
+    }
+    # A status filter can only narrow the revenue statuses, never add to them
+    requested = filters.pop('status__in', None)
+    statuses = [s for s in REVENUE_STATUSES if requested is None or s in requested]
+    filters = {'status__in': statuses, 'delivered_at__isnull': False, **filters}
+    totals = defaultdict(lambda: [0, 0])
+    for model in (DesignRequest, ArchivedDesignRequest):
+        queryset = (
+            model.objects.filter(**filters)
+            .annotate(month=TruncMonth('delivered_at'))
+            .values('month', 'category__name')
+            .annotate(count=Count('id'), revenue=Sum('total_price'))
+        )
+        for row in queryset.iterator():
+            total = totals[(row['month'].strftime('%Y-%m'), row['category__name'] or '')]
+            total[0] += row['count']
+            total[1] += row['revenue']
+    for (month, category), (count, revenue) in sorted(totals.items()):
+        yield [month, category, count, revenue]
+
+
+REPORTS = {
+    'requests': ([header for header, _ in REQUEST_COLUMNS], request_rows),
+    'revenue': (REVENUE_COLUMNS, revenue_rows),
+}
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M')
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+class _Echo:
+    """File-like object that hands back what is written to it"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(headers, rows):
+    """
+    أسطر CSV واحداً تلو الآخر.
+
+    Starts with a UTF-8 byte order mark so Excel reads the Arabic text
+    correctly.
+    """
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow([_cell(value) for value in row])
+
+
+def write_xlsx(headers, rows, fileobj):
+    """
+    كتابة ملف XLSX بذاكرة ثابتة.
+
+    openpyxl's write-only workbook streams rows to a temporary file, so
+    memory does not grow with the row count; the file is complete only once
+    every row is written.
+    """
+    if openpyxl is None:
+        raise ExportError("تصدير XLSX يتطلب تثبيت openpyxl")
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.sheet_view.rightToLeft = True
+    sheet.append(headers)
+    for row in rows:
+        sheet.append([_cell(value) for value in row])
+    workbook.save(fileobj)
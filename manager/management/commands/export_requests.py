@@ -0,0 +1,50 @@
+"""
+Management command to export design requests or revenue
+تصدير طلبات التصميم أو الإيرادات إلى ملف
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from manager import exports
+
+
+class Command(BaseCommand):
+    help = 'Export design requests or monthly revenue to CSV or XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('report', choices=sorted(exports.REPORTS))
+        parser.add_argument('--output', '-o', default='-', help='Output file, or - for stdout (CSV only)')
+        parser.add_argument('--date-from', help='YYYY-MM-DD')
+        parser.add_argument('--date-to', help='YYYY-MM-DD')
+        parser.add_argument('--status', help='Comma separated statuses')
+        parser.add_argument('--category', help='Category id')
+        parser.add_argument('--designer', help='Designer id')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        headers, rows = exports.REPORTS[options['report']]
+        try:
+            filters = exports.parse_filters(options)
+        except exports.ExportError as e:
+            raise CommandError(str(e))
+        if options['report'] == 'requests':
+            rows = exports.request_rows(filters, chunk_size=options['chunk_size'])
+        else:
+            rows = rows(filters)
+
+        output = options['output']
+        if output.endswith('.xlsx'):
+            try:
+                exports.write_xlsx(headers, rows, output)
+            except exports.ExportError as e:
+                raise CommandError(str(e))
+        elif output == '-':
+            for line in exports.iter_csv(headers, rows):
+                self.stdout.write(line, ending='')
+            return
+        else:
+            with open(output, 'w', encoding='utf-8', newline='') as f:
+                for line in exports.iter_csv(headers, rows):
+                    f.write(line)
+
+        self.stderr.write(self.style.SUCCESS(f"✅ Exported {options['report']} to {output}"))
@@ -1,3 +1,244 @@
+import csv
+import io
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache as django_cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import AuditLog
+from designs import archive
+from designs.models import DesignCategory, DesignRequest
+from games import schedule
+from games.models import WheelOfFortune, WheelPrizeRollup
+from skydesign import cache
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.api = APIClient()
+        self.manager = User.objects.create(
+            username='manager', email='manager@example.com', name='Manager', role='MANAGER'
+        )
+        self.client_user = User.objects.create(
+            username='client', email='client@example.com', name='=HYPERLINK("x")'
+        )
+        self.posters = DesignCategory.objects.create(name='ملصقات', slug='posters')
+        logos = DesignCategory.objects.create(name='شعارات', slug='logos')
+        for i in range(25):
+            DesignRequest.objects.create(
+                client=self.client_user, title=f'Request {i}', description='...',
+                category=self.posters if i % 5 else logos,
+                status='DELIVERED' if i % 2 else 'IN_PROGRESS',
+            )
+        DesignRequest.objects.update(total_price=Decimal('10.00'))
+        DesignRequest.objects.filter(status='DELIVERED').update(delivered_at=timezone.now())
+
+    def read_csv(self, response):
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_streams_filtered_requests(self):
+        self.api.force_authenticate(self.manager)
+        response = self.api.get(
+            reverse('manager:export', args=['requests']),
+            {'status': 'DELIVERED', 'category': self.posters.pk},
+        )
+        self.assertEqual(response.status_code, 200)
+        rows = self.read_csv(response)
+        self.assertEqual(rows[0][0], 'رقم الطلب')
+        self.assertEqual(len(rows) - 1, DesignRequest.objects.filter(
+            status='DELIVERED', category=self.posters
+        ).count())
+        self.assertEqual(rows[1][2], 'تم التسليم')
+        # Values that look like formulas are neutralized
+        self.assertTrue(rows[1][3].startswith("'="))
+
+    def test_revenue_report(self):
+        self.api.force_authenticate(self.manager)
+        rows = self.read_csv(self.api.get(reverse('manager:export', args=['revenue'])))
+        totals = {row[1]: (int(row[2]), Decimal(row[3])) for row in rows[1:]}
+        self.assertEqual(totals['ملصقات'], (10, Decimal('100.00')))
+        self.assertEqual(totals['شعارات'], (2, Decimal('20.00')))
+
+    def test_revenue_status_filter_only_narrows(self):
+        # Cancelled after delivery: never revenue, whatever the filter asks for
+        DesignRequest.objects.filter(status='IN_PROGRESS').update(
+            status='CANCELLED', delivered_at=timezone.now()
+        )
+        self.api.force_authenticate(self.manager)
+        url = reverse('manager:export', args=['revenue'])
+
+        rows = self.read_csv(self.api.get(url, {'status': 'DELIVERED,CANCELLED'}))
+        totals = {row[1]: (int(row[2]), Decimal(row[3])) for row in rows[1:]}
+        self.assertEqual(totals['ملصقات'], (10, Decimal('100.00')))
+        self.assertEqual(len(self.read_csv(self.api.get(url, {'status': 'CANCELLED'}))), 1)
+
+    def test_exports_include_archived_requests(self):
+        delivered = DesignRequest.objects.filter(status='DELIVERED', category=self.posters)
+        archived_number = delivered.order_by('created_at').first().request_number
+        archive.archive_batch(list(delivered.values_list('pk', flat=True)[:3]))
+        self.api.force_authenticate(self.manager)
+
+        rows = self.read_csv(self.api.get(
+            reverse('manager:export', args=['requests']),
+            {'status': 'DELIVERED', 'category': self.posters.pk},
+        ))
+        self.assertEqual(len(rows) - 1, 10)
+        self.assertIn(archived_number, [row[0] for row in rows[1:]])
+        self.assertEqual([row[1] for row in rows[1:]], sorted(row[1] for row in rows[1:]))
+
+        rows = self.read_csv(self.api.get(reverse('manager:export', args=['revenue'])))
+        totals = {row[1]: (int(row[2]), Decimal(row[3])) for row in rows[1:]}
+        self.assertEqual(totals['ملصقات'], (10, Decimal('100.00')))
+
+    def test_rejects_bad_filters_and_non_managers(self):
+        url = reverse('manager:export', args=['requests'])
+        self.api.force_authenticate(self.manager)
+        self.assertEqual(self.api.get(url, {'date_from': '2024-13-01'}).status_code, 400)
+        self.assertEqual(self.api.get(url, {'status': 'LOST'}).status_code, 400)
+
+        self.api.force_authenticate(self.client_user)
+        self.assertEqual(self.api.get(url).status_code, 403)
+
+    def test_command_writes_csv(self):
+        out = io.StringIO()
+        call_command('export_requests', 'requests', '--date-from', '2000-01-01', stdout=out)
+        rows = list(csv.reader(io.StringIO(out.getvalue().lstrip('\ufeff'))))
+        self.assertEqual(len(rows), 26)
+
+
+class WheelPrizeAnalyticsTests(TestCase):
+
+    def setUp(self):
+        self.api = APIClient()
+        self.manager = User.objects.create(
+            username='manager', email='manager@example.com', name='Manager', role='MANAGER'
+        )
+        self.wheel = WheelOfFortune.objects.create(segments=[
+            {'id': 1, 'text': '50 نقطة', 'weight': 1, 'prize_type': 'points', 'prize_value': 50},
+            {'id': 2, 'text': 'حظ أوفر', 'weight': 3, 'prize_type': 'nothing', 'prize_value': 0},
+        ])
+        WheelPrizeRollup.objects.create(
+            wheel=self.wheel, date=date(2026, 10, 1), segment_id='1', prize_type='points',
+            spins=10, claims=8, claimed_value=Decimal('400'),
+        )
+        WheelPrizeRollup.objects.create(
+            wheel=self.wheel, date=date(2026, 10, 2), segment_id='2', prize_type='nothing', spins=30,
+        )
+        self.url = reverse('manager:wheel-prizes', args=[self.wheel.pk])
+
+    def test_managers_only(self):
+        client_user = User.objects.create(username='client', email='client@example.com', name='Client')
+        self.api.force_authenticate(client_user)
+        self.assertEqual(self.api.get(self.url).status_code, 403)
+
+    def test_prize_distribution(self):
+        self.api.force_authenticate(self.manager)
+        response = self.api.get(self.url, {'date_from': '2026-10-01', 'date_to': '2026-10-31'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_spins'], 40)
+        self.assertEqual([s['expected'] for s in response.data['segments']], [10, 30])
+        self.assertEqual(response.data['prizes']['points']['claims'], 8)
+        self.assertEqual(response.data['prizes']['points']['claimed_value'], '400.00')
+        self.assertFalse(response.data['chi_square']['drift'])
+
+        self.assertEqual(self.api.get(self.url, {'date_from': 'soon'}).status_code, 400)
+
+
+class AuditLogViewTests(TestCase):
+
+    def test_search(self):
+        manager = User.objects.create(
+            username='manager', email='manager@example.com', name='Manager', role='MANAGER'
+        )
+        AuditLog.objects.create(action='LOGIN', model_name='User', object_id=str(manager.pk), user=manager)
+        AuditLog.objects.create(action='UPDATE', model_name='DesignRequest', object_id='1')
+        old = AuditLog.objects.create(action='UPDATE', model_name='DesignRequest', object_id='2')
+        AuditLog.objects.filter(pk=old.pk).update(timestamp=old.timestamp - timedelta(days=30))
+
+        api = APIClient()
+        api.force_authenticate(manager)
+        response = api.get(reverse('manager:audit-log'), {'model_name': 'DesignRequest'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['object_id'] for row in response.data], ['1'])
+        self.assertEqual(api.get(reverse('manager:audit-log'), {'limit': 'all'}).status_code, 400)
+        self.assertEqual(api.get(reverse('manager:audit-log'), {'user': 'admin'}).status_code, 400)
+        response = api.get(reverse('manager:audit-log'), {'user': str(manager.pk)})
+        self.assertEqual([row['action'] for row in response.data], ['LOGIN'])
+
+
+class CacheTests(TestCase):
+
+    def setUp(self):
+        django_cache.clear()
+        cache.reset_stats()
+        self.namespace = cache.Namespace('tests:cache')
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'value': 42}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.namespace.get_or_set('answer', compute)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'value': 42}] * 5)
+        counts = cache.stats()['tests:cache']
+        self.assertEqual((counts['misses'], counts['computes'], counts['waits']), (5, 1, 4))
+
+    def test_invalidate_retires_keys(self):
+        self.namespace.set('answer', 1)
+        self.assertEqual(self.namespace.get('answer'), 1)
+
+        self.namespace.invalidate()
+
+        self.assertIsNone(self.namespace.get('answer'))
+        self.assertEqual(self.namespace.get_or_set('answer', lambda: 2), 2)
+        self.assertEqual(cache.stats()['tests:cache']['hit_rate'], 0.3333)
+
+    def test_model_changes_invalidate_namespace(self):
+        version = schedule.DAILY.version()
+        with self.captureOnCommitCallbacks(execute=True):
+            WheelOfFortune.objects.create(title='Wheel', segments=[{'id': 1, 'weight': 1}])
+
+        self.assertNotEqual(schedule.DAILY.version(), version)
+
+    def test_stats_view(self):
+        manager = User.objects.create(
+            username='manager', email='manager@example.com', name='Manager', role='MANAGER'
+        )
+        self.namespace.get('missing')
+        api = APIClient()
+
+        self.assertEqual(api.get(reverse('manager:cache-stats')).status_code, 403)
+        api.force_authenticate(manager)
+        response = api.get(reverse('manager:cache-stats'))
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['tests:cache']['misses'], 1)
+        self.assertIn('designs:catalog', response.data)
@@ -4,5 +4,8 @@ from . import views
 app_name = 'manager'
 
 urlpatterns = [
-    # API endpoints will be added here
-]
\ No newline at end of file
+    path('exports/<slug:report>/', views.ExportView.as_view(), name='export'),
+    path('audit/', views.AuditLogView.as_view(), name='audit-log'),
+    path('cache/', views.CacheStatsView.as_view(), name='cache-stats'),
+    path('wheels/<uuid:wheel_id>/prizes/', views.WheelPrizeAnalyticsView.as_view(), name='wheel-prizes'),
+]
@@ -1,3 +1,141 @@
-from django.shortcuts import render
+"""
+Manager API views
+واجهات برمجة لوحة المدير
+"""
 
-# Create your views here.
+import tempfile
+import uuid
+from datetime import date, datetime, time, timedelta
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts import audit_partitions
+from accounts.permissions import IsManager
+from games import analytics
+from games.models import WheelOfFortune
+from manager import exports
+from skydesign import cache
+
+
+class ExportView(APIView):
+    """
+    Streaming export of design requests or monthly revenue.
+
+    CSV is streamed row by row; ?output=xlsx builds the workbook in a
+    temporary file and sends it once complete.
+    """
+    permission_classes = [IsManager]
+
+    def get(self, request, report):
+        if report not in exports.REPORTS:
+            return Response({'detail': 'Unknown report'}, status=status.HTTP_404_NOT_FOUND)
+        headers, rows = exports.REPORTS[report]
+
+        try:
+            filters = exports.parse_filters(request.query_params)
+            output = request.query_params.get('output', 'csv')
+            filename = f"{report}-{timezone.localdate():%Y%m%d}.{output}"
+
+            if output == 'xlsx':
+                spool = tempfile.TemporaryFile()
+                exports.write_xlsx(headers, rows(filters), spool)
+                spool.seek(0)
+                return FileResponse(spool, as_attachment=True, filename=filename)
+            if output != 'csv':
+                raise exports.ExportError("صيغة غير مدعومة")
+        except exports.ExportError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            exports.iter_csv(headers, rows(filters)),
+            content_type='text/csv; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class WheelPrizeAnalyticsView(APIView):
+    """
+    Prize distribution of one wheel, observed against its weights.
+
+    Reads the daily rollups only. ?date_from and ?date_to (YYYY-MM-DD)
+    default to the last 30 days.
+    """
+    permission_classes = [IsManager]
+
+    def get(self, request, wheel_id):
+        wheel = get_object_or_404(WheelOfFortune, pk=wheel_id)
+        today = timezone.localdate()
+        try:
+            date_to = date.fromisoformat(request.query_params.get('date_to') or today.isoformat())
+            date_from = date.fromisoformat(
+                request.query_params.get('date_from') or (date_to - timedelta(days=29)).isoformat()
+            )
+        except ValueError:
+            return Response({'detail': 'تاريخ غير صالح'}, status=status.HTTP_400_BAD_REQUEST)
+        if date_from > date_to:
+            return Response({'detail': 'تاريخ غير صالح'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(analytics.distribution(wheel, date_from, date_to))
+
+
+class AuditLogView(APIView):
+    """
+    Audit log search over a date range.
+
+    ?date_from and ?date_to (YYYY-MM-DD, default the last 7 days), plus
+    optional model_name, object_id, action, user and limit. Only the monthly
+    partitions overlapping the range are read.
+    """
+    permission_classes = [IsManager]
+
+    def get(self, request):
+        params = request.query_params
+        today = timezone.localdate()
+        try:
+            date_to = date.fromisoformat(params.get('date_to') or today.isoformat())
+            date_from = date.fromisoformat(params.get('date_from') or (date_to - timedelta(days=6)).isoformat())
+            limit = min(int(params.get('limit') or 100), 500)
+            user_id = uuid.UUID(params['user']) if params.get('user') else None
+        except ValueError:
+            return Response({'detail': 'معاملات غير صالحة'}, status=status.HTTP_400_BAD_REQUEST)
+
+        entries = audit_partitions.search(
+            timezone.make_aware(datetime.combine(date_from, time.min)),
+            timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min)),
+            model_name=params.get('model_name'),
+            object_id=params.get('object_id'),
+            action=params.get('action'),
+            user_id=user_id,
+            limit=limit,
+        )
+        return Response([
+            {
+                'id': str(entry.pk),
+                'timestamp': entry.timestamp,
+                'user': entry.user_id and str(entry.user_id),
+                'action': entry.action,
+                'model_name': entry.model_name,
+                'object_id': entry.object_id,
+                'data': entry.data,
+                'ip_address': entry.ip_address,
+            }
+            for entry in entries
+        ])
+
+
+class CacheStatsView(APIView):
+    """
+    Cache hits, misses, recomputes and waits per namespace.
+
+    Totals since the counters were last cleared, over every process that
+    has published its counts.
+    """
+    permission_classes = [IsManager]
+
+    def get(self, request):
+        return Response(cache.stats())
@@ -15,6 +15,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skydesign.settings')
 django_asgi_app = get_asgi_application()
 
 from chat import routing as chat_routing
+from games import routing as games_routing
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
@@ -22,6 +23,7 @@ application = ProtocolTypeRouter({
         AuthMiddlewareStack(
             URLRouter(
                 chat_routing.websocket_urlpatterns
+                + games_routing.websocket_urlpatterns
             )
         )
     ),
@@ -0,0 +1,207 @@
+"""
+Application cache helpers
+أدوات التخزين المؤقت المشتركة
+
+Each feature caches through a Namespace, whose keys look like
+"<namespace>:<version>:<key>". invalidate() bumps the version number, which
+retires every key of the namespace at once; the old entries simply expire.
+Versions are time based, so a version lost from the cache is never reused.
+Namespaces whose keys identify immutable content can be created with
+versioned=False and skip the version lookup.
+
+get_or_set() recomputes a missing value once across all processes: the
+first caller to miss takes a short lock with cache.add() and computes it,
+while the others poll for the result for up to CACHE_COMPUTE_WAIT_SECONDS
+and only then compute it themselves. None cannot be cached.
+
+invalidate_on() bumps a namespace after any model of the given types is
+saved or deleted, once the transaction commits.
+
+Every process counts hits, misses, recomputes and waits per namespace and
+adds them to shared counters in the cache every CACHE_STATS_FLUSH_SECONDS;
+stats() returns the totals.
+"""
+
+import math
+import time
+from collections import Counter, defaultdict
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+
+STATS_KEY = 'cache:stats:{namespace}:{event}'
+EVENTS = ('hits', 'misses', 'computes', 'waits')
+
+_namespaces = {}
+_stats = defaultdict(Counter)
+_stats_lock = Lock()
+_next_publish = time.monotonic() + settings.CACHE_STATS_FLUSH_SECONDS
+
+
+def _new_version():
+    return int(time.time() * 1000)
+
+
+class Namespace:
+    """مجموعة مفاتيح مخزنة تُبطل معاً"""
+
+    def __init__(self, name, timeout=DEFAULT_TIMEOUT, versioned=True):
+        self.name = name
+        self.timeout = timeout
+        self.versioned = versioned
+        self.version_key = f"{name}:version"
+        _namespaces[name] = self
+
+    def version(self):
+        """رقم الإصدار الحالي للنطاق"""
+        if not self.versioned:
+            return 0
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, _new_version(), None)
+            version = cache.get(self.version_key)
+        return version
+
+    def key(self, key, version=None):
+        if not self.versioned:
+            return f"{self.name}:{key}"
+        return f"{self.name}:{self.version() if version is None else version}:{key}"
+
+    def get(self, key, version=None):
+        value = cache.get(self.key(key, version))
+        record(self.name, 'misses' if value is None else 'hits')
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        cache.set(self.key(key, version), value, self.timeout if timeout is DEFAULT_TIMEOUT else timeout)
+
+    def delete(self, key, version=None):
+        cache.delete(self.key(key, version))
+
+    def get_or_set(self, key, compute, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        القيمة المخزنة أو حسابها مرة واحدة عند غيابها.
+
+        Pass version when the caller already read it, to save a round trip.
+        """
+        full_key = self.key(key, version)
+        value = cache.get(full_key)
+        if value is not None:
+            record(self.name, 'hits')
+            return value
+        record(self.name, 'misses')
+
+        wait = settings.CACHE_COMPUTE_WAIT_SECONDS
+        lock_key = f"{full_key}:lock"
+        if not cache.add(lock_key, 1, max(math.ceil(wait * 2), 1)):
+            value = self._wait(full_key, time.monotonic() + wait)
+            if value is not None:
+                record(self.name, 'waits')
+                return value
+            # The holder is slow or gone; compute rather than wait longer
+            lock_key = None
+
+        try:
+            value = compute()
+            record(self.name, 'computes')
+            if value is not None:
+                cache.set(full_key, value, self.timeout if timeout is DEFAULT_TIMEOUT else timeout)
+        finally:
+            if lock_key:
+                cache.delete(lock_key)
+        return value
+
+    def _wait(self, full_key, deadline):
+        delay = 0.01
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            value = cache.get(full_key)
+            if value is not None:
+                return value
+            delay = min(delay * 2, 0.2)
+        return None
+
+    def invalidate(self):
+        """إبطال جميع مفاتيح النطاق"""
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, _new_version(), None)
+
+    def invalidate_on(self, *models):
+        """إبطال النطاق بعد حفظ أو حذف أي كائن من هذه النماذج"""
+        def handler(sender, **kwargs):
+            transaction.on_commit(self.invalidate)
+
+        for model in models:
+            for signal in (post_save, post_delete):
+                signal.connect(
+                    handler,
+                    sender=model,
+                    weak=False,
+                    dispatch_uid=f"cache:{self.name}:{model._meta.label}:{signal is post_save}",
+                )
+
+
+def record(namespace, event):
+    """عدّ حدث (hits/misses/computes/waits) للنطاق"""
+    with _stats_lock:
+        _stats[namespace][event] += 1
+        due = time.monotonic() >= _next_publish
+    if due:
+        publish()
+
+
+def publish():
+    """إضافة عدادات هذه العملية إلى العدادات المشتركة"""
+    global _stats, _next_publish
+    with _stats_lock:
+        pending, _stats = _stats, defaultdict(Counter)
+        _next_publish = time.monotonic() + settings.CACHE_STATS_FLUSH_SECONDS
+    for namespace, counts in pending.items():
+        for event, count in counts.items():
+            key = STATS_KEY.format(namespace=namespace, event=event)
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                if not cache.add(key, count, None):
+                    cache.incr(key, count)
+
+
+def stats():
+    """
+    إحصائيات الإصابة والإخفاق لكل نطاق.
+
+    Returns {namespace: {'hits', 'misses', 'computes', 'waits', 'hit_rate'}}
+    summed over every process that has published.
+    """
+    publish()
+    keys = {
+        STATS_KEY.format(namespace=namespace, event=event): (namespace, event)
+        for namespace in sorted(_namespaces)
+        for event in EVENTS
+    }
+    values = cache.get_many(list(keys))
+    report = {namespace: dict.fromkeys(EVENTS, 0) for namespace in sorted(_namespaces)}
+    for key, value in values.items():
+        namespace, event = keys[key]
+        report[namespace][event] = value
+    for counts in report.values():
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_rate'] = round(counts['hits'] / lookups, 4) if lookups else None
+    return report
+
+
+def reset_stats():
+    global _next_publish
+    with _stats_lock:
+        _stats.clear()
+        _next_publish = time.monotonic() + settings.CACHE_STATS_FLUSH_SECONDS
+    cache.delete_many([
+        STATS_KEY.format(namespace=namespace, event=event) for namespace in _namespaces for event in EVENTS
+    ])
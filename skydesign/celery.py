@@ -0,0 +1,14 @@
+"""
+Celery application for background tasks
+تطبيق Celery للمهام الخلفية
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skydesign.settings')
+
+app = Celery('skydesign')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
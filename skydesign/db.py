@@ -0,0 +1,62 @@
+"""
+Database helpers shared by the apps
+أدوات قاعدة البيانات المشتركة
+
+upsert_counter() writes pre-aggregated counters in one statement: new rows
+are inserted, and rows that already exist have their counters added to in
+place. The ORM's bulk_create(update_conflicts=True) can only overwrite
+columns, which loses increments made by concurrent writers.
+"""
+
+from django.db import connections, router
+
+
+def upsert_counter(model, rows, unique_fields, increment_fields, min_fields=(), using=None):
+    """
+    إدراج صفوف أو زيادة عداداتها إن كانت موجودة.
+
+    rows are dicts keyed by field name; they must all have the same keys.
+    Columns in increment_fields are added to the stored value, columns in
+    min_fields keep the smaller non-null value. Works on PostgreSQL and
+    SQLite (INSERT ... ON CONFLICT DO UPDATE).
+    """
+    if not rows:
+        return
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    meta = model._meta
+    table = quote(meta.db_table)
+
+    names = list(rows[0])
+    pk = meta.pk
+    if pk.name not in names and pk.has_default():
+        names.insert(0, pk.name)
+    fields = [meta.get_field(name) for name in names]
+
+    params = []
+    for row in rows:
+        for field in fields:
+            value = row[field.name] if field.name in row else field.get_default()
+            params.append(field.get_db_prep_save(value, connection))
+
+    placeholders = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    updates = []
+    for name in increment_fields:
+        column = quote(meta.get_field(name).column)
+        updates.append(f"{column} = {table}.{column} + excluded.{column}")
+    for name in min_fields:
+        column = quote(meta.get_field(name).column)
+        updates.append(
+            f"{column} = CASE WHEN {table}.{column} IS NULL OR excluded.{column} < {table}.{column} "
+            f"THEN excluded.{column} ELSE {table}.{column} END"
+        )
+
+    sql = (
+        f"INSERT INTO {table} ({', '.join(quote(f.column) for f in fields)}) "
+        f"VALUES {', '.join([placeholders] * len(rows))} "
+        f"ON CONFLICT ({', '.join(quote(meta.get_field(n).column) for n in unique_fields)}) "
+        f"DO UPDATE SET {', '.join(updates)}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
@@ -0,0 +1,26 @@
+"""
+Stored file helpers shared by the apps
+أدوات الملفات المخزنة المشتركة
+
+source_sha256() fingerprints a file in default_storage. Uploads stored
+under blobs/ are already named by their SHA-256, so their hash is read
+from the name instead of the content.
+"""
+
+import hashlib
+from pathlib import PurePosixPath
+
+from django.core.files.storage import default_storage
+
+
+def source_sha256(name):
+    """بصمة الملف المصدر، دون قراءته إن كان مخزناً حسب البصمة"""
+    path = PurePosixPath(name)
+    if path.parts[:1] == ('blobs',) and len(path.stem) == 64:
+        return path.stem
+
+    hasher = hashlib.sha256()
+    with default_storage.open(name, 'rb') as source:
+        for chunk in iter(lambda: source.read(64 * 1024), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
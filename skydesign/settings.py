@@ -5,6 +5,8 @@ Sky Design Platform Settings
 
 from pathlib import Path
 import os
+import tempfile
+from celery.schedules import crontab
 from decouple import config, Csv
 import dj_database_url
 
@@ -67,6 +69,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'accounts.middleware.LastSeenMiddleware',
 ]
 
 ROOT_URLCONF = 'skydesign.urls'
@@ -113,6 +116,35 @@ DATABASES = {
     )
 }
 
+# Cache: Redis in production; locmem (one process) or file (shared by local
+# processes on one machine) as local stand-ins. See skydesign.cache
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem' if DEBUG else 'redis')
+CACHE_BACKENDS = {
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('CACHE_REDIS_URL', default=config('REDIS_URL', default='redis://localhost:6379/0')),
+    },
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'skydesign',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_FILE_DIR', default=os.path.join(tempfile.gettempdir(), 'skydesign-cache')),
+    },
+}
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'KEY_PREFIX': 'skydesign',
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+    },
+}
+# Seconds a miss waits for another process already recomputing the value
+CACHE_COMPUTE_WAIT_SECONDS = config('CACHE_COMPUTE_WAIT_SECONDS', default=5, cast=float)
+# Seconds between publishing this process's hit/miss counts to the cache
+CACHE_STATS_FLUSH_SECONDS = config('CACHE_STATS_FLUSH_SECONDS', default=30, cast=int)
+
 # Authentication
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -172,6 +204,37 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Chunked uploads
+CHUNKED_UPLOAD_DIR = config('CHUNKED_UPLOAD_DIR', default=str(BASE_DIR / 'media' / 'uploads' / 'parts'))
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = config('CHUNKED_UPLOAD_MAX_CHUNK_SIZE', default=5 * 1024 * 1024, cast=int)
+CHUNKED_UPLOAD_MAX_FILE_SIZE = config('CHUNKED_UPLOAD_MAX_FILE_SIZE', default=500 * 1024 * 1024, cast=int)
+CHUNKED_UPLOAD_EXPIRY_HOURS = config('CHUNKED_UPLOAD_EXPIRY_HOURS', default=24, cast=int)
+
+# Cold archive for finished design requests
+ARCHIVE_AFTER_DAYS = config('ARCHIVE_AFTER_DAYS', default=180, cast=int)
+
+# Image derivatives (thumbnails and web-optimized copies)
+IMAGE_DERIVATIVE_VARIANTS = {
+    'thumb': {'size': (320, 320), 'quality': 75},
+    'medium': {'size': (800, 800), 'quality': 80},
+    'web': {'size': (1600, 1600), 'quality': 82},
+}
+
+# Pre-sliced puzzle tiles: one sprite sheet per supported grid size
+PUZZLE_TILE_GRID_SIZES = [3, 4, 5, 6]
+PUZZLE_BOARD_SIZE = config('PUZZLE_BOARD_SIZE', default=960, cast=int)
+PUZZLE_TILE_GUTTER = 2
+PUZZLE_TILE_QUALITY = 80
+PUZZLE_THUMBNAIL_SIZE = (320, 320)
+# Daily wheel and puzzle schedule
+DAILY_SCHEDULE_DAYS_AHEAD = config('DAILY_SCHEDULE_DAYS_AHEAD', default=2, cast=int)
+DAILY_SCHEDULE_LOCAL_SECONDS = config('DAILY_SCHEDULE_LOCAL_SECONDS', default=300, cast=int)
+# Live puzzle sessions write their snapshot at most this often
+PUZZLE_AUTOSAVE_SECONDS = config('PUZZLE_AUTOSAVE_SECONDS', default=10, cast=float)
+# Wheel prize drift alert: chi-square p-value threshold and window
+WHEEL_DRIFT_ALPHA = config('WHEEL_DRIFT_ALPHA', default=0.001, cast=float)
+WHEEL_DRIFT_WINDOW_DAYS = config('WHEEL_DRIFT_WINDOW_DAYS', default=7, cast=int)
+
 # WhiteNoise settings for static files
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
@@ -228,6 +291,40 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Run tasks inline during local development when no worker is running
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=DEBUG, cast=bool)
+CELERY_BEAT_SCHEDULE = {
+    'snapshot-live-leaderboards': {
+        'task': 'games.tasks.snapshot_live_leaderboards',
+        'schedule': 5 * 60,
+    },
+    'reconcile-ledger': {
+        'task': 'accounts.tasks.reconcile_ledger',
+        'schedule': 60 * 60,
+    },
+    # Ahead of the local midnight rollover (CELERY_TIMEZONE is TIME_ZONE)
+    'prepare-daily-content': {
+        'task': 'games.tasks.prepare_daily_content',
+        'schedule': crontab(hour=23, minute=30),
+    },
+    'maintain-audit-partitions': {
+        'task': 'accounts.tasks.maintain_audit_partitions',
+        'schedule': crontab(hour=2, minute=15),
+    },
+    'check-prize-drift': {
+        'task': 'games.tasks.check_prize_drift',
+        'schedule': crontab(hour=6, minute=0),
+    },
+}
+
+# Live leaderboards: Redis sorted sets in production, an in-process
+# skip list for a single local process
+LIVE_LEADERBOARD_BACKEND = config('LIVE_LEADERBOARD_BACKEND', default='memory' if DEBUG else 'redis')
+LIVE_LEADERBOARD_REDIS_URL = config(
+    'LIVE_LEADERBOARD_REDIS_URL',
+    default=config('REDIS_URL', default='redis://localhost:6379/0')
+)
+LIVE_LEADERBOARD_PUSH = config('LIVE_LEADERBOARD_PUSH', default=True, cast=bool)
 
 # Security Settings
 if not DEBUG:
@@ -274,6 +371,26 @@ LOGGING = {
 # Create logs directory if it doesn't exist
 os.makedirs(BASE_DIR / 'logs', exist_ok=True)
 
+# Audit log: events are queued and bulk-written by a background thread,
+# except for the actions listed here, which commit with their transaction
+AUDIT_ASYNC = config('AUDIT_ASYNC', default=True, cast=bool)
+AUDIT_SYNC_ACTIONS = ['PAYMENT']
+AUDIT_QUEUE_SIZE = config('AUDIT_QUEUE_SIZE', default=10000, cast=int)
+AUDIT_BATCH_SIZE = config('AUDIT_BATCH_SIZE', default=500, cast=int)
+AUDIT_FLUSH_SECONDS = config('AUDIT_FLUSH_SECONDS', default=2, cast=float)
+AUDIT_SPILL_PATH = config('AUDIT_SPILL_PATH', default=str(BASE_DIR / 'logs' / 'audit-spill.jsonl'))
+# Events the database rejects even one at a time
+AUDIT_DEAD_LETTER_PATH = config('AUDIT_DEAD_LETTER_PATH', default=str(BASE_DIR / 'logs' / 'audit-dead-letter.jsonl'))
+AUDIT_USER_AGENT_LENGTH = 512
+# Last seen: written at most once per interval per worker, and only when
+# the stored value is older than the threshold
+LAST_SEEN_FLUSH_SECONDS = config('LAST_SEEN_FLUSH_SECONDS', default=60, cast=int)
+LAST_SEEN_THRESHOLD_SECONDS = config('LAST_SEEN_THRESHOLD_SECONDS', default=60, cast=int)
+# Monthly audit partitions older than this are exported and dropped
+AUDIT_RETENTION_MONTHS = config('AUDIT_RETENTION_MONTHS', default=12, cast=int)
+AUDIT_EXPORT_EXPIRED = config('AUDIT_EXPORT_EXPIRED', default=True, cast=bool)
+AUDIT_EXPORT_DIR = config('AUDIT_EXPORT_DIR', default=str(BASE_DIR / 'logs' / 'audit-archive'))
+
 # Custom settings
 SITE_NAME = config('SITE_NAME', default='منصة سكاي للتصميم')
 SITE_URL = config('SITE_URL', default='http://localhost:8000')
@@ -0,0 +1,61 @@
+"""
+Test helpers shared by the apps
+أدوات الاختبار المشتركة
+
+ConcurrentTestCase is a TransactionTestCase for tests that write from
+several threads at once. SQLite's in-memory test database is opened in
+shared-cache mode, where a second writer fails with "table is locked"
+instead of waiting. For these classes only, the schema is copied into a
+temporary file database with a busy timeout, so writers queue on the lock
+as they would on a server. Other databases are used as they are.
+"""
+
+import os
+import sqlite3
+import tempfile
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+
+class ConcurrentTestCase(TransactionTestCase):
+    """اختبارات تكتب من عدة خيوط في الوقت نفسه"""
+
+    # Seconds a SQLite writer waits for the lock before failing
+    busy_timeout = 30
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        if connection.vendor != 'sqlite':
+            return
+        settings_dict = connection.settings_dict
+        cls._memory_name = settings_dict['NAME']
+        cls._memory_options = settings_dict.get('OPTIONS', {})
+
+        connection.ensure_connection()
+        handle, cls._file_name = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        target = sqlite3.connect(cls._file_name)
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+
+        # Keep the in-memory database alive (it disappears with its last
+        # connection) while every thread connects to the file instead
+        cls._memory_connection = connection.connection
+        connection.connection = None
+        settings_dict['NAME'] = cls._file_name
+        settings_dict['OPTIONS'] = {**cls._memory_options, 'timeout': cls.busy_timeout}
+
+    @classmethod
+    def tearDownClass(cls):
+        if connection.vendor == 'sqlite':
+            connection.close()
+            settings_dict = connection.settings_dict
+            settings_dict['NAME'] = cls._memory_name
+            settings_dict['OPTIONS'] = cls._memory_options
+            connection.connection = cls._memory_connection
+            os.remove(cls._file_name)
+        super().tearDownClass()
@@ -5,14 +5,15 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.generic import TemplateView
+
+from designs.views import HomeView
 
 urlpatterns = [
     # Admin
     path('admin/', admin.site.urls),
     
     # Home
-    path('', TemplateView.as_view(template_name='home.html'), name='home'),
+    path('', HomeView.as_view(), name='home'),
     
     # Authentication - Django Allauth
     path('accounts/', include('allauth.urls')),